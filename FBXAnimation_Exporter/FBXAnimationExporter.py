@@ -1,8 +1,50 @@
 import maya.cmds as cmds
 import maya.mel as mel
 import string
-#Export settings in maya
-mel.eval("source FBXAnimationExporter_FBXOptions.mel")
+import os
+import json
+import math
+import time
+
+from FBXAnimationExporter_Core import (EXPORT_MANIFEST_NAME, EXPORT_MANIFEST_VERSION, ORIGIN_CHANNELS,
+                                       EXPORT_SETTINGS_VERSION, EXPORT_SETTINGS_DEFAULTS, ReturnNumpy,
+                                       ReturnDefaultExportSettings, ParseExportSettings, FormatExportSettings,
+                                       ParseLegacyAnimLayerSettings, ReturnExportFileName, ReturnUnionFrameRange,
+                                       OrderJobsByAnimLayers, ReturnAnimLayerKey, ReturnJobAnimLayerState, ReturnFingerprintHash,
+                                       ReturnFileHash, IsExportUpToDate, RecordExportFingerprint,
+                                       ReadExportManifest, SolveOriginArrays, ReturnFrameArray, ReturnKeyTolerances,
+                                       ReturnChannelTolerances, ReduceKeyArrays, ReturnPoseCacheFileName,
+                                       ReturnFrameRate, WritePoseCache, ReadPoseCache, ReturnValuesHash)
+
+#Export settings in maya, sourced on first use, see EvalFBXExportOptions
+FBX_OPTIONS_MEL = "FBXAnimationExporter_FBXOptions.mel"
+_fbxOptions = {}
+
+#Scene index cache, namespace -> {"origin", "exportNodes", "meshes"}, see ReturnSceneIndex
+_sceneIndex = {}
+_sceneIndexJobs = []
+SCENE_INDEX_EVENTS = ["SceneOpened", "NewSceneOpened", "NameChanged"]
+
+#Deformer index cache, namespace -> {"meshes"}, see ReturnDeformerIndex
+_deformerIndex = {}
+
+#Network node whose garbage attribute is connected to every node tagged by TagForGarbage
+GARBAGE_COLLECTOR = "FBXExporterGarbage"
+
+#Export rig cache, origin -> {"uuid", "signature", "joints"}, see CopyAndConnectSkeleton
+_exportRigCache = {}
+TRANSFORM_ATTRS = ["translate", "translateX", "translateY", "translateZ",
+                   "rotate", "rotateX", "rotateY", "rotateZ",
+                   "scale", "scaleX", "scaleY", "scaleZ"]
+
+#Instrumentation state, see EnableExportInstrumentation
+_instrumentation = {"enabled": False, "records": []}
+EXPORT_REPORT_VERSION = 1
+EXPORT_STAGES = ["plan", "originLookup", "meshDiscovery", "fingerprint", "rigBuild", "rigBake",
+                 "originTransform", "layerSetup", "keyReduction", "selection", "write", "poseCache", "rollback"]
+
+#ExportTransactions whose undo chunk is open, innermost last
+_openTransactions = []
 
 ###############################################################################
 
@@ -13,20 +55,30 @@ mel.eval("source FBXAnimationExporter_FBXOptions.mel")
 #=======================Export FBX===============================================
 
 def ExportFBX(exportNode):
-    curWorkspace = cmds.workspace(q=True, rd=True)
-    fileName = cmds.getAttr(exportNode + ".exportName")
+    newFBX = ReturnExportPath(exportNode)
     
-    if fileName:
-        newFBX = curWorkspace + fileName
+    if newFBX:
         cmds.file(newFBX, force = True, type = 'FBX export', pr=True, es=True)
     else:
         cmds.warning("No Valid Export Filename for Export Node " + exportNode + "\n")
+        
+    return newFBX
 
 #========================== ExportFBXCharacter ===================================== 
+#Returns a list of {"exportNode", "exportName", "result"} with result "exported", "skipped" or None if nothing was written
+#The origin is parented to the world once for all export nodes. With transaction the parenting and selection are
+#rolled back with ExportTransaction, else the origin is parented back when done
+#The scene index is rebuilt for every run so connections made since the last run are seen
       
-def ExportFBXCharacter(exportNode):
+def ExportFBXCharacter(exportNode, force = False, transaction = False):
+    results = []
+    InvalidateSceneIndex()
     origin = ReturnOrigin("")
     
+    if not origin:
+        cmds.warning("No origin found in the scene\n")
+        return results
+        
     exportNodes = []
 
     if exportNode:
@@ -34,86 +86,966 @@ def ExportFBXCharacter(exportNode):
     else:
         exportNodes = ReturnFBXExportNodes(origin)
         
-    parentNode = cmds.listRelatives(origin, parent=True, fullPath = True)
-    
-    if parentNode:
-        cmds.parent(origin, world = True)
+    with ExportTransaction(transaction) as sceneTransaction:
+        parentNode = cmds.listRelatives(origin, parent=True, fullPath = True)
         
+        if parentNode:
+            cmds.parent(origin, world = True)
+            
+        try:
+            ExportFBXCharacterNodes(origin, exportNodes, force, results)
+        finally:
+            if parentNode and not sceneTransaction.active:
+                cmds.parent(origin, parentNode[0])
+                
+    return results
+
+#PURPOSE        Export the export nodes of a character
+#PROCEDURE      Skip export nodes whose output is up to date, else select origin and meshes and export with the
+#               model options. The fingerprint holds the geometry and skinning of the meshes next to the animation,
+#               see ReturnMeshContentData. One result per export node with export set is appended to results
+#PRESUMPTIONS   origin is parented to the world, see ExportFBXCharacter
+def ExportFBXCharacterNodes(origin, exportNodes, force, results):
     for curExportNode in exportNodes:
-        if cmds.getAttr(curExportNode + ".export"):
-            mel.eval("SetFBXExportOptions_model()")
+        settings = ReadExportNodeSettings(curExportNode)
+        
+        if settings["export"]:
+            meshes = ReturnConnectedMeshes(curExportNode) or []
             
-            cmds.select(clear = True)
+            exportPath = ReturnExportPath(curExportNode)
             
-            meshes = ReturnConnectedMeshes(exportNode)
-            cmds.select(origin, add = True)
-            cmds.select(meshes, add = True)
+            with ExportStage("fingerprint", curExportNode, origin):
+                fingerprint = ReturnExportFingerprint({"origin": origin,
+                                                       "meshes": meshes,
+                                                       "exportName": settings["exportName"]},
+                                                      "SetFBXExportOptions_model()",
+                                                      ReturnRigAnimationData(origin, meshes),
+                                                      ReturnMeshContentData(meshes))
             
-            ExportFbx(curExportNode)
+            result = {"exportNode": curExportNode, "exportName": settings["exportName"], "result": None}
+            results.append(result)
             
-        if parentNode:
-            cmds.parent(origin, parentNode[0])
+            if not force and IsExportUpToDate(exportPath, fingerprint):
+                print("Skipping unchanged export " + curExportNode)
+                result["result"] = "skipped"
+            else:
+                with ExportStage("selection", curExportNode, origin):
+                    cmds.select(clear = True)
+                    
+                    cmds.select(origin, add = True)
+                    cmds.select(meshes, add = True)
+                
+                with ExportStage("write", curExportNode, origin):
+                    EvalFBXExportOptions("SetFBXExportOptions_model()")
+                    
+                    if ExportFBX(curExportNode):
+                        RecordExportFingerprint(exportPath, fingerprint)
+                        result["result"] = "exported"
 
 #============================== ExportFBXAnimation ==============================
  
-def ExportFBXAnimation(characterName, exportNode):
+#With transaction the scene changes of every clip are rolled back with ExportTransaction instead of being cleaned up
+#With reduceKeys the rig curves of every clip are thinned out before the write, see ReduceExportRigKeys. keyTolerances
+#overrides the per channel type tolerances of KEY_REDUCTION_TOLERANCES
+#With poseCache every clip also writes its joint transforms to a .posecache file next to the FBX, see WriteExportPoseCache
+#The scene index is rebuilt for every run so connections made since the last run are seen
+ 
+def ExportFBXAnimation(characterName, exportNode, dryRun = False, arraySolve = False, force = False, reportPath = None,
+                       singlePass = False, transaction = False, reduceKeys = False, keyTolerances = None,
+                       poseCache = False):
+    if reportPath:
+        EnableExportInstrumentation()
+        
+    InvalidateSceneIndex()
+    
+    try:
+        with ExportStage("plan"):
+            plan = PlanFBXAnimationExport(characterName, exportNode)
+        
+        if dryRun:
+            PrintFBXExportPlan(plan, singlePass)
+            return plan
+            
+        ClearLegacyGarbage()
+        ClearGarbage()
+        
+        try:
+            RunFBXExportPlan(plan, arraySolve, force, singlePass, transaction, reduceKeys, keyTolerances, poseCache)
+        finally:
+            ClearGarbage()
+            
+    finally:
+        if reportPath:
+            WriteExportReport(reportPath, DisableExportInstrumentation())
+        
+    return plan
+                 
+#######################################################################################
 
-    ClearGarbage()
+#                            Export Planning Procedures
+
+#######################################################################################
+
+#PURPOSE        Return the namespaces of the characters to export
+#PROCEDURE      If a character name is given use it, else return the namespace of every reference in the scene
+#PRESUMPTIONS   Every referenced file is a character, namespace does not include colon
+def ReturnExportCharacters(characterName):
     characters = []
     
     if characterName:
         characters.append(characterName)
     else:
-        reference = cmd.file(reference=1, query = True)
+        references = cmds.file(reference = True, query = True) or []
         for curRef in references:
-            characters.append(cmds.file(curRef, namespace = 1, query = True))
+            characters.append(cmds.file(curRef, namespace = True, query = True))
             
-    for curCharacter in characters:
+    return characters
+
+#PURPOSE        Scan the scene once and build the list of animation export jobs
+#PROCEDURE      For every character look up origin, meshes and export nodes a single time. Every export node
+#               with export set becomes a job holding its resolved frame range and settings, which are bulk loaded
+#               with LoadAllExportNodeSettings when no single export node is given. Jobs are grouped
+#               by origin so one export rig is built per origin and shared by all of its clips, and ordered
+#               inside a group so clips with the same anim layer settings follow each other
+#PRESUMPTIONS   Returns a list of groups {"character", "origin", "meshes", "jobs"} in scene order,
+#               characters without an origin are skipped with a warning
+def PlanFBXAnimationExport(characterName, exportNode):
+    plan = []
+    groups = {}
+    
+    sceneStart = cmds.playbackOptions(query = True, minTime = True)
+    sceneEnd = cmds.playbackOptions(query = True, maxTime = True)
+    
+    allSettings = {}
+    
+    if not exportNode:
+        allSettings = LoadAllExportNodeSettings()
+    
+    for curCharacter in ReturnExportCharacters(characterName):
+        with ExportStage("originLookup"):
+            origin = ReturnOrigin(curCharacter)
         
-        #get meshes with blendshapes
-        meshes = FindMeshesWithBlendshapes(curCharacter)
+        if not origin:
+            cmds.warning("No origin found for character " + curCharacter + "\n")
+            continue
         
-        #get origin
-        origin = ReturnOrigin(curCharacter)
+        with ExportStage("meshDiscovery", origin = origin):
+            meshes = FindMeshesWithBlendshapes(curCharacter)
         
         exportNodes = []
         
         if exportNode:
             exportNodes.append(exportNode)
         else:
-            exportNodes = ReturnFBXExportNodes(origin)
+            exportNodes = ReturnFBXExportNodes(origin) or []
             
-        
         for curExportNode in exportNodes:
-            if cmds.getAttr(curExportNode + ".export") and origin != "Error":
-                exportRig = CopyAndConnectSkeleton(origin)
+            settings = allSettings.get(curExportNode) or ReadExportNodeSettings(curExportNode)
+            
+            if not settings["export"]:
+                continue
+                
+            startFrame = sceneStart
+            endFrame = sceneEnd
+            
+            if settings["useSubRange"]:
+                startFrame = settings["startFrame"]
+                endFrame = settings["endFrame"]
                 
-                startFrame = cmds.playbackOptions(query=True, minTime=1)
-                endFrame = cmds.playbackOptions(query=True, maxTime=1)
+            job = {"character": curCharacter,
+                   "origin": origin,
+                   "meshes": meshes,
+                   "exportNode": curExportNode,
+                   "exportName": settings["exportName"],
+                   "startFrame": startFrame,
+                   "endFrame": endFrame,
+                   "moveToOrigin": settings["moveToOrigin"],
+                   "zeroOrigin": settings["zeroOrigin"],
+                   "animLayers": settings["animLayers"]}
+            
+            if origin not in groups:
+                groups[origin] = {"character": curCharacter, "origin": origin, "meshes": meshes, "jobs": []}
+                plan.append(groups[origin])
+                
+            groups[origin]["jobs"].append(job)
+            
+    for group in plan:
+        group["jobs"] = OrderJobsByAnimLayers(group["jobs"])
+        
+    return plan
+
+#PURPOSE        Run a plan built by PlanFBXAnimationExport
+#PROCEDURE      Capture the anim layer state once, give every job the full layer state it exports with, its stored
+#               layers and every other layer as captured, see ReturnJobAnimLayerState, so a job does not inherit the
+#               layers of the job before it. Run every origin group with RunFBXExportGroup and put the layers back
+#               the way they were when the batch ends, also on error
+#PRESUMPTIONS   Garbage is cleared by the caller. Each job gets "animLayerState", "fingerprint" and "result" set to
+#               "exported" or "skipped"
+def RunFBXExportPlan(plan, arraySolve = False, force = False, singlePass = False, transaction = False,
+                     reduceKeys = False, keyTolerances = None, poseCache = False):
+    layerState = CaptureAnimLayerState()
+    layerSnapshot = dict((curLayer, dict(curState)) for curLayer, curState in layerState.items())
+    tolerances = None
+    
+    if reduceKeys:
+        tolerances = ReturnKeyReductionTolerances(keyTolerances)
+        
+    if poseCache and ReturnNumpy() is None:
+        cmds.warning("NumPy is not available, exporting without pose caches\n")
+        poseCache = False
+        
+    for group in plan:
+        for job in group["jobs"]:
+            job["animLayerState"] = ReturnJobAnimLayerState(job["animLayers"], layerSnapshot)
+    
+    try:
+        for group in plan:
+            RunFBXExportGroup(group, layerState, arraySolve, force, singlePass, transaction, tolerances, poseCache)
+    finally:
+        ApplyAnimLayerState([dict(curState, name = curLayer) for curLayer, curState in layerSnapshot.items()], layerState)
 
-                subAnimCheck = cmds.getAttr(curExportNode + ".useSubRange")
+#PURPOSE        Export the jobs of one origin group
+#PROCEDURE      Read the animation of the skeleton and meshes once for the fingerprints of all jobs, see
+#               ReturnRigAnimationData. Build the export rig once. For each job move the rig to the origin if asked, select rig and meshes,
+#               change the anim layers that differ from the current state and export, see RunFBXExportJob.
+#               The origin transform of a job is undone before the next job so the shared rig starts clean.
+#               arraySolve is passed to TransformToOrigin
+#               Jobs whose fingerprint and output file match the export manifest are skipped unless force is set,
+#               a group with nothing to export does not build its rig
+#               With singlePass the whole rig is baked once over the union of the clip ranges and every clip is
+#               written as a slice of that bake, see BakeExportRig. With arraySolve as well, the union bake of the
+#               rig origin is only written back before a clip that is not moved to the origin
+#               With transaction the rig build and bake are one ExportTransaction and every job another, each job
+#               is rolled back when written and the rig when the group is done, also on error
+#               With keyTolerances every job reduces the rig keys before the write, which needs the transactions
+#               to put the rig back, so they are used whether transaction is set or not
+#               With poseCache every job writes a pose cache after the FBX, a job whose pose cache is missing is
+#               not up to date
+#PRESUMPTIONS   layerState comes from CaptureAnimLayerState and is kept up to date. keyTolerances comes from
+#               ReturnKeyReductionTolerances, poseCache needs NumPy
+def RunFBXExportGroup(group, layerState, arraySolve = False, force = False, singlePass = False, transaction = False,
+                      keyTolerances = None, poseCache = False):
+    pendingJobs = []
+    
+    with ExportStage("fingerprint", origin = group["origin"]):
+        animationData = ReturnRigAnimationData(group["origin"], group["meshes"])
+        
+    for job in group["jobs"]:
+        job.pop("keyReduction", None)
+        job.pop("poseCache", None)
+        
+        if keyTolerances:
+            job["keyReduction"] = keyTolerances
+            
+        if poseCache:
+            job["poseCache"] = True
+            
+        optionsCommand = ReturnAnimationOptionsCommand(job)
+        
+        with ExportStage("fingerprint", job["exportNode"], job["origin"]):
+            job["fingerprint"] = ReturnExportFingerprint(job, optionsCommand, animationData)
+            upToDate = not force and IsExportUpToDate(ReturnExportPath(job["exportNode"]), job["fingerprint"])
+            
+            if upToDate and poseCache:
+                upToDate = os.path.isfile(ReturnPoseCachePath(job["exportNode"]))
+        
+        if upToDate:
+            job["result"] = "skipped"
+        else:
+            pendingJobs.append(job)
+            
+    if not pendingJobs:
+        return
+        
+    rigTransaction = ExportTransaction(transaction or keyTolerances is not None).Open()
+    rigOriginValues = None
+    unionStart, unionEnd = ReturnUnionFrameRange(pendingJobs)
+    
+    try:
+        try:
+            with ExportStage("rigBuild", origin = group["origin"]):
+                exportRig = CopyAndConnectSkeleton(group["origin"])
+                poseSkeleton = ReturnPoseCacheSkeleton(group["origin"], exportRig) if poseCache and exportRig else None
                 
-                if subAnimCheck:
-                    startFrame = cmds.getAttr(curExportNode + ".startFrame")
-                    endFrame = cmds.getAttr(curExportNode + ".endFrame")
+            if exportRig and singlePass:
+                with ExportStage("rigBake", origin = group["origin"]):
+                    BakeExportRig(group["origin"], exportRig, unionStart, unionEnd)
+                    
+                    if arraySolve and ReturnNumpy() is not None:
+                        rigOriginValues = SampleOriginChannels(exportRig[-1], ReturnFrameArray(unionStart, unionEnd))
+        finally:
+            rigTransaction.Close()
+            
+        if not exportRig:
+            return
+            
+        originSolved = False
+        
+        for job in pendingJobs:
+            if originSolved and not job["moveToOrigin"]:
+                #an earlier clip's solved keys replaced the union bake on the rig origin, this clip exports it as baked
+                with ExportStage("originTransform", job["exportNode"], job["origin"]):
+                    WriteOriginChannels(exportRig[-1], ReturnFrameArray(unionStart, unionEnd), rigOriginValues)
                     
-                if cmds.getAttr(curExportNode + ".moveToOrigin"):
-                    newOrigin = cmds.listConnections(origin + ".translateX", source = False, d = True)
-                    zeroOriginFlag = cmds.getAttr(curExportNode + ".zerOrigin")
-                    TransformToOrigin(newOrigin[0], startFrame, endFrame, zeroOriginFlag)
-
-                cmds.select(clear = True)
-                cmds.select(exportRig, add=True)
-                cmds.select(meshes, add=True)
+                originSolved = False
                 
-                SetAnimLayersFromSettings(curExportNode)
+            with ExportTransaction(rigTransaction.active) as jobTransaction:
+                RunFBXExportJob(job, group, exportRig, layerState, arraySolve, singlePass, rigOriginValues, unionStart,
+                                jobTransaction.active, poseSkeleton)
                 
-                mel.eval("SetFBXExportOptions_animation(" + str(startFrame) + "," + str(endFrame) + ")")
+                if rigOriginValues is not None and job["moveToOrigin"] and not jobTransaction.active:
+                    originSolved = True
+    finally:
+        rigTransaction.RollBack()
+        
+        if rigTransaction.active:
+            InvalidateExportRig(group["origin"])
+
+#PURPOSE        Export one job of an origin group
+#PROCEDURE      Move the rig to the origin if asked, from the sampled union bake when rigOriginValues is given, select
+#               rig and meshes, apply the job's full anim layer state, reduce the rig keys if the job asks for it and
+#               export. Then undo the origin transform, unless rolledBack is set because an ExportTransaction will
+#               revert it: delete the job's anim layer or reconnect the rig origin, see ResetExportRigOrigin. Keys
+#               solved from rigOriginValues are left on the rig origin, the next clip moved to the origin replaces
+#               them and RunFBXExportGroup puts the union bake back before a clip that is not. The anim layer settings
+#               are applied outside the undo queue so they stay in step with layerState after a rollback. With
+#               poseSkeleton the pose cache is written after the FBX
+#PRESUMPTIONS   Called by RunFBXExportGroup, exportRig has the rig origin last, job["animLayerState"] is set by
+#               RunFBXExportPlan. Key reduction needs rolledBack, poseSkeleton comes from ReturnPoseCacheSkeleton
+def RunFBXExportJob(job, group, exportRig, layerState, arraySolve, singlePass, rigOriginValues, unionStart, rolledBack,
+                    poseSkeleton = None):
+    rigOrigin = exportRig[-1]
+    newAnimLayer = None
+    
+    if job["moveToOrigin"]:
+        with ExportStage("originTransform", job["exportNode"], job["origin"]):
+            if rigOriginValues is not None:
+                first = int(round(job["startFrame"] - unionStart))
+                frames = ReturnFrameArray(job["startFrame"], job["endFrame"])
+                clipValues = rigOriginValues[first:first + len(frames)]
+                WriteOriginChannels(rigOrigin, frames, SolveOriginArrays(clipValues, job["zeroOrigin"]))
+            else:
+                newAnimLayer = TransformToOrigin(rigOrigin, job["startFrame"], job["endFrame"], job["zeroOrigin"],
+                                                 arraySolve, bake = not singlePass)
+
+    with ExportStage("selection", job["exportNode"], job["origin"]):
+        cmds.select(clear = True)
+        cmds.select(exportRig, add = True)
+        cmds.select(group["meshes"], add = True)
+    
+    with ExportStage("layerSetup", job["exportNode"], job["origin"]):
+        with UndoSuspended(rolledBack):
+            ApplyAnimLayerState(job["animLayerState"], layerState)
+            
+    if job.get("keyReduction") and rolledBack:
+        with ExportStage("keyReduction", job["exportNode"], job["origin"]):
+            job["reduction"] = ReduceExportRigKeys(exportRig, job["startFrame"], job["endFrame"], job["keyReduction"])
+            PrintKeyReduction(job)
+    elif job.get("keyReduction"):
+        cmds.warning("No undo chunk to roll back, exporting " + job["exportNode"] + " without key reduction\n")
+    
+    with ExportStage("write", job["exportNode"], job["origin"]):
+        EvalFBXExportOptions(ReturnAnimationOptionsCommand(job))
+        
+        exportPath = ExportFBX(job["exportNode"])
+        
+    if exportPath and poseSkeleton:
+        with ExportStage("poseCache", job["exportNode"], job["origin"]):
+            WriteExportPoseCache(job, exportRig, poseSkeleton)
+            
+    if exportPath:
+        RecordExportFingerprint(exportPath, job["fingerprint"])
+        job["result"] = "exported"
+            
+    if rolledBack or not job["moveToOrigin"]:
+        return
+        
+    if singlePass:
+        if newAnimLayer:
+            cmds.delete(newAnimLayer)
+    else:
+        with ExportStage("originTransform", job["exportNode"], job["origin"]):
+            ResetExportRigOrigin(group["origin"], rigOrigin, newAnimLayer)
+
+#PURPOSE        Evaluate the export rig once for a frame range
+#PROCEDURE      Bake every joint of the rig in one bakeResults call over the range, which disconnects the rig
+#               from the skeleton, and drop the rig from the rig cache so it is not reused
+#PRESUMPTIONS   exportRig comes from CopyAndConnectSkeleton(origin)
+def BakeExportRig(origin, exportRig, startFrame, endFrame):
+    cmds.bakeResults(exportRig, t = (startFrame, endFrame), at = ["rx","ry","rz","tx","ty","tz","sx","sy","sz"],
+                     hi = "none", simulation = True)
+    InvalidateExportRig(origin)
+
+#PURPOSE        Undo TransformToOrigin on a shared export rig
+#PROCEDURE      Delete the job's anim layer and the baked curves on the rig origin, then reconnect it to the origin
+#PRESUMPTIONS   rigOrigin was connected to origin by CopyAndConnectSkeleton
+def ResetExportRigOrigin(origin, rigOrigin, animLayer):
+    if animLayer and cmds.objExists(animLayer):
+        cmds.delete(animLayer)
+        
+    bakedCurves = cmds.listConnections(rigOrigin, source = True, destination = False, type = "animCurve")
+    
+    if bakedCurves:
+        cmds.delete(bakedCurves)
+        
+    ConnectAttrs(origin, rigOrigin, "translate")
+    ConnectAttrs(origin, rigOrigin, "rotate")
+    ConnectAttrs(origin, rigOrigin, "scale")
+
+#PURPOSE        Estimate what running a plan will cost
+#PROCEDURE      Count rig builds, joints copied, frames baked and frames written, next to the rig builds the old
+#               one-rig-per-clip export needed. With singlePass each group bakes the union of its ranges once
+#PRESUMPTIONS   Plan comes from PlanFBXAnimationExport
+def EstimateFBXExportPlanCost(plan, singlePass = False):
+    cost = {"origins": len(plan), "jobs": 0, "rigBuilds": 0, "rigJoints": 0,
+            "perClipRigBuilds": 0, "bakedFrames": 0, "exportedFrames": 0}
+    
+    for group in plan:
+        joints = cmds.listRelatives(group["origin"], allDescendents = True, type = "joint") or []
+        jobCount = len(group["jobs"])
+        
+        cost["jobs"] += jobCount
+        cost["rigBuilds"] += 1
+        cost["rigJoints"] += len(joints) + 1
+        cost["perClipRigBuilds"] += jobCount
+        
+        for job in group["jobs"]:
+            frames = int(job["endFrame"] - job["startFrame"]) + 1
+            cost["exportedFrames"] += frames
+            
+            if job["moveToOrigin"] and not singlePass:
+                cost["bakedFrames"] += frames
                 
-                ExportFBX(curExportNode)
+        if singlePass and group["jobs"]:
+            unionStart, unionEnd = ReturnUnionFrameRange(group["jobs"])
+            cost["bakedFrames"] += int(unionEnd - unionStart) + 1
                 
-                ClearGarbage() 
-                 
+    return cost
+
+#PURPOSE        Print a plan and its estimated cost without touching the scene
+#PROCEDURE      One line per origin group and per job, followed by the cost summary
+#PRESUMPTIONS   Plan comes from PlanFBXAnimationExport
+def PrintFBXExportPlan(plan, singlePass = False):
+    for group in plan:
+        print("Origin " + group["origin"] + " (" + group["character"] + "), " + str(len(group["meshes"])) + " meshes")
+        
+        for job in group["jobs"]:
+            line = "    " + job["exportNode"] + " -> " + str(job["exportName"])
+            line += " [" + str(job["startFrame"]) + ", " + str(job["endFrame"]) + "]"
+            
+            if job["moveToOrigin"]:
+                line += " zeroOrigin" if job["zeroOrigin"] else " shiftOrigin"
+                
+            if job["animLayers"]:
+                line += " layers: " + ", ".join(curLayer["name"] + (" muted" if curLayer["mute"] else "") + (" solo" if curLayer["solo"] else "")
+                                                for curLayer in job["animLayers"])
+                
+            print(line)
+            
+    cost = EstimateFBXExportPlanCost(plan, singlePass)
+    
+    print("Estimated cost: " + str(cost["jobs"]) + " exports, " + str(cost["rigBuilds"]) + " rig builds (" + str(cost["perClipRigBuilds"]) + " when built per clip), "
+          + str(cost["rigJoints"]) + " joints copied, " + str(cost["bakedFrames"]) + " frames baked, " + str(cost["exportedFrames"]) + " frames written")
+
+#######################################################################################
+
+#                            Key Reduction Procedures
+
+#######################################################################################
+
+#PURPOSE        Return the tolerances a key reduction runs with
+#PROCEDURE      Merge keyTolerances into the defaults. Key reduction needs NumPy and the undo queue, without them
+#               warn and return None so the export runs without it
+#PRESUMPTIONS   keyTolerances may be None, see ReturnKeyTolerances
+def ReturnKeyReductionTolerances(keyTolerances = None):
+    if ReturnNumpy() is None:
+        cmds.warning("NumPy is not available, exporting without key reduction\n")
+        return None
+        
+    if not cmds.undoInfo(query = True, state = True):
+        cmds.warning("Undo is turned off, exporting without key reduction\n")
+        return None
+        
+    return ReturnKeyTolerances(keyTolerances)
+
+#PURPOSE        Return the FBX option preset call of a job
+#PROCEDURE      Jobs with key reduction use the preset that keeps their keys instead of resampling every frame
+#PRESUMPTIONS   job comes from PlanFBXAnimationExport, "keyReduction" is set by RunFBXExportGroup
+def ReturnAnimationOptionsCommand(job):
+    preset = "SetFBXExportOptions_animationKeys" if job.get("keyReduction") else "SetFBXExportOptions_animation"
+    return preset + "(" + str(job["startFrame"]) + "," + str(job["endFrame"]) + ")"
+
+#PURPOSE        Remove the keys of the export rig that the exported animation does not need
+#PROCEDURE      Sample every rig joint over the clip in one pass, which takes the origin transform and the anim
+#               layers into account, pick the keys per channel with ReduceKeyArrays and key each joint with only
+#               those, linear in between. The rig is no longer connected to the skeleton afterwards
+#PRESUMPTIONS   Runs inside an ExportTransaction that rolls the rig back. Returns the ReduceKeyArrays stats
+def ReduceExportRigKeys(exportRig, startFrame, endFrame, tolerances):
+    frames = ReturnFrameArray(startFrame, endFrame)
+    values = SampleRigChannels(exportRig, frames)
+    keep, stats = ReduceKeyArrays(frames, values, ReturnChannelTolerances(len(exportRig), tolerances))
+    
+    channelCount = len(ORIGIN_CHANNELS)
+    
+    for index in range(len(exportRig)):
+        columns = slice(index * channelCount, (index + 1) * channelCount)
+        WriteOriginChannels(exportRig[index], frames, values[:, columns], keep[:, columns])
+        
+    return stats
+
+#PURPOSE        Print the key reduction result of a job
+#PROCEDURE      Keys before and after and the largest error per channel type, warn when it is over tolerance
+#PRESUMPTIONS   job["reduction"] was set by ReduceExportRigKeys
+def PrintKeyReduction(job):
+    stats = job["reduction"]
+    errors = ", ".join(channelType + " " + "%.5f" % stats["maxError"][channelType] for channelType in ["translate", "rotate", "scale"])
+    
+    print("Reduced keys of " + job["exportNode"] + " from " + str(stats["keysBefore"]) + " to " + str(stats["keysAfter"])
+          + ", max error " + errors)
+    
+    if not stats["withinTolerance"]:
+        cmds.warning("Key reduction of " + job["exportNode"] + " is over tolerance\n")
+
+#######################################################################################
+
+#                            Pose Cache Procedures
+
+#######################################################################################
+
+#PURPOSE        Return the joint layout of the pose caches of an export rig
+#PROCEDURE      Name every rig joint by its path below the origin without namespaces, the way ReturnJointKey
+#               pairs joints, and order them so parents come first. Read parent indices, rotate orders and joint
+#               orients, which do not change over a clip
+#PRESUMPTIONS   exportRig comes from CopyAndConnectSkeleton(origin) and has the rig origin last.
+#               Returns {"names", "parents", "rotateOrders", "jointOrients", "order"}, order is the rig index of each joint
+def ReturnPoseCacheSkeleton(origin, exportRig):
+    rigOrigin = cmds.ls(exportRig[-1], long = True)[0]
+    originName = origin.rpartition("|")[2].rpartition(":")[2]
+    names = []
+    
+    for curJoint in exportRig:
+        curKey = ReturnJointKey(rigOrigin, cmds.ls(curJoint, long = True)[0])
+        names.append(originName + "|" + curKey if curKey else originName)
+        
+    order = sorted(range(len(exportRig)), key = lambda index: names[index].count("|"))
+    indexByName = dict((names[index], position) for position, index in enumerate(order))
+    
+    skeleton = {"names": [names[index] for index in order],
+                "parents": [indexByName.get(names[index].rpartition("|")[0], -1) for index in order],
+                "rotateOrders": [],
+                "jointOrients": [],
+                "order": order}
+    
+    for index in order:
+        skeleton["rotateOrders"].append(cmds.getAttr(exportRig[index] + ".rotateOrder"))
+        
+        if cmds.attributeQuery("jointOrient", node = exportRig[index], exists = True):
+            skeleton["jointOrients"].append([math.radians(curValue) for curValue in cmds.getAttr(exportRig[index] + ".jointOrient")[0]])
+        else:
+            skeleton["jointOrients"].append([0.0, 0.0, 0.0])
+            
+    return skeleton
+
+#PURPOSE        Write the pose cache of a job
+#PROCEDURE      Sample the rig over the clip in one pass, as it is written to the FBX file, so origin transform,
+#               anim layers and key reduction are in it, and write it next to the FBX file with WritePoseCache
+#PRESUMPTIONS   Called by RunFBXExportJob after the write. poseSkeleton comes from ReturnPoseCacheSkeleton(exportRig)
+def WriteExportPoseCache(job, exportRig, poseSkeleton):
+    cachePath = ReturnPoseCachePath(job["exportNode"])
+    frames = ReturnFrameArray(job["startFrame"], job["endFrame"])
+    values = SampleRigChannels([exportRig[index] for index in poseSkeleton["order"]], frames)
+    
+    WritePoseCache(cachePath, poseSkeleton["names"], poseSkeleton["parents"], poseSkeleton["rotateOrders"],
+                   poseSkeleton["jointOrients"], values.reshape(len(frames), len(exportRig), len(ORIGIN_CHANNELS)),
+                   job["startFrame"], ReturnFrameRate(cmds.currentUnit(query = True, time = True)))
+    
+    return cachePath
+
+#######################################################################################
+
+#                            Export Cache Procedures
+
+#######################################################################################
+
+#PURPOSE        Return the file an export node writes to
+#PROCEDURE      Join the workspace root directory and the file name of the exportName setting, see ReturnExportFileName
+#PRESUMPTIONS   Returns None if the export node has no exportName
+def ReturnExportPath(exportNode):
+    fileName = ReturnExportFileName(ReadExportNodeSettings(exportNode)["exportName"])
+    
+    if not fileName:
+        return None
+        
+    return cmds.workspace(q=True, rd=True) + fileName
+
+#PURPOSE        Return the pose cache file an export node writes to
+#PROCEDURE      The export path with the pose cache extension, see ReturnPoseCacheFileName
+#PRESUMPTIONS   Returns None if the export node has no exportName
+def ReturnPoseCachePath(exportNode):
+    fileName = ReturnPoseCacheFileName(ReadExportNodeSettings(exportNode)["exportName"])
+    
+    if not fileName:
+        return None
+        
+    return cmds.workspace(q=True, rd=True) + fileName
+
+#PURPOSE        Build the content fingerprint of an export
+#PROCEDURE      Hash the export settings with the animation data from ReturnRigAnimationData, the geometry data
+#               from ReturnMeshContentData if given and the FBX option preset that will be applied
+#PRESUMPTIONS   settings is a job from PlanFBXAnimationExport or any dict of export settings.
+#               optionsCommand is the MEL call that sets the FBX options
+def ReturnExportFingerprint(settings, optionsCommand, animationData, geometryData = None):
+    data = {"version": EXPORT_MANIFEST_VERSION,
+            "settings": dict((key, value) for key, value in settings.items() if key not in ("fingerprint", "result", "reduction")),
+            "animation": animationData,
+            "options": [optionsCommand, ReturnFBXOptionsHash()]}
+    
+    if geometryData is not None:
+        data["geometry"] = geometryData
+        
+    return ReturnFingerprintHash(data)
+
+#PURPOSE        Return the animation data driving a skeleton and the meshes exported with it
+#PROCEDURE      List the anim curves upstream of the origin, its joints and the mesh shapes in one listHistory, so
+#               deformer weight curves count as well, then read every key time, value and tangent of all curves
+#               with one keyframe and one keyTangent query
+#PRESUMPTIONS   Only anim curves reached through non-DAG history count, constraint targets are not followed.
+#               meshes are mesh transforms
+def ReturnRigAnimationData(origin, meshes = None):
+    joints = cmds.listRelatives(origin, allDescendents = True, type = "joint", fullPath = True) or []
+    joints.append(origin)
+    
+    shapes = (cmds.listRelatives(meshes, shapes = True, fullPath = True) or []) if meshes else []
+    
+    history = cmds.listHistory(joints + shapes, pruneDagObjects = True) or []
+    curves = sorted(set(cmds.ls(history, type = "animCurve") or []))
+    
+    if not curves:
+        return {"joints": len(joints), "curves": []}
+        
+    return {"joints": len(joints),
+            "curves": curves,
+            "keys": cmds.keyframe(curves, query = True, timeChange = True, valueChange = True),
+            "tangents": cmds.keyTangent(curves, query = True, inAngle = True, outAngle = True)}
+
+#PURPOSE        Return the geometry and skinning a model export writes for some meshes
+#PROCEDURE      One listHistory over the mesh shapes. Every mesh in it without an input geometry, which are the
+#               undeformed meshes, the original shapes of deformed ones and live blendShape targets, adds its face
+#               count and a hash of its object space points. Deformed meshes are left out, their points follow the
+#               pose. Every skinCluster adds its influences and a hash of its weights, see ReturnSkinWeightsHash
+#PRESUMPTIONS   meshes are mesh transforms. Returns {"meshes": shape -> [faces, points hash], "skinClusters":
+#               skinCluster -> {"influences", "weights"}}
+def ReturnMeshContentData(meshes):
+    data = {"meshes": {}, "skinClusters": {}}
+    shapes = (cmds.listRelatives(meshes, shapes = True, fullPath = True) or []) if meshes else []
+    
+    if not shapes:
+        return data
+        
+    history = cmds.listHistory(shapes) or []
+    
+    for curShape in cmds.ls(history, type = "mesh", long = True) or []:
+        if cmds.listConnections(curShape + ".inMesh", source = True, destination = False):
+            continue
+            
+        points = cmds.xform(curShape + ".vtx[*]", query = True, objectSpace = True, translation = True) or []
+        data["meshes"][curShape] = [cmds.polyEvaluate(curShape, face = True), ReturnValuesHash(points)]
+        
+    for curSkin in cmds.ls(history, type = "skinCluster") or []:
+        data["skinClusters"][curSkin] = {"influences": cmds.listConnections(curSkin + ".matrix", source = True, destination = False) or [],
+                                         "weights": ReturnSkinWeightsHash(curSkin)}
+        
+    return data
+
+#PURPOSE        Return a hash of the weights of a skinCluster
+#PROCEDURE      Read the weights of every vertex of every deformed shape with one MFnSkinCluster.getWeights each
+#               and hash them together
+#PRESUMPTIONS   Returns None without the Maya API, the stand-in has none
+def ReturnSkinWeightsHash(skinCluster):
+    try:
+        import maya.api.OpenMaya as om
+        import maya.api.OpenMayaAnim as oma
+    except ImportError:
+        return None
+        
+    selection = om.MSelectionList()
+    selection.add(skinCluster)
+    skinFn = oma.MFnSkinCluster(selection.getDependNode(0))
+    weights = []
+    
+    for curShape in cmds.listConnections(skinCluster + ".outputGeometry", source = False, destination = True, shapes = True) or []:
+        shapeSelection = om.MSelectionList()
+        shapeSelection.add(curShape)
+        shapePath = shapeSelection.getDagPath(0)
+        
+        componentFn = om.MFnSingleIndexedComponent()
+        components = componentFn.create(om.MFn.kMeshVertComponent)
+        componentFn.setCompleteData(om.MFnMesh(shapePath).numVertices)
+        
+        weights.extend(skinFn.getWeights(shapePath, components)[0])
+        
+    return ReturnValuesHash(weights)
+
+#PURPOSE        Return a hash of the FBX option preset file
+#PROCEDURE      Find the file the option procedures were sourced from and hash its content, once per session
+#PRESUMPTIONS   Sources FBXAnimationExporter_FBXOptions.mel if that has not happened yet
+def ReturnFBXOptionsHash():
+    if "hash" not in _fbxOptions:
+        SourceFBXExportOptions()
+        
+        location = mel.eval('whatIs "SetFBXExportOptions_animation"')
+        _fbxOptions["hash"] = ReturnFileHash(location.rpartition(": ")[2]) or location
+            
+    return _fbxOptions["hash"]
+
+#PURPOSE        Source the FBX option preset procedures
+#PROCEDURE      Once per session. Use the .mel file next to this module when it is there, so the script path
+#               does not need to contain it, else leave the lookup to MEL
+#PRESUMPTIONS   Called before any SetFBXExportOptions procedure is run, see EvalFBXExportOptions
+def SourceFBXExportOptions():
+    if _fbxOptions.get("sourced"):
+        return
+        
+    melFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), FBX_OPTIONS_MEL)
+    
+    if os.path.isfile(melFile):
+        mel.eval('source "' + melFile.replace("\\", "/") + '"')
+    else:
+        mel.eval("source " + FBX_OPTIONS_MEL)
+        
+    _fbxOptions["sourced"] = True
+
+#PURPOSE        Apply an FBX option preset
+#PROCEDURE      Source the presets on first use and run the MEL call
+#PRESUMPTIONS   optionsCommand is a SetFBXExportOptions procedure call
+def EvalFBXExportOptions(optionsCommand):
+    SourceFBXExportOptions()
+    mel.eval(optionsCommand)
+
+#######################################################################################
+
+#                            Instrumentation Procedures
+
+#######################################################################################
+
+#PURPOSE        Count the maya.cmds calls made through it
+#PROCEDURE      Every attribute lookup returns the command wrapped in a counter, wrappers are cached on first use
+#PRESUMPTIONS   Only installed while instrumentation is enabled
+class CountingCommands(object):
+    def __init__(self, module):
+        self._module = module
+        self.calls = 0
+        
+    def __getattr__(self, name):
+        command = getattr(self._module, name)
+        
+        if not callable(command):
+            return command
+            
+        def CountedCommand(*args, **kwargs):
+            self.calls += 1
+            return command(*args, **kwargs)
+            
+        setattr(self, name, CountedCommand)
+        return CountedCommand
+
+#PURPOSE        Time one export stage and count the commands it runs
+#PROCEDURE      Context manager recording wall time and the change in the command count into the report
+#PRESUMPTIONS   Created by ExportStage only while instrumentation is enabled
+class ExportStageTimer(object):
+    def __init__(self, stage, exportNode, origin):
+        self.record = {"stage": stage, "exportNode": exportNode, "origin": origin}
+        
+    def __enter__(self):
+        self.startCalls = cmds.calls
+        self.startTime = time.time()
+        return self
+        
+    def __exit__(self, excType, excValue, traceback):
+        self.record["seconds"] = time.time() - self.startTime
+        self.record["cmdsCalls"] = cmds.calls - self.startCalls
+        self.record["failed"] = excType is not None
+        _instrumentation["records"].append(self.record)
+        return False
+
+#PURPOSE        Stand-in for ExportStageTimer while instrumentation is off
+#PROCEDURE      Does nothing, a single shared instance is returned by ExportStage
+#PRESUMPTIONS   None
+class NullExportStage(object):
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, excType, excValue, traceback):
+        return False
+        
+_nullExportStage = NullExportStage()
+
+#PURPOSE        Wrap one stage of the export pipeline for instrumentation
+#PROCEDURE      Return a timer if instrumentation is enabled, else the shared do-nothing stage
+#PRESUMPTIONS   Use as "with ExportStage(...):", stage names are listed in EXPORT_STAGES
+def ExportStage(stage, exportNode = None, origin = None):
+    if not _instrumentation["enabled"]:
+        return _nullExportStage
+        
+    return ExportStageTimer(stage, exportNode, origin)
+
+#PURPOSE        Start recording stage timings and command counts
+#PROCEDURE      Clear earlier records and route this module's maya.cmds through CountingCommands
+#PRESUMPTIONS   Pair with DisableExportInstrumentation
+def EnableExportInstrumentation():
+    global cmds
+    
+    if not _instrumentation["enabled"]:
+        cmds = CountingCommands(cmds)
+        
+    _instrumentation["enabled"] = True
+    _instrumentation["records"] = []
+    _instrumentation["startTime"] = time.time()
+
+#PURPOSE        Stop recording and return the report
+#PROCEDURE      Restore maya.cmds and build the report with ReturnExportReport
+#PRESUMPTIONS   None
+def DisableExportInstrumentation():
+    global cmds
+    
+    if _instrumentation["enabled"]:
+        report = ReturnExportReport()
+        cmds = cmds._module
+        _instrumentation["enabled"] = False
+        return report
+        
+    return ReturnExportReport()
+
+#PURPOSE        Return the recorded timings as a structured report
+#PROCEDURE      Keep every record and sum seconds, command calls and counts per stage and per export node
+#PRESUMPTIONS   Records are nested, a stage's totals include the stages run inside it
+def ReturnExportReport():
+    report = {"version": EXPORT_REPORT_VERSION,
+              "scene": cmds.file(query = True, sceneName = True),
+              "wallTime": time.time() - _instrumentation.get("startTime", time.time()),
+              "cmdsCalls": cmds.calls if _instrumentation["enabled"] else 0,
+              "stages": {},
+              "exportNodes": {},
+              "records": list(_instrumentation["records"])}
+    
+    for record in report["records"]:
+        totals = [report["stages"].setdefault(record["stage"], {"seconds": 0.0, "cmdsCalls": 0, "count": 0})]
+        
+        if record["exportNode"]:
+            nodeStages = report["exportNodes"].setdefault(record["exportNode"], {})
+            totals.append(nodeStages.setdefault(record["stage"], {"seconds": 0.0, "cmdsCalls": 0, "count": 0}))
+            
+        for curTotals in totals:
+            curTotals["seconds"] += record["seconds"]
+            curTotals["cmdsCalls"] += record["cmdsCalls"]
+            curTotals["count"] += 1
+            
+    return report
+
+#PURPOSE        Write the report to a json file
+#PROCEDURE      json.dump of ReturnExportReport or the given report
+#PRESUMPTIONS   The directory of path exists
+def WriteExportReport(path, report = None):
+    if report is None:
+        report = ReturnExportReport()
+        
+    with open(path, "w") as reportFile:
+        json.dump(report, reportFile, indent = 1, sort_keys = True)
+        
+    return path
+
+#######################################################################################
+
+#                            Transaction Procedures
+
+#######################################################################################
+
+#PURPOSE        Roll back the scene changes of an export in one step
+#PROCEDURE      Open starts an undo chunk, Close ends it and RollBack undoes it, which reverts every node,
+#               connection, key, parenting, selection and time change made in between. API edits, which do not go
+#               through the undo queue, are undone from the MDGModifiers handed to TrackTransactionModifier first.
+#               As a context manager it does all three, the rollback also runs when the block raises.
+#               A transaction opened while another chunk is open joins that chunk and leaves the rollback to it.
+#               A chunk without edits is not added to the undo queue, so the undo only runs while it is on top
+#PRESUMPTIONS   active is False when disabled or when undo is off, the caller then cleans up itself.
+#               Changes that must outlive the rollback are made inside UndoSuspended
+class ExportTransaction(object):
+    def __init__(self, enabled = True, name = "FBXExportTransaction"):
+        self.enabled = enabled
+        self.name = name
+        self.active = False
+        self.owner = False
+        self.modifiers = []
+        
+    def Open(self):
+        if not self.enabled:
+            return self
+            
+        if _openTransactions:
+            self.active = True
+        elif cmds.undoInfo(query = True, state = True):
+            cmds.undoInfo(openChunk = True, chunkName = self.name)
+            _openTransactions.append(self)
+            self.active = True
+            self.owner = True
+            
+        return self
+        
+    def Close(self):
+        if self in _openTransactions:
+            cmds.undoInfo(closeChunk = True)
+            _openTransactions.remove(self)
+            
+    def RollBack(self):
+        if self.owner:
+            self.owner = False
+            
+            with ExportStage("rollback"):
+                for modifier in reversed(self.modifiers):
+                    modifier.undoIt()
+                    
+                self.modifiers = []
+                
+                if cmds.undoInfo(query = True, undoName = True) == self.name:
+                    cmds.undo()
+                
+    def __enter__(self):
+        return self.Open()
+        
+    def __exit__(self, excType, excValue, traceback):
+        self.Close()
+        self.RollBack()
+        return False
+
+#PURPOSE        Let the open transaction undo an API edit
+#PROCEDURE      Hand the modifier to the innermost open ExportTransaction, its RollBack calls undoIt
+#PRESUMPTIONS   doIt has been called on the modifier. Nothing happens when no transaction is open
+def TrackTransactionModifier(modifier):
+    if _openTransactions:
+        _openTransactions[-1].modifiers.append(modifier)
+
+#PURPOSE        Keep the changes of a with block out of the undo queue
+#PROCEDURE      Turn undo recording off without flushing the queue and back on afterwards, also on error
+#PRESUMPTIONS   Used for anim layer state, which is tracked across transactions and restored by RunFBXExportPlan.
+#               Does nothing when enabled is False
+class UndoSuspended(object):
+    def __init__(self, enabled = True):
+        self.enabled = enabled
+        
+    def __enter__(self):
+        self.recording = self.enabled and cmds.undoInfo(query = True, state = True)
+        
+        if self.recording:
+            cmds.undoInfo(stateWithoutFlush = False)
+            
+        return self
+        
+    def __exit__(self, excType, excValue, traceback):
+        if self.recording:
+            cmds.undoInfo(stateWithoutFlush = True)
+            
+        return False
+
 ####################################################################################### 
 
 #                            Basic Procedures
@@ -121,46 +1053,124 @@ def ExportFBXAnimation(characterName, exportNode):
 #######################################################################################
                           
 #PURPOSE         Return the origin of the given namespace
-#PROCEDURE       If ns is not empty string, list all joints with the matching namespace, else list all joints
-#                for list of joints, look for origin attribute and ifit is set to true. If found, return name of joint, else
-#                return "Error"
-#PRESUMPTIONS    Origin attribute it on a joint
-#                "Error" is not a valid joint name. namespace does not include colon
+#PROCEDURE       Look the namespace up in the scene index and return its origin joint
+#PRESUMPTIONS    Origin attribute is on a joint, namespace does not include colon
+#                Returns None if the namespace has no origin
 def ReturnOrigin(ns):
+    return ReturnSceneIndex(ns)["origin"]
+
+#PURPOSE         Return the scene index entry of a namespace: its origin, the export nodes connected to the
+#                origin and the meshes connected to each export node
+#PROCEDURE       Use the cached entry if it has an origin that still exists, else build it with bulk queries: one ls
+#                for every joint carrying the origin attribute, one listConnections for the export nodes and one
+#                for the meshes of all export nodes together. Namespaces without an origin are looked up again
+#PRESUMPTIONS    If ns is empty string every namespace is searched. The cache is dropped at the start of every
+#                export run, when a scene is opened, a node is renamed, or by InvalidateSceneIndex. Connections
+#                changed in between are only seen after one of those
+def ReturnSceneIndex(ns):
+    RegisterSceneIndexJobs()
     
-    joints = []
+    entry = _sceneIndex.get(ns)
+    
+    if entry and entry["origin"] and cmds.objExists(entry["origin"] + ".origin"):
+        return entry
+        
+    entry = {"origin": None, "exportNodes": [], "meshes": {}}
     
     if ns:
-        joints = cmds.ls((ns + ":*"), type = "joint")
+        candidates = cmds.ls(ns + ":*.origin", objectsOnly = True, type = "joint") or []
     else:
-        joints = cmds.ls(type = "joint")
+        candidates = cmds.ls("*.origin", objectsOnly = True, type = "joint", recursive = True) or []
         
-    if len(joints):
-        for curJoint in joints:
-            if cmds.objExists(curJoint + ".origin") and cmds.getAttr(curJoint + ".origin"):
-                return curJoint
-                
-    return "Error"
+    for curJoint in candidates:
+        if cmds.getAttr(curJoint + ".origin"):
+            entry["origin"] = curJoint
+            break
+            
+    if entry["origin"] and cmds.objExists(entry["origin"] + ".exportNode"):
+        entry["exportNodes"] = cmds.listConnections(entry["origin"] + ".exportNode") or []
+        
+    if entry["exportNodes"]:
+        for curExportNode in entry["exportNodes"]:
+            entry["meshes"][curExportNode] = []
+            
+        meshPlugs = [curExportNode + ".exportMeshes" for curExportNode in entry["exportNodes"]
+                     if cmds.objExists(curExportNode + ".exportMeshes")]
+        connections = cmds.listConnections(meshPlugs, source = False, destination = True, connections = True) or []
+        
+        for index in range(0, len(connections), 2):
+            curExportNode = connections[index].split(".")[0]
+            entry["meshes"].setdefault(curExportNode, []).append(connections[index + 1])
+            
+    _sceneIndex[ns] = entry
+    return entry
+
+#PURPOSE         Drop cached scene index and deformer index entries
+#PROCEDURE       Remove the entries of the given namespace, or every entry if ns is None
+#PRESUMPTIONS    Call after changing origins, export node connections or deformers outside this module
+def InvalidateSceneIndex(ns = None):
+    if ns is None:
+        _sceneIndex.clear()
+        _deformerIndex.clear()
+    else:
+        _sceneIndex.pop(ns, None)
+        _deformerIndex.pop(ns, None)
+        
+#PURPOSE         Make scene changes invalidate the scene index
+#PROCEDURE       Create one scriptJob per scene event the first time it is called
+#PRESUMPTIONS    None
+def RegisterSceneIndexJobs():
+    if _sceneIndexJobs:
+        return
+        
+    for curEvent in SCENE_INDEX_EVENTS:
+        _sceneIndexJobs.append(cmds.scriptJob(event = [curEvent, InvalidateSceneIndex]))
 
-#PURPOSE      Removes all nodes taged as garbage
-#PROCEDURE    List all transforms in the scene. Itterate through list, anything with "deleteMe" attribute will be deleted
-#PRESUMPTIONS The deleteMe attribute is name of the attribute signifying garbage
+#PURPOSE      Removes all nodes tagged as garbage
+#PROCEDURE    Read every node connected to the garbage collector and delete them with a single delete
+#PRESUMPTIONS Nodes were tagged with TagForGarbage. Returns the list of removed nodes
 
 def ClearGarbage():
-    list = cmds.ls(tr=True)
+    if not cmds.objExists(GARBAGE_COLLECTOR + ".garbage"):
+        return []
+        
+    garbage = cmds.listConnections(GARBAGE_COLLECTOR + ".garbage", source = True, destination = False) or []
+    garbage = list(dict.fromkeys(garbage))
+    
+    if garbage:
+        cmds.delete(garbage)
+        print("ClearGarbage removed " + str(len(garbage)) + " nodes")
+        
+    return garbage
+
+#PURPOSE      Removes nodes tagged by older versions of the exporter
+#PROCEDURE    List every node with the "deleteMe" attribute in one ls and delete them together
+#PRESUMPTIONS The deleteMe attribute is name of the attribute signifying garbage. Run once per ExportFBXAnimation,
+#             returns the list of removed nodes
+
+def ClearLegacyGarbage():
+    garbage = cmds.ls("*.deleteMe", objectsOnly = True, recursive = True) or []
     
-    for cur in list:
-        if cmds.objExists(cur + ".deleteMe"):
-            cmds.delete(cur)
+    if garbage:
+        cmds.delete(garbage)
+        print("ClearLegacyGarbage removed " + str(len(garbage)) + " nodes")
+        
+    return garbage
             
 #PURPOSE        Tag object for being garbage
-#PROCEDURE      If node is valid object and attribute does not exists, add deleteMe attribute
-#PRESUMPTIONS   None
+#PROCEDURE      If node is valid object, connect its message attribute to the garbage collector,
+#               creating the collector on first use
+#PRESUMPTIONS   Works for any node type
             
 def TagForGarbage(node):    
-    if cmds.objExists(node)and not cmds.objExists(node + ".deleteMe"):
-        cmds.addAttr(node, shortName = "del", longName = "deleteMe", at = "bool")
-        cmds.setAttr(node + ".deleteMe", True)    
+    if not cmds.objExists(node):
+        return
+        
+    if not cmds.objExists(GARBAGE_COLLECTOR):
+        cmds.createNode("network", name = GARBAGE_COLLECTOR, skipSelect = True)
+        cmds.addAttr(GARBAGE_COLLECTOR, longName = "garbage", at = "message", multi = True)
+        
+    cmds.connectAttr(node + ".message", GARBAGE_COLLECTOR + ".garbage", nextAvailable = True)
 
 def TagForMeshExport(mesh):
     if cmds.objExists(mesh) and not cmds.objExists(mesh + ".exportMeshes"):
@@ -171,29 +1181,54 @@ def TagForExportNode(node):
         cmds.addAttr(node, shortName = "xnd", longName = "exportNode", at = "message")
         
 #PURPOSE          Return the meshes connected to blendshape nodes
-#PROCEDURE        Get a list of blendshape nodes Follow those connections to the mesh shape node Traverse up the hierarchy to find parent transform node
+#PROCEDURE        Read the mesh list of the namespace's deformer index, see ReturnDeformerIndex
 #PRESUMPTIONS     character has a valid namespace, namespace does not have colon only exporting polygonal meshes
+#                 Returns de-duplicated long names of the mesh transforms
 
 def FindMeshesWithBlendshapes(ns):
+    return list(ReturnDeformerIndex(ns)["meshes"])
+
+#PURPOSE          Return the deformer index of a namespace: the meshes downstream of its blendShapes
+#PROCEDURE        Use the cached entry while all of its meshes still exist. Else walk the future of every blendShape
+#                 in one listHistory call so shared downstream graph is visited once, filter the mesh shapes with one
+#                 ls and take their transforms from the long names
+#PRESUMPTIONS     Cached with the scene index and dropped by InvalidateSceneIndex, which every export run calls first
+def ReturnDeformerIndex(ns):
+    RegisterSceneIndexJobs()
     
-    returnArray = []
+    entry = _deformerIndex.get(ns)
     
-    blendshapes = cmds.ls((ns + ":*" ), type = "blendShape")
+    if entry is not None and len(cmds.ls(entry["meshes"]) or []) == len(entry["meshes"]):
+        return entry
+        
+    entry = {"meshes": []}
     
-    for curBlendShape in blendshapes:
-        downstreamNodes = cmds.listHistory(curBlendShape, future = True)
-        for curNode in downstreamNodes:
-            if cmds.objectType(curNode, isType = "mesh"):
-                parents = cmds.listRelatives(curNode, parent = True)
-                returnArray.append(parents[0])
+    blendshapes = cmds.ls((ns + ":*" ), type = "blendShape") or []
     
-    return returnArray
+    if blendshapes:
+        downstreamNodes = cmds.listHistory(blendshapes, future = True) or []
+        shapes = cmds.ls(downstreamNodes, type = "mesh", long = True) or []
+        
+        for curShape in shapes:
+            curMesh = curShape.rpartition("|")[0]
+            
+            if curMesh not in entry["meshes"]:
+                entry["meshes"].append(curMesh)
+                
+    _deformerIndex[ns] = entry
+    return entry
     
 #PURPOSE        Return all export nodes connected to given origin
-#PROCEDURE      if origin is valid and has the exportNode attribute, return list of export nodes connected to it  
+#PROCEDURE      Read them from the scene index entry of the origin's namespace, if origin is not indexed
+#               and has the exportNode attribute, return list of export nodes connected to it
 #PRESUMPTIONS   Only export nodes are connected to exportNode attribute
 
 def ReturnFBXExportNodes(origin):
+    entry = ReturnSceneIndex(origin.rpartition(":")[0])
+    
+    if entry["origin"] == origin:
+        return list(entry["exportNodes"])
+        
     exportNodeList=[]
     
     if cmds.objExists(origin + ".exportNode"):
@@ -202,128 +1237,271 @@ def ReturnFBXExportNodes(origin):
     return exportNodeList
 
 #PURPOSE        to add the attribute to the export node to store our export settings
-#PROCEDURE       for each attribute we want to add, check if it existsif it doesn't exist, add
+#PROCEDURE      list the user attributes once, add the settings record and the message attributes that are missing
 #PRESUMPTIONS    assume fbxExportNode is a valid object
 
 def AddFBXNodeAttrs(fbxExportNode):
-	
-	if not cmds.attributeQuery("export", node=fbxExportNode, exists=True):
-		cmds.addAttr(fbxExportNode, longName='export', at="bool")
-	
-	if not cmds.attributeQuery("moveToOrigin", node=fbxExportNode, exists=True):
-		cmds.addAttr(fbxExportNode, longName='moveToOrigin', at="bool")
-		
-	if not cmds.attributeQuery("zeroOrigin", node=fbxExportNode, exists=True):
-		cmds.addAttr(fbxExportNode, longName='zeroOrigin', at="bool")
-
-	if not cmds.attributeQuery("exportName", node=fbxExportNode, exists=True):					   
-		cmds.addAttr(fbxExportNode, longName='exportName', dt="string")
-	
-	if not cmds.attributeQuery("useSubRange", node=fbxExportNode, exists=True):		
-		cmds.addAttr(fbxExportNode, longName='useSubRange', at="bool")
-	
-	if not cmds.attributeQuery("startFrame", node=fbxExportNode, exists=True):	  
-		cmds.addAttr(fbxExportNode, longName='startFrame', at="float")
-	
-	if not cmds.attributeQuery("endFrame", node=fbxExportNode, exists=True):			  
-		cmds.addAttr(fbxExportNode, longName='endFrame', at="float")
-		
-	if not cmds.attributeQuery("exportMeshes", node=fbxExportNode, exists=True):	
-		cmds.addAttr(fbxExportNode, longName='exportMeshes', at="message")
-		
-	if not cmds.attributeQuery("exportNode", node=fbxExportNode, exists=True):		  
-		cmds.addAttr(fbxExportNode, shortName = "xnd", longName='exportNode', at="message")	
-		
-	if not cmds.attributeQuery("animLayers", node=fbxExportNode, exists=True):					   
-		cmds.addAttr(fbxExportNode, longName='animLayers', dt="string")
-		
+    existingAttrs = cmds.listAttr(fbxExportNode, userDefined = True) or []
+    
+    if "fbxSettings" not in existingAttrs:
+        cmds.addAttr(fbxExportNode, longName = "fbxSettings", dt = "string")
+        
+    if "exportMeshes" not in existingAttrs:
+        cmds.addAttr(fbxExportNode, longName = "exportMeshes", at = "message")
+        
+    if "exportNode" not in existingAttrs:
+        cmds.addAttr(fbxExportNode, shortName = "xnd", longName = "exportNode", at = "message")
+        
+#PURPOSE        Return the settings of an export node
+#PROCEDURE      One getAttr of the fbxSettings record. Nodes without a record are read from the old per-setting
+#               attributes, in memory only
+#PRESUMPTIONS   Returns a dict with every key of EXPORT_SETTINGS_DEFAULTS, see ParseExportSettings. Never changes the scene
+def ReadExportNodeSettings(exportNode):
+    try:
+        record = cmds.getAttr(exportNode + ".fbxSettings")
+    except ValueError:
+        record = None
+        
+    if not record:
+        return ReadLegacyExportNodeSettings(exportNode)
+        
+    return ParseExportSettings(record)
+
+#PURPOSE        Store the settings of an export node
+#PROCEDURE      Fill missing keys from the current settings, coerce the types and write the record with one setAttr.
+#               A node that still has the old per-setting attributes is migrated: its settings start from them and
+#               they are deleted once the record is written, see DeleteLegacyExportNodeAttrs
+#PRESUMPTIONS   settings may hold only the keys to change. Returns the full settings written
+def WriteExportNodeSettings(exportNode, settings):
+    existingAttrs = cmds.listAttr(exportNode, userDefined = True) or []
+    current = ReadExportNodeSettings(exportNode)
+    
+    if "fbxSettings" not in existingAttrs:
+        AddFBXNodeAttrs(exportNode)
+        
+    current.update(settings)
+    current = ParseExportSettings(json.dumps(current))
+    
+    cmds.setAttr(exportNode + ".fbxSettings", FormatExportSettings(current), type = "string")
+    
+    legacyAttrs = [key for key in EXPORT_SETTINGS_DEFAULTS if key in existingAttrs]
+    
+    if legacyAttrs:
+        DeleteLegacyExportNodeAttrs(exportNode, legacyAttrs)
+        
+    return current
+
+#PURPOSE        Return the settings of every export node in the scene
+#PROCEDURE      One ls finds every node with a settings record and one getAttr reads each. Nodes that still only
+#               have the old attributes are read from those, in memory only
+#PRESUMPTIONS   Returns export node -> settings. Never changes the scene
+def LoadAllExportNodeSettings():
+    allSettings = {}
+    
+    for curExportNode in cmds.ls("*.fbxSettings", objectsOnly = True, recursive = True) or []:
+        record = cmds.getAttr(curExportNode + ".fbxSettings")
+        
+        if record:
+            allSettings[curExportNode] = ParseExportSettings(record)
+            
+    for curExportNode in cmds.ls("*.exportName", objectsOnly = True, recursive = True) or []:
+        if curExportNode not in allSettings:
+            allSettings[curExportNode] = ReadLegacyExportNodeSettings(curExportNode)
+            
+    return allSettings
+
+#PURPOSE        Read the settings of an export node from the old per-setting attributes
+#PROCEDURE      Read whichever old attributes exist and parse the old animLayers string
+#PRESUMPTIONS   Missing attributes take their default value. Never changes the scene
+def ReadLegacyExportNodeSettings(exportNode):
+    settings = ReturnDefaultExportSettings()
+    existingAttrs = cmds.listAttr(exportNode, userDefined = True) or []
+    
+    for key in EXPORT_SETTINGS_DEFAULTS:
+        if key in existingAttrs and key != "animLayers":
+            settings[key] = cmds.getAttr(exportNode + "." + key)
+            
+    if "animLayers" in existingAttrs:
+        settings["animLayers"] = ParseLegacyAnimLayerSettings(cmds.getAttr(exportNode + ".animLayers"))
+        
+    return ParseExportSettings(json.dumps(settings))
+
+#PURPOSE        Move an export node from the old per-setting attributes to the settings record
+#PROCEDURE      Write the settings unchanged, WriteExportNodeSettings writes the record and deletes the old attributes
+#PRESUMPTIONS   Returns the settings written
+def MigrateExportNodeSettings(exportNode):
+    return WriteExportNodeSettings(exportNode, {})
+
+#PURPOSE        Remove the old per-setting attributes of a migrated export node
+#PROCEDURE      Unlock and delete each attribute, so nothing is left that looks like a setting but is ignored.
+#               Attributes that can not be deleted, like those of referenced nodes, are reported
+#PRESUMPTIONS   The settings record has been written. Returns the attributes that are left
+def DeleteLegacyExportNodeAttrs(exportNode, legacyAttrs):
+    remaining = []
+    
+    for curAttr in legacyAttrs:
+        try:
+            cmds.setAttr(exportNode + "." + curAttr, lock = False)
+            cmds.deleteAttr(exportNode, attribute = curAttr)
+        except RuntimeError:
+            remaining.append(curAttr)
+            
+    if remaining:
+        cmds.warning("Could not delete the old settings attributes " + ", ".join(remaining) + " of " + exportNode
+                     + ", they are ignored in favour of its fbxSettings record\n")
+        
+    return remaining
 
 #PURPOSE          create the export node to store our export settings
 #PROCEDURE        create an empty transform node we will send it to AddFBXNodeAttrs to add the needed attribute
-		
+        
 def CreateFBXExportNode(characterName):
     fbxExportNode = cmds.group(em = True, name = characterName + "FBXExportNode#")
     AddFBXNodeAttrs(fbxExportNode)
-    cmds.setAttr(fbxExportNode + ".export", 1)
+    WriteExportNodeSettings(fbxExportNode, {"export": True})
     return fbxExportNode
     
 #PURPOSE        return a list of all meshes connected to the export node
-#PROCEDURE      listConnections to exportMeshes attribute
+#PROCEDURE      Use the scene index if an indexed origin owns the export node, else
+#               listConnections to exportMeshes attribute
 #PRESUMPTION    exportMeshes attribute is used to connect to export meshes, exportMeshes is valid
 
 def ReturnConnectedMeshes(exportNode):
+    for entry in _sceneIndex.values():
+        if exportNode in entry["meshes"]:
+            return list(entry["meshes"][exportNode])
+            
     meshes = cmds.listConnections((exportNode + ".exportMeshes"), source = False, destination = True)
     return meshes   
          
 #PURPOSE        To copy the bind skeleton and connect the copy to the original bind
-#PROCEDURE      duplicate hierarchy delete everything that is not a joint unlock all the joints connect the translates, rotates, and scales
-#               parent copy to the world add deleteMe attr 
-#PRESUMPTIONS   No joints are children of anything but other joints
+#PROCEDURE      Reuse the cached rig of this origin if it still exists and the skeleton is unchanged. Else duplicate
+#               the hierarchy, parent the copy to the world, delete every non-joint in one delete, unlock the joints,
+#               pair copy and original joints by their path below the origin and connect translate, rotate and
+#               scale as whole compounds. Tag the copy as garbage and cache it
+#PRESUMPTIONS   No joints are children of anything but other joints. Returns the long names of the copied joints
+#               with the copied origin last
 
 def CopyAndConnectSkeleton(origin):
-    newHierarchy=[]
+    if not origin or not cmds.objExists(origin):
+        return []
+        
+    originPath = cmds.ls(origin, long = True)[0]
+    origJoints = cmds.listRelatives(originPath, allDescendents = True, type = "joint", fullPath = True) or []
+    signature = sorted(ReturnJointKey(originPath, curJoint) for curJoint in origJoints)
     
-    if origin != "Error" and cmds.objExists(origin):
-        dupHierarchy = cmds.duplicate(origin)
-        tempHierarchy = cmds.listRelatives(dupHierarchy[0], allDescendents=True, f=True)
-
-        for cur in tempHierarchy:
-            if cmds.objExists(cur):
-                if cmds.objectType(cur) != "joint":
-                    cmds.delete(cur)
-
-        UnlockJointTransforms(dupHierarchy[0])
-  
-       
-        origHierarchy = cmds.listRelatives(origin, ad=True, type = "joint")
-        newHierarchy = cmds.listRelatives(dupHierarchy[0], ad=True, type = "joint")
-
+    cachedRig = _exportRigCache.get(origin)
+    
+    if cachedRig and cachedRig["signature"] == signature and cmds.ls(cachedRig["uuid"]):
+        return list(cachedRig["joints"])
+        
+    dupRoot = cmds.duplicate(originPath, returnRootsOnly = True)[0]
+    
+    if cmds.listRelatives(dupRoot, parent = True):
+        dupRoot = cmds.parent(dupRoot, world = True)[0]
         
-        origHierarchy.append(origin)
-        newHierarchy.append(dupHierarchy[0])
+    dupRootPath = cmds.ls(dupRoot, long = True)[0]
+    descendants = cmds.listRelatives(dupRootPath, allDescendents = True, fullPath = True) or []
+    dupJoints = cmds.ls(descendants, type = "joint", long = True) or []
+    
+    jointPaths = set(dupJoints)
+    jointPaths.add(dupRootPath)
+    
+    #only the top-most non-joints, their children go with them
+    nonJoints = [cur for cur in descendants if cur not in jointPaths and cur.rpartition("|")[0] in jointPaths]
+    
+    if nonJoints:
+        cmds.delete(nonJoints)
         
-
+    dupByKey = {}
+    
+    for curJoint in dupJoints:
+        dupByKey[ReturnJointKey(dupRootPath, curJoint)] = curJoint
         
-        for index in range(len(origHierarchy)):
-        	ConnectAttrs(origHierarchy[index], newHierarchy[index], "translate")
-        	ConnectAttrs(origHierarchy[index], newHierarchy[index], "rotate")
-        	ConnectAttrs(origHierarchy[index], newHierarchy[index], "scale")
-        	
-        cmds.parent(dupHierarchy[0], world = True)
-        TagForGarbage(dupHierarchy[0])
+    newHierarchy = []
+    
+    for curJoint in origJoints:
+        curKey = ReturnJointKey(originPath, curJoint)
         
-    return newHierarchy
+        if curKey in dupByKey:
+            newHierarchy.append((curJoint, dupByKey[curKey]))
+        else:
+            cmds.warning("No copy of joint " + curJoint + " in export rig\n")
+            
+    newHierarchy.append((originPath, dupRootPath))
     
+    UnlockJointTransforms([dupJoint for origJoint, dupJoint in newHierarchy])
     
-def UnlockJointTransforms(root):
-    hierarchy = cmds.listRelatives(root, ad=True, f=True)
+    for origJoint, dupJoint in newHierarchy:
+        ConnectAttrs(origJoint, dupJoint, "translate")
+        ConnectAttrs(origJoint, dupJoint, "rotate")
+        ConnectAttrs(origJoint, dupJoint, "scale")
+        
+    TagForGarbage(dupRootPath)
+    
+    newJoints = [dupJoint for origJoint, dupJoint in newHierarchy]
     
-    hierarchy.append(root)
+    _exportRigCache[origin] = {"uuid": cmds.ls(dupRootPath, uuid = True)[0],
+                               "signature": signature,
+                               "joints": newJoints}
+        
+    return list(newJoints)
     
-    for cur in hierarchy:
-		cmds.setAttr( (cur + '.translateX'), lock=False )
-		cmds.setAttr( (cur + '.translateY'), lock=False )
-		cmds.setAttr( (cur + '.translateZ'), lock=False )
-		cmds.setAttr( (cur + '.rotateX'), lock=False )
-		cmds.setAttr( (cur + '.rotateY'), lock=False )
-		cmds.setAttr( (cur + '.rotateZ'), lock=False )
-		cmds.setAttr( (cur + '.scaleX'), lock=False )
-		cmds.setAttr( (cur + '.scaleY'), lock=False )
-		cmds.setAttr( (cur + '.scaleZ'), lock=False )
+#PURPOSE        Return the key used to pair a joint with its copy
+#PROCEDURE      Take the path of the joint below root and strip the namespace of every level
+#PRESUMPTIONS   joint and root are long names, joint is below root
+def ReturnJointKey(root, joint):
+    levels = joint[len(root):].split("|")
+    return "|".join(curLevel.rpartition(":")[2] for curLevel in levels if curLevel)
+    
+#PURPOSE        Forget cached export rigs
+#PROCEDURE      Remove the rig of the given origin, or every rig if origin is None
+#PRESUMPTIONS   Call after changing a cached rig by hand, the rigs themselves are left to ClearGarbage
+def InvalidateExportRig(origin = None):
+    if origin is None:
+        _exportRigCache.clear()
+    else:
+        _exportRigCache.pop(origin, None)
+    
+#PURPOSE        Unlock the transform channels of the given joints
+#PROCEDURE      One listAttr per joint finds its locked attributes, only locked transform channels are unlocked
+#PRESUMPTIONS   joints is a list of existing joints
+def UnlockJointTransforms(joints):
+    for cur in joints:
+        lockedAttrs = cmds.listAttr(cur, locked = True) or []
+        
+        for curAttr in lockedAttrs:
+            if curAttr in TRANSFORM_ATTRS:
+                cmds.setAttr(cur + "." + curAttr, lock = False)
 
 
 #PURPOSE        Translate export skeleton to origin. May or may not kill origin animation depending on input
-#PROCEDURE      bake the animation onto our origin create an animLayer
-#               animLayer will either be additive or overrride depending on parameter we pass add deleteMe attr to animLayer move to origin
+#PROCEDURE      With arraySolve, sample the origin for the whole range and key the solved result directly, see
+#               TransformToOriginArrays. Else bake the animation onto our origin create an animLayer
+#               animLayer will either be additive or overrride depending on parameter we pass tag animLayer as garbage move to origin
+#               the layer key is set at startFrame so the shift is taken from the origin pose at startFrame
+#               bake can be turned off when origin is already keyed over the range
 #PRESUMPTIONS   origin is valid, end frame is greater than start frame, zeroOrigin is boolean
+#               Returns the new animLayer, or None when the array solve was used
 
-def TransformToOrigin(origin, startFrame, endFrame, zeroOrigin):
-    cmds.bakeResults(origin, t = (startFrame, endFrame), at= ["rx","ry","rz","tx","ty","tz","sx","sy","sz"], hi="none")
+def TransformToOrigin(origin, startFrame, endFrame, zeroOrigin, arraySolve = False, bake = True):
+    if arraySolve:
+        if ReturnNumpy() is not None:
+            TransformToOriginArrays(origin, startFrame, endFrame, zeroOrigin)
+            return None
+            
+        cmds.warning("NumPy is not available, falling back to bakeResults for " + origin + "\n")
+        
+    if bake:
+        cmds.bakeResults(origin, t = (startFrame, endFrame), at= ["rx","ry","rz","tx","ty","tz","sx","sy","sz"], hi="none")
+    
+    curTime = cmds.currentTime(query = True)
+    cmds.currentTime(startFrame)
     
     cmds.select(clear = True)
     cmds.select(origin)
     
-    newNaimLayer = ""
+    newAnimLayer = ""
     
     if zeroOrigin:
         #kills origin animation 
@@ -344,6 +1522,129 @@ def TransformToOrigin(origin, startFrame, endFrame, zeroOrigin):
     cmds.setAttr(origin + ".translate", 0,0,0)
     cmds.setAttr(origin + ".rotate", 0,0,0)
     cmds.setKeyframe(origin, al=newAnimLayer, t=startFrame)
+    cmds.currentTime(curTime)
+    
+    return newAnimLayer
+
+############################################################################################
+
+#                                   Origin Solve Procedures
+
+############################################################################################
+
+#PURPOSE        Move origin animation to the world origin without bakeResults or an animLayer
+#PROCEDURE      Sample the nine channels of origin for every frame in one pass, solve the zeroed or shifted
+#               result with SolveOriginArrays, then replace the channel inputs with one anim curve per channel
+#               written with a single addKeys call each
+#PRESUMPTIONS   origin is valid, end frame is greater than start frame, NumPy is available
+
+def TransformToOriginArrays(origin, startFrame, endFrame, zeroOrigin):
+    frames = ReturnFrameArray(startFrame, endFrame)
+    values = SampleOriginChannels(origin, frames)
+    
+    WriteOriginChannels(origin, frames, SolveOriginArrays(values, zeroOrigin))
+    
+#PURPOSE        Sample the origin channels of a node for a list of frames
+#PROCEDURE      See SampleRigChannels
+#PRESUMPTIONS   Values are in Maya internal units, which is what WriteOriginChannels expects
+
+def SampleOriginChannels(node, frames):
+    return SampleRigChannels([node], frames)
+
+#PURPOSE        Sample the origin channels of several nodes for a list of frames
+#PROCEDURE      Evaluate the nine channel plugs of every node through the API in a DG context per frame, no time
+#               change and no command round-trip per sample
+#PRESUMPTIONS   Returns a frames x (nodes * 9) array, the channels of each node in ORIGIN_CHANNELS order
+
+def SampleRigChannels(nodes, frames):
+    import maya.api.OpenMaya as om
+    
+    selection = om.MSelectionList()
+    plugs = []
+    
+    for index in range(len(nodes)):
+        selection.add(nodes[index])
+        nodeFn = om.MFnDependencyNode(selection.getDependNode(index))
+        plugs.extend(nodeFn.findPlug(curChannel, False) for curChannel in ORIGIN_CHANNELS)
+    
+    unit = om.MTime.uiUnit()
+    values = ReturnNumpy().empty((len(frames), len(plugs)))
+    
+    for row in range(len(frames)):
+        with om.MDGContextGuard(om.MDGContext(om.MTime(float(frames[row]), unit))):
+            for column in range(len(plugs)):
+                values[row, column] = plugs[column].asDouble()
+                
+    return values
+
+#PURPOSE        Key solved channel values onto a node
+#PROCEDURE      Delete the anim curves keying each channel and break any other incoming connection, create an
+#               anim curve for it and add every key with one addKeys call. The curves are created through an
+#               MDGModifier so an open ExportTransaction can remove them again
+#               With keep only the frames marked in it are keyed, with linear tangents
+#PRESUMPTIONS   values is a frames x 9 array in ORIGIN_CHANNELS order and Maya internal units, keep a boolean
+#               array of the same shape
+
+def WriteOriginChannels(node, frames, values, keep = None):
+    import maya.api.OpenMaya as om
+    import maya.api.OpenMayaAnim as oma
+    
+    oldCurves = cmds.listConnections(node, source = True, destination = False, type = "animCurve")
+    
+    if oldCurves:
+        cmds.delete(oldCurves)
+        
+    for curAttr in ["translate", "rotate", "scale"] + ORIGIN_CHANNELS:
+        inputs = cmds.listConnections(node + "." + curAttr, source = True, destination = False, plugs = True) or []
+        
+        for curInput in inputs:
+            cmds.disconnectAttr(curInput, node + "." + curAttr)
+            
+    selection = om.MSelectionList()
+    selection.add(node)
+    nodeFn = om.MFnDependencyNode(selection.getDependNode(0))
+    
+    unit = om.MTime.uiUnit()
+    times = om.MTimeArray([om.MTime(float(curFrame), unit) for curFrame in frames])
+    modifier = om.MDGModifier()
+    curveFns = []
+    
+    for column in range(len(ORIGIN_CHANNELS)):
+        curveFn = oma.MFnAnimCurve()
+        curveFn.create(nodeFn.findPlug(ORIGIN_CHANNELS[column], False), modifier = modifier)
+        curveFns.append(curveFn)
+        
+    modifier.doIt()
+    TrackTransactionModifier(modifier)
+    
+    for column in range(len(ORIGIN_CHANNELS)):
+        if keep is None:
+            curveFns[column].addKeys(times, om.MDoubleArray(values[:, column].tolist()))
+            continue
+            
+        keyTimes = om.MTimeArray([om.MTime(float(curFrame), unit) for curFrame in frames[keep[:, column]]])
+        curveFns[column].addKeys(keyTimes, om.MDoubleArray(values[keep[:, column], column].tolist()),
+                                 oma.MFnAnimCurve.kTangentLinear, oma.MFnAnimCurve.kTangentLinear)
+
+#PURPOSE        Check the array solve against the bake and animLayer solve
+#PROCEDURE      Run both solves on rigOrigin over the range, sample the result of each, reset the rig after each
+#               run and compare
+#PRESUMPTIONS   rigOrigin was built from origin by CopyAndConnectSkeleton. Returns (match, maxError)
+
+def VerifyOriginArraySolve(origin, rigOrigin, startFrame, endFrame, zeroOrigin, tolerance = 1e-4):
+    frames = ReturnFrameArray(startFrame, endFrame)
+    
+    newAnimLayer = TransformToOrigin(rigOrigin, startFrame, endFrame, zeroOrigin)
+    layerValues = SampleOriginChannels(rigOrigin, frames)
+    ResetExportRigOrigin(origin, rigOrigin, newAnimLayer)
+    
+    TransformToOrigin(rigOrigin, startFrame, endFrame, zeroOrigin, arraySolve = True)
+    arrayValues = SampleOriginChannels(rigOrigin, frames)
+    ResetExportRigOrigin(origin, rigOrigin, None)
+    
+    maxError = float(ReturnNumpy().abs(layerValues - arrayValues).max()) if len(frames) else 0.0
+    
+    return maxError <= tolerance, maxError
 
     
 #PURPOSE        Connect the fbx export node to the origin
@@ -357,103 +1658,84 @@ def ConnectFBXExportNodeToOrigin(exportNode, origin):
             TagForExportNode(origin)
             
         if not cmds.objExists(exportNode + ".exportNode"):
-            AddFBXNodeAttrs(fbxExportNode)
+            AddFBXNodeAttrs(exportNode)
             
         cmds.connectAttr(origin + ".exportNode", exportNode + ".exportNode")
+        InvalidateSceneIndex()
         
 def SIP_TagForExportNode(node):
     if cmds.objExists(node) and not cmds.objExists(node + ".exportNode"):
         cmds.addAttr(node, shortName = "xnd", longName = "exportNode", at = "message")
 
 #PURPOSE        to connect given node to other given node via specified transform
-#PROCEDURE      call connectAttr
+#PROCEDURE      call connectAttr once on the compound attribute, replacing any existing input
 #PRESUMPTIONS   assume two nodes exist and transform type is valid
 def ConnectAttrs(sourceNode, destNode, transform):
-    cmds.connectAttr(sourceNode + "." + transform + "X", destNode + "." + transform + "X")
-    cmds.connectAttr(sourceNode + "." + transform + "Y", destNode + "." + transform + "Y")
-    cmds.connectAttr(sourceNode + "." + transform + "Z", destNode + "." + transform + "Z")
+    cmds.connectAttr(sourceNode + "." + transform, destNode + "." + transform, force = True)
 
             
 
 ############################################################################################       
-		
+        
 #                                   Anim Layer Procedures 
 
 ###############################################################################################
 
-#PURPOSE        Record the animLayer settings used in animation and store in the exportNode as a string
-#PROCEDURE      List all the animLayers. Query their mute and solo attributes.
-#               List them in one single string Uses ; as sentinal value to split seperate animLayers
-#               Uses , as sentinal value to split seperate fields for animLayer Uses = as sentinal value to split seperate attrs from thier values in field
+#PURPOSE        Record the animLayer settings used in animation and store them in the exportNode's settings record
+#PROCEDURE      List all the animLayers. Query their mute and solo attributes and write them as one list
 #PRESUMPTION    None
 def SetAnimLayerSettings(exportNode):
- 
-    if not cmds.attributeQuery("animLayers", node=exportNode, exists=True):					   
-        AddFBXNodeAttrs(exportNode)	
-    
-    animLayers = cmds.ls(type = "animLayer")
+    animLayers = []
     
-    animLayerCommandStr = ""
-    
-    for curLayer in animLayer:
-        mute = cmds.animLayer(curLayer, query = True, mute = True)
-        solo = cmds.animLayer(curLayer, query = True, solo = True)
-        animLayerCommandStr += (curLayer + ", mute = " + str(mute) + ", solo = " + str(solo) + ";")
+    for curLayer in cmds.ls(type = "animLayer") or []:
+        animLayers.append({"name": curLayer,
+                           "mute": cmds.animLayer(curLayer, query = True, mute = True),
+                           "solo": cmds.animLayer(curLayer, query = True, solo = True)})
         
-    cmds.setAttr(exportNode + ".animLayers", animLayerCommandStr, type = "string")    
+    WriteExportNodeSettings(exportNode, {"animLayers": animLayers})
 
-#PURPOSE        Set the animLayers based on the string value in the exportNode
-#PROCEDURE      Use pre-defined sentinal values to split the string for seperate animLayers And parse out the attributes and their values, then set
-#PRESUMPTION    Uses ; as sentinal value to split seperate animLayers Uses , as sentinal value to split seperate fields for animLayer
-#               Uses = as sentinal value to split seperate attrs from thier values in field order is Layer, mute, solo
+#PURPOSE        Set the animLayers based on the settings record of the exportNode
+#PROCEDURE      Read the record and the current layer state, change only the stored layers that differ
+#PRESUMPTION    Returns the number of layers edited
 def SetAnimLayersFromSettings(exportNode):
     
-    if cmds.objExists(exportNode)and cmds.objExists(exportNode + ".animLayers"):
-        animLayersRootString = cmds.getAttr(exportNode + ".animLayers", asString = True)
+    if not cmds.objExists(exportNode):
+        return 0
         
-        if animLayersRootString:
-            animLayerEntries = animLayersRootString.split(";")
-            
-            for curEntry in animLayerEntries:
-                if curEntry:
-                    fields = curEntry.split(",")
-                    
-                    animLayerField = fields[0]
-                    curMuteField = fields[1]
-                    curSoloField = fields[2]
-                    
-                    muteFieldStr = curMuteField.split(" = ")
-                    soloFieldStr = curMuteField.split(" = ")
-                    
-                    #convert strings to bool values
-                    muteFieldBool = True
-                    soloFieldBool = True
-                    
-                    if muteFieldStr[1] != "True":
-                        muteFieldBool = False                                        
-    
-                    if soloFieldStr[1] != "True":
-                        soloFieldBool = False
-                        
-                    cmds.animLayer(animLayerField, edit = True, mute = muteFieldBool, solo = soloFieldBool)      
+    return ApplyAnimLayerState(ReadExportNodeSettings(exportNode)["animLayers"], CaptureAnimLayerState())
        
 def ClearAnimLayerSettings(exportNode):
-    cmds.setAttr(exportNode + ".animLayers", "", type = "string")
-
-
+    WriteExportNodeSettings(exportNode, {"animLayers": []})
 
+#PURPOSE        Return the current mute and solo state of every anim layer
+#PROCEDURE      One ls for the layers, then read the mute and solo plugs of each
+#PRESUMPTION    Returns layer -> {"mute", "solo"}
+def CaptureAnimLayerState():
+    layerState = {}
     
+    for curLayer in cmds.ls(type = "animLayer") or []:
+        layerState[curLayer] = {"mute": bool(cmds.getAttr(curLayer + ".mute")),
+                                "solo": bool(cmds.getAttr(curLayer + ".solo"))}
+        
+    return layerState
 
-
-
-
-
-
+#PURPOSE        Bring the anim layers to the stored settings, touching only the layers that differ
+#PROCEDURE      Compare each stored layer with layerState, edit the ones that differ and update layerState
+#PRESUMPTION    animLayers is a list of {"name", "mute", "solo"}, layers missing from layerState are skipped.
+#               Returns the number of layers edited
+def ApplyAnimLayerState(animLayers, layerState):
+    edits = 0
     
-
-
-
-
-
-
-
+    for curLayer in animLayers:
+        curState = layerState.get(curLayer["name"])
+        
+        if curState is None:
+            continue
+            
+        if curState["mute"] != curLayer["mute"] or curState["solo"] != curLayer["solo"]:
+            cmds.animLayer(curLayer["name"], edit = True, mute = curLayer["mute"], solo = curLayer["solo"])
+            curState["mute"] = curLayer["mute"]
+            curState["solo"] = curLayer["solo"]
+            edits += 1
+            
+    return edits
@@ -0,0 +1,431 @@
+#Headless batch export of many scene files with a pool of worker processes.
+#Each worker starts Maya standalone once and exports the scenes it is given with ExportFBXAnimation or
+#ExportFBXCharacter. Without a Maya interpreter, or with --stand-in, workers use FBXAnimationExporter_StandIn.
+#
+#Needs Python 3, mayapy of Maya 2022 or later.
+#
+#   mayapy FBXAnimationExporter_Batch.py shots/*.ma --workers 4 --timeout 900 --summary batch.json
+#   python FBXAnimationExporter_Batch.py --stand-in --list scenes.txt --output /tmp/fbx
+#   python FBXAnimationExporter_Batch.py --import-time
+
+import sys
+import os
+import time
+import json
+import argparse
+import traceback
+import subprocess
+import multiprocessing
+from multiprocessing.connection import wait
+
+EXPORTER_DIR = os.path.dirname(os.path.abspath(__file__))
+BATCH_SUMMARY_VERSION = 1
+
+###############################################################################
+
+#                                 Worker Procedures
+
+###############################################################################
+
+#PURPOSE        Make maya.cmds available in a worker
+#PROCEDURE      Initialize Maya standalone and load the FBX plug-in. If Maya can not be imported, or standIn is set,
+#               install the stand-in modules instead. The exporter directory is put on sys.path and MAYA_SCRIPT_PATH
+#               so the exporter and its MEL file are found
+#PRESUMPTIONS   Called once per worker process before the exporter is imported. Returns "maya" or "standIn"
+def StartMaya(standIn = False):
+    if EXPORTER_DIR not in sys.path:
+        sys.path.insert(0, EXPORTER_DIR)
+
+    scriptPath = os.environ.get("MAYA_SCRIPT_PATH")
+    os.environ["MAYA_SCRIPT_PATH"] = EXPORTER_DIR + (os.pathsep + scriptPath if scriptPath else "")
+
+    if not standIn:
+        try:
+            import maya.standalone
+        except ImportError:
+            standIn = True
+
+    if standIn:
+        import FBXAnimationExporter_StandIn
+        FBXAnimationExporter_StandIn.InstallStandIn()
+        return "standIn"
+
+    maya.standalone.initialize(name = "python")
+
+    import maya.cmds as cmds
+    cmds.loadPlugin("fbxmaya", quiet = True)
+    return "maya"
+
+#PURPOSE        Open one scene and export it
+#PROCEDURE      Open the scene, point the workspace at the output directory if one is given and run the export
+#               for the mode. An export report is written next to the summary when reportDir is set
+#PRESUMPTIONS   StartMaya was called. Returns a list of {"exportNode", "exportName", "result"}
+def ExportScene(scenePath, options):
+    import maya.cmds as cmds
+    import FBXAnimationExporter
+
+    cmds.file(scenePath, open = True, force = True)
+
+    if options["output"]:
+        cmds.workspace(options["output"], openWorkspace = True)
+
+    if options["mode"] == "character":
+        return FBXAnimationExporter.ExportFBXCharacter(None, options["force"], options["transaction"])
+
+    reportPath = None
+
+    if options["reportDir"]:
+        reportPath = os.path.join(options["reportDir"], os.path.basename(scenePath) + ".report.json")
+
+    plan = FBXAnimationExporter.ExportFBXAnimation(options["character"], None, arraySolve = options["arraySolve"],
+                                                   force = options["force"], reportPath = reportPath,
+                                                   singlePass = options["singlePass"],
+                                                   transaction = options["transaction"],
+                                                   reduceKeys = options["reduceKeys"],
+                                                   keyTolerances = options["keyTolerances"],
+                                                   poseCache = options["poseCache"])
+
+    return [{"exportNode": job["exportNode"], "exportName": job["exportName"], "result": job.get("result"),
+             "reduction": job.get("reduction")}
+            for group in plan for job in group["jobs"]]
+
+#PURPOSE        Main loop of a worker process
+#PROCEDURE      Start Maya, then receive scene paths from the connection until None comes, export each and send
+#               back its result. An exception in an export fails that scene only, the worker keeps going
+#PRESUMPTIONS   Process target of BatchWorker, options is the dict from ReturnBatchOptions
+def RunBatchWorker(connection, options):
+    backend = StartMaya(options["standIn"])
+
+    while True:
+        scenePath = connection.recv()
+
+        if scenePath is None:
+            break
+
+        startTime = time.time()
+        result = {"scene": scenePath, "backend": backend, "pid": os.getpid()}
+
+        try:
+            result["exports"] = ExportScene(scenePath, options)
+            result["status"] = "ok"
+        except Exception:
+            result["exports"] = []
+            result["status"] = "failed"
+            result["error"] = traceback.format_exc()
+
+        result["seconds"] = time.time() - startTime
+        connection.send(result)
+
+    connection.close()
+
+###############################################################################
+
+#                                 Supervisor Procedures
+
+###############################################################################
+
+#PURPOSE        One worker process and the scene it is working on
+#PROCEDURE      Start spawns the process with a pipe, Send hands it a scene and sets the deadline, Stop ends it,
+#               politely if it is idle and by terminate if it is not
+#PRESUMPTIONS   Workers are spawned, not forked, so every worker gets a fresh interpreter for Maya
+class BatchWorker(object):
+    def __init__(self, context, options):
+        self.connection, childConnection = context.Pipe()
+        self.process = context.Process(target = RunBatchWorker, args = (childConnection, options))
+        self.process.daemon = True
+        self.process.start()
+        childConnection.close()
+
+        self.task = None
+        self.deadline = None
+        self.scenesDone = 0
+
+    def Send(self, task, timeout):
+        self.task = task
+        self.deadline = time.time() + timeout if timeout else None
+        self.connection.send(task["scene"])
+
+    def Finish(self):
+        task = self.task
+        self.task = None
+        self.deadline = None
+        self.scenesDone += 1
+        return task
+
+    def Stop(self):
+        if self.task is None and self.process.is_alive():
+            try:
+                self.connection.send(None)
+            except (IOError, OSError):
+                pass
+
+            self.process.join(10)
+
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(5)
+
+        self.connection.close()
+
+#PURPOSE        Export a list of scenes with a pool of workers
+#PROCEDURE      Hand scenes to idle workers and wait on their pipes and process sentinels. A scene that runs past
+#               its timeout has its worker terminated and is not retried. A worker that dies while exporting
+#               is replaced and its scene is queued again until it has been tried retries + 1 times.
+#               Workers are replaced after maxScenesPerWorker scenes when that is set. A progress line is
+#               printed for every finished scene
+#PRESUMPTIONS   options is the dict from ReturnBatchOptions. Returns the summary, see ReturnBatchSummary
+def RunBatchExport(scenes, options, log = sys.stdout):
+    context = multiprocessing.get_context("spawn")
+    startTime = time.time()
+
+    pending = [{"scene": curScene, "index": index, "attempts": 0} for index, curScene in enumerate(scenes)]
+    results = [None] * len(scenes)
+    workers = []
+
+    def Report(task, result):
+        results[task["index"]] = result
+        done = len([cur for cur in results if cur is not None])
+        PrintBatchProgress(log, done, len(scenes), result)
+
+    def Retire(worker):
+        worker.Stop()
+        workers.remove(worker)
+
+    try:
+        while pending or workers:
+            for worker in list(workers):
+                if worker.task is None and (not pending or options["maxScenesPerWorker"] and
+                                            worker.scenesDone >= options["maxScenesPerWorker"]):
+                    Retire(worker)
+
+            while pending and len(workers) < options["workers"]:
+                workers.append(BatchWorker(context, options))
+
+            for worker in workers:
+                if worker.task is None and pending:
+                    task = pending.pop(0)
+                    task["attempts"] += 1
+                    worker.Send(task, options["timeout"])
+
+            busy = [cur for cur in workers if cur.task is not None]
+
+            if not busy:
+                continue
+
+            deadlines = [cur.deadline for cur in busy if cur.deadline is not None]
+            waitTime = max(0.0, min(deadlines) - time.time()) if deadlines else None
+
+            ready = wait([cur.connection for cur in busy] + [cur.process.sentinel for cur in busy], waitTime)
+
+            for worker in busy:
+                result = None
+
+                if worker.connection in ready or worker.process.sentinel in ready:
+                    try:
+                        if worker.connection.poll():
+                            result = worker.connection.recv()
+                    except (EOFError, IOError, OSError):
+                        worker.process.join(5)
+
+                    if result is not None:
+                        task = worker.Finish()
+                        result["attempts"] = task["attempts"]
+                        Report(task, result)
+                        continue
+
+                if result is None and not worker.process.is_alive():
+                    task = worker.Finish()
+                    Retire(worker)
+
+                    if task["attempts"] <= options["retries"]:
+                        log.write("Worker crashed on " + task["scene"] + ", retrying (attempt " +
+                                  str(task["attempts"] + 1) + ")\n")
+                        pending.insert(0, task)
+                    else:
+                        Report(task, {"scene": task["scene"], "status": "crashed", "exports": [],
+                                      "attempts": task["attempts"], "seconds": 0.0,
+                                      "error": "worker exited with code " + str(worker.process.exitcode)})
+
+                elif worker.deadline is not None and time.time() >= worker.deadline:
+                    task = worker.task
+                    Retire(worker)
+                    Report(task, {"scene": task["scene"], "status": "timeout", "exports": [],
+                                  "attempts": task["attempts"], "seconds": float(options["timeout"]),
+                                  "error": "no result after " + str(options["timeout"]) + " seconds"})
+    finally:
+        for worker in list(workers):
+            worker.task = None
+            Retire(worker)
+
+    return ReturnBatchSummary(results, options, time.time() - startTime)
+
+#PURPOSE        Print one progress line
+#PROCEDURE      [done/total] status, scene, export counts and time
+#PRESUMPTIONS   result is a worker result
+def PrintBatchProgress(log, done, total, result):
+    exported = len([cur for cur in result["exports"] if cur["result"] == "exported"])
+    skipped = len([cur for cur in result["exports"] if cur["result"] == "skipped"])
+
+    log.write("[" + str(done) + "/" + str(total) + "] " + result["status"] + " " + result["scene"] +
+              " exported " + str(exported) + " skipped " + str(skipped) +
+              " in " + "%.1f" % result["seconds"] + "s\n")
+
+    if result.get("error") and result["status"] != "timeout":
+        log.write(result["error"].rstrip("\n") + "\n")
+
+    log.flush()
+
+#PURPOSE        Combine the scene results
+#PROCEDURE      Count scenes per status and exports per result, keep every scene result in input order
+#PRESUMPTIONS   results has one worker result per scene
+def ReturnBatchSummary(results, options, seconds):
+    summary = {"version": BATCH_SUMMARY_VERSION,
+               "workers": options["workers"],
+               "seconds": seconds,
+               "scenes": len(results),
+               "status": {},
+               "exports": {},
+               "results": results}
+
+    for result in results:
+        summary["status"][result["status"]] = summary["status"].get(result["status"], 0) + 1
+
+        for curExport in result["exports"]:
+            key = curExport["result"] or "none"
+            summary["exports"][key] = summary["exports"].get(key, 0) + 1
+
+            if curExport.get("reduction"):
+                summary["keysRemoved"] = summary.get("keysRemoved", 0) + curExport["reduction"]["keysRemoved"]
+
+    return summary
+
+#PURPOSE        Write the summary as json
+#PROCEDURE      Create the directory if needed
+#PRESUMPTIONS   None
+def WriteBatchSummary(path, summary):
+    directory = os.path.dirname(os.path.abspath(path))
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    with open(path, "w") as summaryFile:
+        json.dump(summary, summaryFile, indent = 1, sort_keys = True)
+
+###############################################################################
+
+#                                 Command Line
+
+###############################################################################
+
+#PURPOSE        Read the command line
+#PROCEDURE      argparse, scenes come from the arguments and from --list files, one path per line
+#PRESUMPTIONS   Returns (scenes, options)
+def ReturnBatchOptions(argv = None):
+    parser = argparse.ArgumentParser(description = "Export FBX files from many Maya scenes with a pool of workers.")
+    parser.add_argument("scenes", nargs = "*", help = "scene files to export")
+    parser.add_argument("--list", action = "append", default = [], help = "text file with one scene path per line")
+    parser.add_argument("--workers", type = int, default = max(1, multiprocessing.cpu_count() // 2))
+    parser.add_argument("--timeout", type = float, default = 0, help = "seconds per scene, 0 for none")
+    parser.add_argument("--retries", type = int, default = 1, help = "retries of a scene whose worker crashed")
+    parser.add_argument("--max-scenes-per-worker", type = int, default = 0,
+                        help = "replace a worker after this many scenes, 0 for never")
+    parser.add_argument("--mode", choices = ["animation", "character"], default = "animation")
+    parser.add_argument("--character", default = None, help = "namespace to export, all references if not given")
+    parser.add_argument("--output", default = None, help = "workspace root directory the files are written to")
+    parser.add_argument("--force", action = "store_true", help = "export scenes the manifest says are up to date")
+    parser.add_argument("--single-pass", action = "store_true")
+    parser.add_argument("--array-solve", action = "store_true")
+    parser.add_argument("--transaction", action = "store_true", help = "roll back the scene changes of every export")
+    parser.add_argument("--reduce-keys", action = "store_true", help = "remove rig keys within tolerance before the write")
+    parser.add_argument("--translate-tolerance", type = float, default = None)
+    parser.add_argument("--rotate-tolerance", type = float, default = None, help = "degrees")
+    parser.add_argument("--scale-tolerance", type = float, default = None)
+    parser.add_argument("--pose-cache", action = "store_true", help = "write a .posecache next to every FBX file")
+    parser.add_argument("--report-dir", default = None, help = "write an export report per scene here")
+    parser.add_argument("--summary", default = None, help = "write the results summary json here")
+    parser.add_argument("--stand-in", action = "store_true", help = "use the stand-in maya.cmds even if Maya is present")
+    parser.add_argument("--import-time", action = "store_true", help = "measure the exporter import time and exit")
+    args = parser.parse_args(argv)
+
+    scenes = list(args.scenes)
+
+    for curList in args.list:
+        with open(curList) as listFile:
+            scenes.extend(line.strip() for line in listFile if line.strip() and not line.startswith("#"))
+
+    if not scenes and not args.import_time:
+        parser.error("no scene files given")
+
+    options = {"workers": max(1, min(args.workers, len(scenes))),
+               "timeout": args.timeout,
+               "retries": max(0, args.retries),
+               "maxScenesPerWorker": args.max_scenes_per_worker,
+               "mode": args.mode,
+               "character": args.character,
+               "output": os.path.abspath(args.output) if args.output else None,
+               "force": args.force,
+               "singlePass": args.single_pass,
+               "arraySolve": args.array_solve,
+               "transaction": args.transaction,
+               "reduceKeys": args.reduce_keys,
+               "keyTolerances": {"translate": args.translate_tolerance,
+                                 "rotate": args.rotate_tolerance,
+                                 "scale": args.scale_tolerance},
+               "poseCache": args.pose_cache,
+               "reportDir": os.path.abspath(args.report_dir) if args.report_dir else None,
+               "summary": args.summary,
+               "standIn": args.stand_in,
+               "importTime": args.import_time}
+
+    return [os.path.abspath(cur) for cur in scenes], options
+
+#PURPOSE        Measure how long importing the exporter modules takes
+#PROCEDURE      Import each module in a fresh interpreter, after Maya or the stand-in is started for the exporter
+#               so Maya's own startup is not counted, and check whether the import pulled in NumPy
+#PRESUMPTIONS   Returns a list of {"module", "seconds", "numpy"}
+def ReturnImportTimes(standIn = False):
+    times = []
+
+    for moduleName, startMaya in (("FBXAnimationExporter_Core", False), ("FBXAnimationExporter", True)):
+        code = ("import sys, time, json\n"
+                "sys.path.insert(0, " + repr(EXPORTER_DIR) + ")\n")
+
+        if startMaya:
+            code += "import FBXAnimationExporter_Batch\nFBXAnimationExporter_Batch.StartMaya(" + repr(standIn) + ")\n"
+
+        code += ("startTime = time.time()\n"
+                 "import " + moduleName + "\n"
+                 "print(json.dumps({'module': " + repr(moduleName) + ", 'seconds': time.time() - startTime, "
+                 "'numpy': 'numpy' in sys.modules}))\n")
+
+        output = subprocess.check_output([sys.executable, "-c", code])
+        times.append(json.loads(output.decode("utf-8").strip().splitlines()[-1]))
+
+    return times
+
+def main(argv = None):
+    scenes, options = ReturnBatchOptions(argv)
+
+    if options["importTime"]:
+        for curTime in ReturnImportTimes(options["standIn"]):
+            print(curTime["module"] + " imported in " + "%.1f" % (curTime["seconds"] * 1000.0) + " ms" +
+                  (", NumPy loaded" if curTime["numpy"] else ""))
+
+        return 0
+
+    for directory in (options["output"], options["reportDir"]):
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    summary = RunBatchExport(scenes, options)
+
+    if options["summary"]:
+        WriteBatchSummary(options["summary"], summary)
+
+    print("Batch finished in " + "%.1f" % summary["seconds"] + "s: " + json.dumps(summary["status"], sort_keys = True) +
+          ", exports " + json.dumps(summary["exports"], sort_keys = True))
+
+    return 0 if summary["status"].get("ok", 0) == len(scenes) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+#Benchmarks of the exporter and the Rename Tool on synthetic scenes in the stand-in maya.cmds.
+#Every benchmark runs on a freshly generated scene for each size, records wall time and the number of maya.cmds
+#calls it made, and is checked against BENCHMARK_BUDGETS. Exits with 1 when a budget is exceeded.
+#Call counts do not depend on the machine and are the main budget, times are of the code and the stand-in together.
+#
+#Needs Python 3. Not a test, run it by hand or in CI:
+#
+#   python FBXAnimationExporter_Benchmark.py
+#   python FBXAnimationExporter_Benchmark.py --sizes 1,4,16 --joints 60 --json bench.json
+#   python FBXAnimationExporter_Benchmark.py --only renewName --no-time-budgets
+
+import sys
+import os
+import io
+import time
+import json
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+EXPORTER_DIR = os.path.dirname(os.path.abspath(__file__))
+RENAME_TOOL_DIR = os.path.join(os.path.dirname(EXPORTER_DIR), "Rename Tool")
+BENCHMARK_VERSION = 1
+
+#Budget per benchmark as (base, per character costs), for maya.cmds calls and seconds. Per character costs are
+#keyed by scene option, "character" is a flat cost, so a run with n characters may use
+#base + n * (character + joints * joints per character + ...). Calls are counted through the stand-in, so they
+#are exact, seconds include the stand-in and have plenty of headroom for slow machines
+BENCHMARK_BUDGETS = {"ReturnOrigin": {"calls": (10, {"character": 6, "exportNodes": 2}),
+                                      "seconds": (0.05, {"character": 0.02})},
+                     "ClearGarbage": {"calls": (6, {}),
+                                      "seconds": (0.1, {"character": 0.02})},
+                     "CopyAndConnectSkeleton": {"calls": (10, {"character": 20, "joints": 5}),
+                                                "seconds": (0.1, {"joints": 0.005})},
+                     "FindMeshesWithBlendshapes": {"calls": (0, {"character": 4, "blendShapes": 3}),
+                                                   "seconds": (0.05, {"character": 0.02})},
+                     "ExportFBXAnimation": {"calls": (80, {"character": 80, "joints": 5, "exportNodes": 30}),
+                                            "seconds": (1.0, {"joints": 0.02, "exportNodes": 0.2})},
+                     "renewName": {"calls": (30, {"character": 10, "props": 5}),
+                                   "seconds": (0.5, {"props": 0.005})}}
+
+###############################################################################
+
+#                                 Synthetic Scenes
+
+###############################################################################
+
+#PURPOSE        Build a synthetic scene in the stand-in
+#PROCEDURE      Per character a referenced namespace with an origin joint and a skeleton of joints, blendShapes
+#               each deforming a mesh and export nodes each exporting one clip of clipLength frames. The origin
+#               and every joint are keyed over all clips. props groups of two transforms are added outside any
+#               reference, for the Rename Tool
+#PRESUMPTIONS   The stand-in is installed and FBXAnimationExporter imported. Returns {"namespaces", "origins", "props"}
+def BuildSyntheticScene(commands, characters = 4, joints = 30, blendShapes = 2, exportNodes = 3, clipLength = 30, props = 0):
+    import maya.cmds as cmds
+    import FBXAnimationExporter
+
+    scene = {"namespaces": [], "origins": [], "props": []}
+    endFrame = max(1, exportNodes) * clipLength
+
+    cmds.file(new = True, force = True)
+    cmds.playbackOptions(minTime = 1, maxTime = endFrame)
+
+    for index in range(characters):
+        namespace = "char" + str(index + 1)
+        commands.scene.references.append({"path": "/synthetic/" + namespace + ".ma", "namespace": namespace})
+
+        origin = cmds.createNode("joint", name = namespace + ":root")
+        cmds.addAttr(origin, longName = "origin", attributeType = "bool")
+        cmds.setAttr(origin + ".origin", True)
+
+        skeleton = [origin]
+
+        for jointIndex in range(joints):
+            parent = skeleton[jointIndex // 3]
+            skeleton.append(cmds.createNode("joint", name = namespace + ":joint" + str(jointIndex + 1), parent = parent))
+
+        for frame in (1, endFrame):
+            cmds.setKeyframe(origin + ".translateX", t = frame, v = frame * 2.0)
+
+            for curJoint in skeleton[1:]:
+                cmds.setKeyframe(curJoint + ".rotateY", t = frame, v = frame * 0.5)
+
+        for shapeIndex in range(blendShapes):
+            mesh = cmds.createNode("transform", name = namespace + ":mesh" + str(shapeIndex + 1))
+            meshShape = cmds.createNode("mesh", name = namespace + ":meshShape" + str(shapeIndex + 1), parent = mesh)
+            blendShape = cmds.createNode("blendShape", name = namespace + ":blendShape" + str(shapeIndex + 1))
+            cmds.connectAttr(blendShape + ".outputGeometry", meshShape + ".inMesh")
+
+        for clipIndex in range(exportNodes):
+            exportNode = FBXAnimationExporter.CreateFBXExportNode(namespace)
+            FBXAnimationExporter.ConnectFBXExportNodeToOrigin(exportNode, origin)
+            FBXAnimationExporter.WriteExportNodeSettings(exportNode, {"exportName": namespace + "_clip" + str(clipIndex + 1),
+                                                                      "useSubRange": True,
+                                                                      "startFrame": clipIndex * clipLength + 1,
+                                                                      "endFrame": (clipIndex + 1) * clipLength,
+                                                                      "moveToOrigin": clipIndex % 2 == 0,
+                                                                      "zeroOrigin": clipIndex % 4 == 0})
+
+        scene["namespaces"].append(namespace)
+        scene["origins"].append(origin)
+
+    for index in range(props):
+        group = cmds.group(empty = True, name = "prop" + str(index + 1) + "_grp")
+        geometry = cmds.createNode("transform", name = "prop" + str(index + 1) + "_geo", parent = group)
+        scene["props"].extend([group, geometry])
+
+    scene["props"] = cmds.ls(scene["props"], long = True)
+
+    FBXAnimationExporter.InvalidateSceneIndex()
+    FBXAnimationExporter.InvalidateExportRig()
+
+    return scene
+
+###############################################################################
+
+#                                    Benchmarks
+
+###############################################################################
+
+#Each benchmark is (prepare, run). prepare gets the scene of BuildSyntheticScene and returns the argument of run,
+#only run is timed and counted
+
+def PrepareNothing(scene):
+    return scene
+
+def RunReturnOrigin(scene):
+    import FBXAnimationExporter
+
+    for namespace in scene["namespaces"]:
+        FBXAnimationExporter.ReturnOrigin(namespace)
+
+def RunCopyAndConnectSkeleton(scene):
+    import FBXAnimationExporter
+
+    for origin in scene["origins"]:
+        FBXAnimationExporter.CopyAndConnectSkeleton(origin)
+
+def PrepareClearGarbage(scene):
+    RunCopyAndConnectSkeleton(scene)
+    return scene
+
+def RunClearGarbage(scene):
+    import FBXAnimationExporter
+    FBXAnimationExporter.ClearGarbage()
+
+def RunFindMeshesWithBlendshapes(scene):
+    import FBXAnimationExporter
+
+    for namespace in scene["namespaces"]:
+        FBXAnimationExporter.FindMeshesWithBlendshapes(namespace)
+
+def PrepareExportFBXAnimation(scene):
+    import maya.cmds as cmds
+
+    scene["workspace"] = tempfile.mkdtemp(prefix = "fbxbench")
+    cmds.workspace(scene["workspace"], openWorkspace = True)
+    return scene
+
+def RunExportFBXAnimation(scene):
+    import FBXAnimationExporter
+
+    try:
+        FBXAnimationExporter.ExportFBXAnimation(None, None, force = True)
+    finally:
+        shutil.rmtree(scene["workspace"], ignore_errors = True)
+
+def PrepareRenewName(scene):
+    import maya.cmds as cmds
+
+    if RENAME_TOOL_DIR not in sys.path:
+        sys.path.insert(0, RENAME_TOOL_DIR)
+
+    cmds.textField("renameTF", text = "setPiece_")
+    cmds.textField("paddingTF", text = "1,4")
+    cmds.checkBox("removeSuffixCB", value = False)
+    cmds.select(scene["props"], replace = True)
+    return scene
+
+def RunRenewName(scene):
+    import Rename_Tool_Maya
+    Rename_Tool_Maya.renewName()
+
+BENCHMARKS = [("ReturnOrigin", PrepareNothing, RunReturnOrigin),
+              ("ClearGarbage", PrepareClearGarbage, RunClearGarbage),
+              ("CopyAndConnectSkeleton", PrepareNothing, RunCopyAndConnectSkeleton),
+              ("FindMeshesWithBlendshapes", PrepareNothing, RunFindMeshesWithBlendshapes),
+              ("ExportFBXAnimation", PrepareExportFBXAnimation, RunExportFBXAnimation),
+              ("renewName", PrepareRenewName, RunRenewName)]
+
+###############################################################################
+
+#                                      Runner
+
+###############################################################################
+
+#PURPOSE        Run one benchmark on a fresh scene
+#PROCEDURE      Build the scene and prepare outside the measurement, then reset the call counts and time run.
+#               Output printed by the code under test is kept out of the report
+#PRESUMPTIONS   Returns {"benchmark", "characters", "seconds", "calls", "commands"}
+def RunBenchmark(commands, name, prepare, run, characters, options):
+    scene = BuildSyntheticScene(commands, characters, options["joints"], options["blendShapes"],
+                                options["exportNodes"], options["clipLength"], options["props"] * characters)
+    argument = prepare(scene)
+    output = io.StringIO()
+
+    commands.ResetCallCounts()
+    startTime = time.time()
+
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        run(argument)
+
+    seconds = time.time() - startTime
+
+    return {"benchmark": name,
+            "characters": characters,
+            "seconds": seconds,
+            "calls": commands.ReturnCallCount(),
+            "commands": commands.ReturnCallCounts()}
+
+#PURPOSE        Check a result against its budget
+#PROCEDURE      Budget is base + characters * the per character costs of the scene options, for calls and, unless
+#               timeBudgets is off, seconds
+#PRESUMPTIONS   Returns the list of exceeded budgets as text, empty when within budget
+def CheckBudget(result, options, timeBudgets = True):
+    budget = BENCHMARK_BUDGETS.get(result["benchmark"])
+    failures = []
+
+    if not budget:
+        return failures
+
+    for key in ["calls", "seconds"]:
+        if key == "seconds" and not timeBudgets:
+            continue
+
+        base, costs = budget[key]
+        perCharacter = sum(cost * (1 if option == "character" else options[option]) for option, cost in costs.items())
+        limit = base + perCharacter * result["characters"]
+        result[key + "Budget"] = limit
+
+        if result[key] > limit:
+            failures.append(result["benchmark"] + " with " + str(result["characters"]) + " characters: " +
+                            ("%.3f" % result[key] if key == "seconds" else str(result[key])) + " " + key +
+                            ", budget " + ("%.3f" % limit if key == "seconds" else str(int(limit))))
+
+    return failures
+
+#PURPOSE        Print one result line
+#PROCEDURE      Benchmark, size, time, calls per character, budgets and the most called commands
+#PRESUMPTIONS   CheckBudget ran on the result
+def PrintBenchmarkResult(result, log = sys.stdout):
+    topCommands = sorted(result["commands"].items(), key = lambda item: (-item[1], item[0]))[:3]
+
+    log.write(result["benchmark"].ljust(28) + str(result["characters"]).rjust(4) + " chars " +
+              ("%.4f" % result["seconds"]).rjust(9) + "s " + str(result["calls"]).rjust(7) + " calls " +
+              ("%.1f" % (float(result["calls"]) / result["characters"])).rjust(8) + "/char  " +
+              ("ok" if not result["failures"] else "OVER BUDGET") + "  " +
+              ", ".join(command + " " + str(count) for command, count in topCommands) + "\n")
+
+def ReturnBenchmarkOptions(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark the exporter and Rename Tool on synthetic stand-in scenes.")
+    parser.add_argument("--sizes", default = "1,2,4,8", help = "comma separated character counts")
+    parser.add_argument("--joints", type = int, default = 30, help = "joints per character")
+    parser.add_argument("--blend-shapes", type = int, default = 2, help = "blendShapes per character")
+    parser.add_argument("--export-nodes", type = int, default = 3, help = "export nodes, one clip each, per character")
+    parser.add_argument("--clip-length", type = int, default = 30, help = "frames per clip")
+    parser.add_argument("--props", type = int, default = 50, help = "prop groups to rename per character")
+    parser.add_argument("--only", action = "append", default = [], help = "run only this benchmark, can repeat")
+    parser.add_argument("--no-time-budgets", action = "store_true", help = "only check the call budgets")
+    parser.add_argument("--json", default = None, help = "write the results here")
+    args = parser.parse_args(argv)
+
+    names = [name for name, prepare, run in BENCHMARKS]
+
+    for name in args.only:
+        if name not in names:
+            parser.error("unknown benchmark " + name + ", one of " + ", ".join(names))
+
+    return {"sizes": [int(cur) for cur in args.sizes.split(",") if cur.strip()],
+            "joints": args.joints,
+            "blendShapes": args.blend_shapes,
+            "exportNodes": args.export_nodes,
+            "clipLength": args.clip_length,
+            "props": args.props,
+            "only": args.only,
+            "timeBudgets": not args.no_time_budgets,
+            "json": args.json}
+
+def main(argv = None):
+    options = ReturnBenchmarkOptions(argv)
+
+    if EXPORTER_DIR not in sys.path:
+        sys.path.insert(0, EXPORTER_DIR)
+
+    import FBXAnimationExporter_StandIn
+    commands = FBXAnimationExporter_StandIn.InstallStandIn()
+
+    import FBXAnimationExporter
+
+    results = []
+    failures = []
+
+    for name, prepare, run in BENCHMARKS:
+        if options["only"] and name not in options["only"]:
+            continue
+
+        for characters in options["sizes"]:
+            result = RunBenchmark(commands, name, prepare, run, characters, options)
+            result["failures"] = CheckBudget(result, options, options["timeBudgets"])
+            failures.extend(result["failures"])
+            results.append(result)
+            PrintBenchmarkResult(result)
+
+    if options["json"]:
+        with open(options["json"], "w") as jsonFile:
+            json.dump({"version": BENCHMARK_VERSION, "options": options, "budgets": BENCHMARK_BUDGETS,
+                       "results": results}, jsonFile, indent = 1, sort_keys = True)
+
+    for curFailure in failures:
+        sys.stderr.write("Over budget: " + curFailure + "\n")
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
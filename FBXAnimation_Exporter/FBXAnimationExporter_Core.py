@@ -0,0 +1,646 @@
+#Maya-free core of the FBX animation exporter: export settings records, export file names, plan ordering,
+#fingerprint hashing, the export manifest, the array origin solve, key reduction and the pose cache format.
+#Imports nothing from Maya so it can be used by batch tools and tested in a plain interpreter.
+#FBXAnimationExporter re-exports everything here. NumPy is imported on first use, see ReturnNumpy.
+
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+
+#Manifest written next to exported files, see RecordExportFingerprint
+EXPORT_MANIFEST_NAME = "FBXExportManifest.json"
+EXPORT_MANIFEST_VERSION = 1
+
+ORIGIN_CHANNELS = ["translateX", "translateY", "translateZ",
+                   "rotateX", "rotateY", "rotateZ",
+                   "scaleX", "scaleY", "scaleZ"]
+
+#Export node settings record, stored as json in the fbxSettings attribute, see ReadExportNodeSettings
+EXPORT_SETTINGS_VERSION = 1
+EXPORT_SETTINGS_DEFAULTS = {"export": False,
+                            "exportName": "",
+                            "useSubRange": False,
+                            "startFrame": 0.0,
+                            "endFrame": 0.0,
+                            "moveToOrigin": False,
+                            "zeroOrigin": False,
+                            "animLayers": []}
+
+#Default key reduction tolerances per channel type, scene units for translate and scale, degrees for rotate
+KEY_REDUCTION_TOLERANCES = {"translate": 0.01, "rotate": 0.05, "scale": 0.001}
+
+#Extension the FBX exporter adds to a file name without one
+FBX_EXTENSION = ".fbx"
+
+#Pose cache file written next to the FBX file, see WritePoseCache. Little-endian, the header is followed by
+#the joint names, parent indices, rotate orders, joint orients and the frames, each block aligned to
+#POSE_CACHE_ALIGNMENT bytes. Frames are float32 frames x joints x POSE_CACHE_CHANNELS in ORIGIN_CHANNELS order,
+#Maya internal units: centimeters and radians
+POSE_CACHE_EXTENSION = ".posecache"
+POSE_CACHE_MAGIC = b"POSECACH"
+POSE_CACHE_VERSION = 1
+POSE_CACHE_CHANNELS = 9
+POSE_CACHE_ALIGNMENT = 64
+#magic, version, joints, frames, channels, start frame, frame rate, offsets of names, parents, rotate orders,
+#joint orients and frames, size of names
+POSE_CACHE_HEADER = struct.Struct("<8sIIIIdd6Q")
+
+#Frames per second of Maya time units, see ReturnFrameRate
+TIME_UNIT_RATES = {"game": 15.0, "film": 24.0, "pal": 25.0, "ntsc": 30.0, "show": 48.0, "palf": 50.0, "ntscf": 60.0}
+
+#NumPy module once imported, see ReturnNumpy
+_numpy = {}
+
+#PURPOSE        Return the NumPy module
+#PROCEDURE      Import it the first time it is asked for, so importing the exporter does not pay for NumPy
+#PRESUMPTIONS   Returns None if NumPy is not installed
+def ReturnNumpy():
+    if "module" not in _numpy:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+            
+        _numpy["module"] = numpy
+        
+    return _numpy["module"]
+
+#######################################################################################
+
+#                            Settings Procedures
+
+#######################################################################################
+
+#PURPOSE        Return a fresh copy of the default settings
+#PROCEDURE      Copy EXPORT_SETTINGS_DEFAULTS, lists included
+#PRESUMPTIONS   None
+def ReturnDefaultExportSettings():
+    settings = dict(EXPORT_SETTINGS_DEFAULTS)
+    settings["animLayers"] = []
+    return settings
+
+#PURPOSE        Turn a settings record string into typed settings
+#PROCEDURE      Load the json and coerce every known key to the type of its default. Unknown keys, including
+#               those of newer record versions, are dropped, anim layers become {"name", "mute", "solo"} dicts
+#PRESUMPTIONS   Unreadable records give the defaults
+def ParseExportSettings(record):
+    settings = ReturnDefaultExportSettings()
+    
+    try:
+        data = json.loads(record)
+    except (TypeError, ValueError):
+        return settings
+        
+    if not isinstance(data, dict):
+        return settings
+        
+    for key, default in EXPORT_SETTINGS_DEFAULTS.items():
+        if key == "animLayers" or data.get(key) is None:
+            continue
+            
+        if isinstance(default, bool):
+            settings[key] = bool(data[key])
+        elif isinstance(default, float):
+            settings[key] = float(data[key])
+        else:
+            settings[key] = str(data[key])
+            
+    for curLayer in data.get("animLayers") or []:
+        settings["animLayers"].append({"name": str(curLayer["name"]),
+                                       "mute": bool(curLayer.get("mute")),
+                                       "solo": bool(curLayer.get("solo"))})
+        
+    return settings
+
+#PURPOSE        Turn typed settings into a settings record string
+#PROCEDURE      json with the record version and sorted keys
+#PRESUMPTIONS   settings has been through ParseExportSettings
+def FormatExportSettings(settings):
+    record = dict(settings)
+    record["version"] = EXPORT_SETTINGS_VERSION
+    return json.dumps(record, sort_keys = True)
+
+#PURPOSE        Parse the animLayers string written by older versions
+#PROCEDURE      ; splits layers, , splits the fields of a layer, " = " splits a field from its value,
+#               order is Layer, mute, solo
+#PRESUMPTIONS   Returns a list of {"name", "mute", "solo"}
+def ParseLegacyAnimLayerSettings(animLayersRootString):
+    animLayers = []
+    
+    for curEntry in (animLayersRootString or "").split(";"):
+        fields = curEntry.split(",")
+        
+        if len(fields) < 3 or not fields[0].strip():
+            continue
+            
+        animLayers.append({"name": fields[0].strip(),
+                           "mute": fields[1].split(" = ")[-1].strip() == "True",
+                           "solo": fields[2].split(" = ")[-1].strip() == "True"})
+        
+    return animLayers
+
+#######################################################################################
+
+#                            Export Name Procedures
+
+#######################################################################################
+
+#PURPOSE        Return the file name an exportName setting writes to
+#PROCEDURE      The FBX exporter adds .fbx to a name without extension, so do the same
+#PRESUMPTIONS   Returns None for an empty exportName
+def ReturnExportFileName(exportName):
+    if not exportName:
+        return None
+        
+    if not os.path.splitext(exportName)[1]:
+        exportName += FBX_EXTENSION
+        
+    return exportName
+
+#PURPOSE        Return the file name the pose cache of an exportName setting is written to
+#PROCEDURE      The export file name with its extension replaced by POSE_CACHE_EXTENSION
+#PRESUMPTIONS   Returns None for an empty exportName
+def ReturnPoseCacheFileName(exportName):
+    fileName = ReturnExportFileName(exportName)
+    
+    if not fileName:
+        return None
+        
+    return os.path.splitext(fileName)[0] + POSE_CACHE_EXTENSION
+
+#######################################################################################
+
+#                            Planning Procedures
+
+#######################################################################################
+
+#PURPOSE        Return the union of the frame ranges of some jobs
+#PROCEDURE      Earliest start frame and latest end frame
+#PRESUMPTIONS   jobs is not empty
+def ReturnUnionFrameRange(jobs):
+    return min(job["startFrame"] for job in jobs), max(job["endFrame"] for job in jobs)
+
+#PURPOSE        Order jobs so clips with the same anim layer configuration run back to back
+#PROCEDURE      Group jobs by ReturnAnimLayerKey, groups keep the order in which their first job appeared
+#PRESUMPTIONS   Returns a new list
+def OrderJobsByAnimLayers(jobs):
+    orderedKeys = []
+    jobsByKey = {}
+    
+    for job in jobs:
+        curKey = ReturnAnimLayerKey(job["animLayers"])
+        
+        if curKey not in jobsByKey:
+            orderedKeys.append(curKey)
+            jobsByKey[curKey] = []
+            
+        jobsByKey[curKey].append(job)
+        
+    return [job for curKey in orderedKeys for job in jobsByKey[curKey]]
+
+#PURPOSE        Return a key that is equal for equal anim layer settings
+#PROCEDURE      Sorted tuple of (name, mute, solo)
+#PRESUMPTION    animLayers is a list of {"name", "mute", "solo"}
+def ReturnAnimLayerKey(animLayers):
+    return tuple(sorted((curLayer["name"], curLayer["mute"], curLayer["solo"]) for curLayer in animLayers))
+
+#PURPOSE        Return the anim layer state a job exports with
+#PROCEDURE      The job's stored layers, every other layer at its state in baseline, sorted by name
+#PRESUMPTION    animLayers is a list of {"name", "mute", "solo"}, baseline is layer -> {"mute", "solo"} as captured
+#               before the batch. Returns a list of {"name", "mute", "solo"}
+def ReturnJobAnimLayerState(animLayers, baseline):
+    state = dict((curName, {"name": curName, "mute": curState["mute"], "solo": curState["solo"]})
+                 for curName, curState in baseline.items())
+    
+    for curLayer in animLayers:
+        state[curLayer["name"]] = {"name": curLayer["name"], "mute": curLayer["mute"], "solo": curLayer["solo"]}
+        
+    return [state[curName] for curName in sorted(state)]
+
+#######################################################################################
+
+#                            Export Cache Procedures
+
+#######################################################################################
+
+#PURPOSE        Hash fingerprint data
+#PROCEDURE      sha1 of the json with sorted keys, values json can not write are turned into strings
+#PRESUMPTIONS   data is a dict, see ReturnExportFingerprint
+def ReturnFingerprintHash(data):
+    return hashlib.sha1(json.dumps(data, sort_keys = True, default = str).encode("utf-8")).hexdigest()
+
+#PURPOSE        Hash a list of numbers
+#PROCEDURE      sha1 of the values packed as little-endian doubles, so large arrays stay out of the fingerprint json
+#PRESUMPTIONS   values is a sequence of numbers, see ReturnMeshContentData
+def ReturnValuesHash(values):
+    values = list(values)
+    return hashlib.sha1(struct.pack("<" + str(len(values)) + "d", *values)).hexdigest()
+
+#PURPOSE        Return a hash of a file's content
+#PROCEDURE      sha1 of the bytes
+#PRESUMPTIONS   Returns None if the file can not be read
+def ReturnFileHash(path):
+    try:
+        with open(path, "rb") as curFile:
+            return hashlib.sha1(curFile.read()).hexdigest()
+    except (IOError, OSError):
+        return None
+
+#PURPOSE        Check whether an export can be skipped
+#PROCEDURE      Look the output file up in the manifest of its directory. Up to date if the fingerprint matches
+#               and the file is still there with the size and modification time that were recorded
+#PRESUMPTIONS   exportPath may be None
+def IsExportUpToDate(exportPath, fingerprint):
+    if not exportPath or not os.path.isfile(exportPath):
+        return False
+        
+    entry = ReadExportManifest(os.path.dirname(exportPath)).get(os.path.basename(exportPath))
+    
+    if not entry or entry.get("fingerprint") != fingerprint:
+        return False
+        
+    fileStat = os.stat(exportPath)
+    
+    return entry.get("size") == fileStat.st_size and entry.get("mtime") == fileStat.st_mtime
+
+#PURPOSE        Record the fingerprint of a file that was just written
+#PROCEDURE      Store fingerprint, size and modification time in the manifest next to the file. The manifest is
+#               written to a temporary file first and moved over the old one, so batch workers sharing an output
+#               directory never read a half written manifest. An entry lost to a concurrent write only costs a re-export
+#PRESUMPTIONS   exportPath exists
+def RecordExportFingerprint(exportPath, fingerprint):
+    if not exportPath or not os.path.isfile(exportPath):
+        return
+        
+    directory = os.path.dirname(exportPath)
+    entries = ReadExportManifest(directory)
+    fileStat = os.stat(exportPath)
+    
+    entries[os.path.basename(exportPath)] = {"fingerprint": fingerprint,
+                                             "size": fileStat.st_size,
+                                             "mtime": fileStat.st_mtime}
+    
+    manifestPath = os.path.join(directory, EXPORT_MANIFEST_NAME)
+    tempPath = manifestPath + "." + str(os.getpid()) + ".tmp"
+    
+    with open(tempPath, "w") as manifestFile:
+        json.dump({"version": EXPORT_MANIFEST_VERSION, "entries": entries}, manifestFile, indent = 1, sort_keys = True)
+        
+    _ReplaceFile(tempPath, manifestPath)
+
+#PURPOSE        Move a written temporary file over its destination
+#PROCEDURE      os.replace where there is one. Else rename, on Windows after removing the old file as rename
+#               does not overwrite there
+#PRESUMPTIONS   Both paths are on the same file system
+def _ReplaceFile(tempPath, path):
+    if hasattr(os, "replace"):
+        os.replace(tempPath, path)
+    else:
+        if os.path.isfile(path) and os.name == "nt":
+            os.remove(path)
+            
+        os.rename(tempPath, path)
+
+#PURPOSE        Read the export manifest of a directory
+#PROCEDURE      Load the json file, anything missing, unreadable or from another version reads as empty
+#PRESUMPTIONS   Returns file name -> {"fingerprint", "size", "mtime"}
+def ReadExportManifest(directory):
+    manifestPath = os.path.join(directory, EXPORT_MANIFEST_NAME)
+    
+    try:
+        with open(manifestPath) as manifestFile:
+            manifest = json.load(manifestFile)
+    except (IOError, OSError, ValueError):
+        return {}
+        
+    if manifest.get("version") != EXPORT_MANIFEST_VERSION:
+        return {}
+        
+    return manifest.get("entries", {})
+
+#######################################################################################
+
+#                            Origin Solve Procedures
+
+#######################################################################################
+
+#PURPOSE        Solve the origin channels the way the TransformToOrigin anim layer does
+#PROCEDURE      values is a frames x 9 array of translate, rotate and scale. zeroOrigin behaves like the override
+#               layer: translate and rotate are 0 and scale holds its value at the first frame. Otherwise behaves
+#               like the additive layer: the first frame's translate and rotate are subtracted from every frame
+#               and scale is left alone
+#PRESUMPTIONS   Channel order is ORIGIN_CHANNELS, first row is the start frame
+
+def SolveOriginArrays(values, zeroOrigin):
+    numpy = ReturnNumpy()
+    solved = numpy.array(values, dtype = numpy.float64)
+    
+    if zeroOrigin:
+        solved[:, 0:6] = 0.0
+        solved[:, 6:9] = solved[0, 6:9]
+    else:
+        solved[:, 0:6] -= solved[0, 0:6]
+        
+    return solved
+
+#PURPOSE        Return the frames bakeResults would sample for a range
+#PROCEDURE      Whole frame steps from startFrame up to and including endFrame
+#PRESUMPTIONS   end frame is greater than start frame
+def ReturnFrameArray(startFrame, endFrame):
+    return ReturnNumpy().arange(startFrame, endFrame + 0.001, 1.0)
+
+#######################################################################################
+
+#                            Key Reduction Procedures
+
+#######################################################################################
+
+#PURPOSE        Return the key reduction tolerances per channel type
+#PROCEDURE      Start from KEY_REDUCTION_TOLERANCES and apply the given overrides
+#PRESUMPTIONS   overrides may be None or hold any of "translate", "rotate", "scale". Rotate is in degrees
+def ReturnKeyTolerances(overrides = None):
+    tolerances = dict(KEY_REDUCTION_TOLERANCES)
+    
+    for key, value in (overrides or {}).items():
+        if key in tolerances and value is not None:
+            tolerances[key] = float(value)
+            
+    return tolerances
+
+#PURPOSE        Return the tolerance of every column of a sampled rig
+#PROCEDURE      Each node has the nine ORIGIN_CHANNELS, rotate is converted to radians as sampled values are in
+#               Maya internal units
+#PRESUMPTIONS   tolerances comes from ReturnKeyTolerances
+def ReturnChannelTolerances(nodeCount, tolerances):
+    numpy = ReturnNumpy()
+    nodeTolerances = [tolerances["translate"]] * 3 + [numpy.radians(tolerances["rotate"])] * 3 + [tolerances["scale"]] * 3
+    return numpy.tile(numpy.array(nodeTolerances, dtype = numpy.float64), nodeCount)
+
+#PURPOSE        Pick the keys of one sampled curve that have to stay
+#PROCEDURE      Keep the first and last key. A curve whose values stay within tolerance is a straight line between
+#               them. Else split the segment at the key furthest from the line between its ends until no key is
+#               further than tolerance, so linear interpolation of the kept keys stays within tolerance of every sample
+#PRESUMPTIONS   frames are increasing. Returns a boolean array, True for keys to keep
+def ReduceCurveKeys(frames, values, tolerance):
+    numpy = ReturnNumpy()
+    count = len(values)
+    keep = numpy.zeros(count, dtype = bool)
+    
+    if not count:
+        return keep
+        
+    keep[0] = True
+    keep[-1] = True
+    
+    if count <= 2 or values.max() - values.min() <= tolerance:
+        return keep
+        
+    segments = [(0, count - 1)]
+    
+    while segments:
+        first, last = segments.pop()
+        
+        if last - first < 2:
+            continue
+            
+        line = values[first] + (values[last] - values[first]) * (frames[first + 1:last] - frames[first]) / (frames[last] - frames[first])
+        error = numpy.abs(values[first + 1:last] - line)
+        index = int(error.argmax())
+        
+        if error[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            segments.append((first, split))
+            segments.append((split, last))
+            
+    return keep
+
+#PURPOSE        Reduce the keys of a sampled rig
+#PROCEDURE      Run ReduceCurveKeys on every column, rebuild every column from its kept keys with linear
+#               interpolation and measure the largest difference to the samples per channel type
+#PRESUMPTIONS   values is a frames x (nodes * 9) array in ORIGIN_CHANNELS order per node and Maya internal units,
+#               tolerances has one entry per column, see ReturnChannelTolerances. Returns (keep, stats), keep is a
+#               boolean array shaped like values, maxError is in scene units and degrees
+def ReduceKeyArrays(frames, values, tolerances):
+    numpy = ReturnNumpy()
+    frames = numpy.asarray(frames, dtype = numpy.float64)
+    values = numpy.asarray(values, dtype = numpy.float64)
+    keep = numpy.zeros(values.shape, dtype = bool)
+    rebuilt = numpy.empty_like(values)
+    
+    for column in range(values.shape[1]):
+        keep[:, column] = ReduceCurveKeys(frames, values[:, column], tolerances[column])
+        rebuilt[:, column] = numpy.interp(frames, frames[keep[:, column]], values[keep[:, column], column])
+        
+    errors = numpy.abs(rebuilt - values).max(axis = 0) if len(frames) else numpy.zeros(values.shape[1])
+    channelTypes = numpy.tile(numpy.repeat(numpy.arange(3), 3), values.shape[1] // 9)
+    
+    stats = {"keysBefore": int(keep.size),
+             "keysAfter": int(keep.sum()),
+             "maxError": {},
+             "withinTolerance": bool((errors <= tolerances + 1e-9).all())}
+    stats["keysRemoved"] = stats["keysBefore"] - stats["keysAfter"]
+    
+    for index, channelType in enumerate(["translate", "rotate", "scale"]):
+        typeErrors = errors[channelTypes == index]
+        maxError = float(typeErrors.max()) if len(typeErrors) else 0.0
+        stats["maxError"][channelType] = float(numpy.degrees(maxError)) if channelType == "rotate" else maxError
+        
+    return keep, stats
+
+#######################################################################################
+
+#                            Pose Cache Procedures
+
+#######################################################################################
+
+#PURPOSE        Return the frames per second of a Maya time unit
+#PROCEDURE      Look up the named units, else read the rate from names like "120fps"
+#PRESUMPTIONS   unit is what currentUnit returns for time. Returns 0.0 for units it does not know
+def ReturnFrameRate(unit):
+    if unit in TIME_UNIT_RATES:
+        return TIME_UNIT_RATES[unit]
+        
+    try:
+        return float(unit[:-3]) if unit.endswith("fps") else 0.0
+    except ValueError:
+        return 0.0
+
+#PURPOSE        Pad a block of the pose cache
+#PROCEDURE      Add zero bytes until offset plus the block ends on POSE_CACHE_ALIGNMENT
+#PRESUMPTIONS   None
+def PadPoseCacheBlock(block, offset):
+    return block + b"\0" * (-(offset + len(block)) % POSE_CACHE_ALIGNMENT)
+
+#PURPOSE        Write a pose cache file
+#PROCEDURE      Pack the header, then every block padded so the frames start aligned and can be memory-mapped.
+#               Written to a temporary file first and moved over the old one, see _ReplaceFile
+#PRESUMPTIONS   jointNames is a list of unique names, parents the index of each joint's parent or -1, parents come
+#               before their children. rotateOrders are Maya rotate order indices, jointOrients a joints x 3 array
+#               in radians, values a frames x joints x POSE_CACHE_CHANNELS array. NumPy is available
+def WritePoseCache(path, jointNames, parents, rotateOrders, jointOrients, values, startFrame, frameRate):
+    numpy = ReturnNumpy()
+    values = numpy.ascontiguousarray(values, dtype = "<f4")
+    frameCount, jointCount = values.shape[0], len(jointNames)
+    
+    if values.shape != (frameCount, jointCount, POSE_CACHE_CHANNELS):
+        raise ValueError("Pose cache values have shape " + str(values.shape) + " for " + str(jointCount) + " joints")
+        
+    names = "\n".join(jointNames).encode("utf-8")
+    blocks = [names,
+              numpy.asarray(parents, dtype = "<i4").tobytes(),
+              numpy.asarray(rotateOrders, dtype = "<i4").tobytes(),
+              numpy.asarray(jointOrients, dtype = "<f4").reshape(jointCount, 3).tobytes()]
+    
+    offsets = []
+    offset = POSE_CACHE_HEADER.size
+    
+    for index in range(len(blocks)):
+        offsets.append(offset)
+        blocks[index] = PadPoseCacheBlock(blocks[index], offset)
+        offset += len(blocks[index])
+        
+    offsets.append(offset)
+    
+    header = POSE_CACHE_HEADER.pack(POSE_CACHE_MAGIC, POSE_CACHE_VERSION, jointCount, frameCount, POSE_CACHE_CHANNELS,
+                                    float(startFrame), float(frameRate), *(offsets + [len(names)]))
+    tempPath = path + "." + str(os.getpid()) + ".tmp"
+    
+    with open(tempPath, "wb") as cacheFile:
+        cacheFile.write(header)
+        
+        for curBlock in blocks:
+            cacheFile.write(curBlock)
+            
+        cacheFile.write(values.tobytes())
+        
+    _ReplaceFile(tempPath, path)
+
+#PURPOSE        Open a pose cache file
+#PROCEDURE      See PoseCache
+#PRESUMPTIONS   Raises ValueError for a file that is not a pose cache of this version
+def ReadPoseCache(path):
+    return PoseCache(path)
+
+#PURPOSE        Lazy reader of a pose cache file
+#PROCEDURE      Read the header and the small per joint blocks, memory-map the frames without reading them.
+#               frames is a NumPy memmap shaped frames x joints x channels, or without NumPy a flat float
+#               memoryview of the mapped file, so only the pages of the frames that are used are loaded
+#PRESUMPTIONS   Close it, or use it in a with statement, to unmap the file. Frames taken from it are views of
+#               the mapping and can not be used after Close, copy them to keep them
+class PoseCache(object):
+    def __init__(self, path):
+        self.path = path
+        self._mapped = None
+        
+        with open(path, "rb") as cacheFile:
+            header = cacheFile.read(POSE_CACHE_HEADER.size)
+            
+            if len(header) < POSE_CACHE_HEADER.size or header[:len(POSE_CACHE_MAGIC)] != POSE_CACHE_MAGIC:
+                raise ValueError(path + " is not a pose cache")
+                
+            fields = POSE_CACHE_HEADER.unpack(header)
+            
+            if fields[1] != POSE_CACHE_VERSION:
+                raise ValueError(path + " is pose cache version " + str(fields[1]) + ", not " + str(POSE_CACHE_VERSION))
+                
+            self.jointCount, self.frameCount, self.channelCount = fields[2:5]
+            self.startFrame, self.frameRate = fields[5:7]
+            namesOffset, parentsOffset, rotateOrdersOffset, jointOrientsOffset, self.framesOffset, namesSize = fields[7:]
+            
+            cacheFile.seek(namesOffset)
+            names = cacheFile.read(namesSize).decode("utf-8")
+            self.jointNames = names.split("\n") if self.jointCount else []
+            
+            cacheFile.seek(parentsOffset)
+            self.parents = list(struct.unpack("<" + str(self.jointCount) + "i", cacheFile.read(4 * self.jointCount)))
+            
+            cacheFile.seek(rotateOrdersOffset)
+            self.rotateOrders = list(struct.unpack("<" + str(self.jointCount) + "i", cacheFile.read(4 * self.jointCount)))
+            
+            cacheFile.seek(jointOrientsOffset)
+            orients = struct.unpack("<" + str(3 * self.jointCount) + "f", cacheFile.read(12 * self.jointCount))
+            self.jointOrients = [orients[index:index + 3] for index in range(0, len(orients), 3)]
+            
+        self.endFrame = self.startFrame + self.frameCount - 1
+        self.frames = self.MapFrames()
+        
+    #Frames as a NumPy memmap, else a float memoryview of an mmap, else (big-endian hosts) read into an array
+    def MapFrames(self):
+        shape = (self.frameCount, self.jointCount, self.channelCount)
+        numpy = ReturnNumpy()
+        
+        if not self.frameCount * self.jointCount:
+            return numpy.zeros(shape, dtype = "<f4") if numpy is not None else []
+            
+        if numpy is not None:
+            return numpy.memmap(self.path, dtype = "<f4", mode = "r", offset = self.framesOffset, shape = shape)
+            
+        size = 4 * self.frameCount * self.jointCount * self.channelCount
+        
+        if sys.byteorder == "little" and hasattr(memoryview, "cast"):
+            with open(self.path, "rb") as cacheFile:
+                self._mapped = mmap.mmap(cacheFile.fileno(), 0, access = mmap.ACCESS_READ)
+                
+            return memoryview(self._mapped)[self.framesOffset:self.framesOffset + size].cast("f")
+            
+        import array
+        
+        frames = array.array("f")
+        
+        with open(self.path, "rb") as cacheFile:
+            cacheFile.seek(self.framesOffset)
+            data = cacheFile.read(size)
+            
+        if hasattr(frames, "frombytes"):
+            frames.frombytes(data)
+        else:
+            frames.fromstring(data)
+            
+        if sys.byteorder != "little":
+            frames.byteswap()
+            
+        return frames
+        
+    #Local transforms of every joint at frame index, joints x channels, or flat without NumPy
+    def Frame(self, index):
+        if index < 0:
+            index += self.frameCount
+            
+        if not 0 <= index < self.frameCount:
+            raise IndexError("Frame " + str(index) + " is outside the " + str(self.frameCount) + " frames of " + self.path)
+            
+        if getattr(self.frames, "ndim", 1) == 3:
+            return self.frames[index]
+            
+        stride = self.jointCount * self.channelCount
+        return self.frames[index * stride:(index + 1) * stride]
+        
+    #Index of a joint by name
+    def JointIndex(self, jointName):
+        return self.jointNames.index(jointName)
+        
+    def Close(self):
+        if isinstance(self.frames, memoryview):
+            self.frames.release()
+            
+        if self._mapped is not None:
+            try:
+                self._mapped.close()
+            except BufferError:
+                #frames taken from it still point into the mapping, it is unmapped once they are gone
+                pass
+                
+            self._mapped = None
+            
+        self.frames = None
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, excType, excValue, traceback):
+        self.Close()
+        return False
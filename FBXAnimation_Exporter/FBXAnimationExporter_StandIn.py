@@ -0,0 +1,1470 @@
+#Stand-in for maya.cmds, maya.mel and maya.standalone so the exporter can run without a Maya interpreter.
+#Models an in-memory scene of nodes, attributes, connections, DAG hierarchy, namespaces and anim curves,
+#only as far as FBXAnimationExporter and the Rename Tool need it. Scenes are saved and opened as json.
+#Every command run through the installed maya.cmds and maya.mel modules is counted, see ReturnCallCounts.
+#Use InstallStandIn() before importing FBXAnimationExporter.
+
+import sys
+import os
+import json
+import types
+import uuid
+import copy
+import fnmatch
+
+STANDIN_SCENE_VERSION = 1
+
+#Node types and the types they inherit from, used by ls -type and objectType -isType
+NODE_TYPE_PARENTS = {"transform": ["dagNode"],
+                     "joint": ["transform", "dagNode"],
+                     "mesh": ["surfaceShape", "shape", "dagNode"],
+                     "nurbsCurve": ["curveShape", "shape", "dagNode"],
+                     "blendShape": ["geometryFilter"],
+                     "skinCluster": ["geometryFilter"],
+                     "tweak": ["geometryFilter"],
+                     "animCurveTL": ["animCurve"],
+                     "animCurveTA": ["animCurve"],
+                     "animCurveTU": ["animCurve"],
+                     "animLayer": [],
+                     "network": [],
+                     "groupParts": []}
+
+COMPOUND_ATTRS = {"translate": ["translateX", "translateY", "translateZ"],
+                  "rotate": ["rotateX", "rotateY", "rotateZ"],
+                  "scale": ["scaleX", "scaleY", "scaleZ"],
+                  "jointOrient": ["jointOrientX", "jointOrientY", "jointOrientZ"]}
+
+SHORT_ATTR_NAMES = {"tx": "translateX", "ty": "translateY", "tz": "translateZ",
+                    "rx": "rotateX", "ry": "rotateY", "rz": "rotateZ",
+                    "sx": "scaleX", "sy": "scaleY", "sz": "scaleZ",
+                    "t": "translate", "r": "rotate", "s": "scale",
+                    "v": "visibility"}
+
+#Built-in attributes and their defaults per node type, every node also has message. Mesh geometry is only
+#a flat list of point coordinates in points and a face count, see xform and polyEvaluate
+TRANSFORM_ATTR_DEFAULTS = {"translateX": 0.0, "translateY": 0.0, "translateZ": 0.0,
+                           "rotateX": 0.0, "rotateY": 0.0, "rotateZ": 0.0,
+                           "scaleX": 1.0, "scaleY": 1.0, "scaleZ": 1.0,
+                           "rotateOrder": 0, "visibility": True}
+
+JOINT_ATTR_DEFAULTS = dict(TRANSFORM_ATTR_DEFAULTS, jointOrientX = 0.0, jointOrientY = 0.0, jointOrientZ = 0.0)
+
+BUILTIN_ATTR_DEFAULTS = {"transform": TRANSFORM_ATTR_DEFAULTS,
+                         "joint": JOINT_ATTR_DEFAULTS,
+                         "mesh": {"inMesh": None, "outMesh": None, "points": None, "faceCount": 0},
+                         "blendShape": {"input": None, "outputGeometry": None, "envelope": 1.0},
+                         "skinCluster": {"input": None, "outputGeometry": None},
+                         "tweak": {"input": None, "outputGeometry": None},
+                         "groupParts": {"inputGeometry": None, "outputGeometry": None},
+                         "animCurveTL": {"input": None, "output": 0.0},
+                         "animCurveTA": {"input": None, "output": 0.0},
+                         "animCurveTU": {"input": None, "output": 0.0},
+                         "animLayer": {"mute": False, "solo": False, "lock": False, "weight": 1.0,
+                                       "override": False, "passthrough": False,
+                                       "rotationAccumulationMode": 0, "scaleAccumulationMode": 1}}
+
+#Curve type used when keying a channel
+CURVE_TYPES = {"translateX": "animCurveTL", "translateY": "animCurveTL", "translateZ": "animCurveTL",
+               "rotateX": "animCurveTA", "rotateY": "animCurveTA", "rotateZ": "animCurveTA"}
+
+KEYABLE_ATTRS = ["translateX", "translateY", "translateZ",
+                 "rotateX", "rotateY", "rotateZ",
+                 "scaleX", "scaleY", "scaleZ", "visibility", "envelope"]
+
+#=========================== Scene model ===================================================
+
+#PURPOSE        One node of the stand-in scene
+#PROCEDURE      Holds name, type, DAG parent and children, attribute values, locks and, for anim curves, keys
+#PRESUMPTIONS   Identity is the uuid, names may repeat under different parents like in Maya
+class StandInNode(object):
+    def __init__(self, name, nodeType, nodeUuid = None):
+        self.name = name
+        self.type = nodeType
+        self.uuid = nodeUuid or str(uuid.uuid4()).upper()
+        self.parent = None
+        self.children = []
+        self.attrs = dict(BUILTIN_ATTR_DEFAULTS.get(nodeType, {}))
+        self.attrs["message"] = None
+        self.userAttrs = []
+        self.multiAttrs = []
+        self.locked = set()
+        self.keys = []
+        self.layerKeys = {}
+        self.layerMembers = []
+
+    def IsDag(self):
+        return self.type == "dagNode" or "dagNode" in NODE_TYPE_PARENTS.get(self.type, [])
+
+    def IsType(self, nodeType):
+        return self.type == nodeType or nodeType in NODE_TYPE_PARENTS.get(self.type, [])
+
+    def LongName(self):
+        if not self.IsDag():
+            return self.name
+
+        names = []
+        cur = self
+
+        while cur is not None:
+            names.append(cur.name)
+            cur = cur.parent
+
+        return "|" + "|".join(reversed(names))
+
+    def Namespace(self):
+        return self.name.rpartition(":")[0]
+
+#PURPOSE        The stand-in scene
+#PROCEDURE      Nodes in creation order, connections keyed by destination plug, selection, time settings and
+#               references. Plugs are (node, attr) pairs. Undo works on chunks only: opening a chunk snapshots the
+#               scene and undo restores the snapshot of the last closed chunk. Like in Maya a chunk that changed
+#               nothing is not added to the undo queue
+#PRESUMPTIONS   None
+class StandInScene(object):
+    def __init__(self):
+        self.undoEnabled = True
+        self.recording = True
+        self.Clear()
+
+    def Clear(self):
+        self.undoChunks = []
+        self.undoStack = []
+        self.nodes = []
+        self.connections = {}
+        self.selection = []
+        self.references = []
+        self.playback = [1.0, 24.0]
+        self.time = 1.0
+        self.sceneName = ""
+        self.layerNodes = None
+
+    #---------- names ----------
+
+    def NodesNamed(self, name):
+        if "|" in name:
+            #the leaf has to match, so only those nodes pay for building their long name
+            leaf = name.rpartition("|")[2]
+            matches = [cur for cur in self.nodes if cur.name == leaf and
+                       (cur.LongName() == name or cur.LongName().endswith("|" + name.lstrip("|")))]
+
+            if name.startswith("|"):
+                matches = [cur for cur in matches if cur.LongName() == name]
+
+            return matches
+
+        return [cur for cur in self.nodes if cur.name == name or cur.uuid == name]
+
+    #Maya lets DAG siblings, not DAG nodes under different parents, share a name. DG names are unique
+    def NameClashes(self, node, name):
+        for cur in self.nodes:
+            if cur is node or cur.name != name:
+                continue
+
+            if not node.IsDag() or not cur.IsDag() or cur.parent is node.parent:
+                return True
+
+        return False
+
+    #Nodes in the namespace of a reference
+    def IsReferenced(self, node):
+        namespace = node.Namespace()
+        return any(namespace == curRef["namespace"] or namespace.startswith(curRef["namespace"] + ":")
+                   for curRef in self.references)
+
+    def FindNode(self, name):
+        matches = self.NodesNamed(name)
+
+        if len(matches) == 1:
+            return matches[0]
+
+        if matches:
+            raise ValueError("More than one object matches name: " + name)
+
+        return None
+
+    def Node(self, name):
+        node = self.FindNode(name)
+
+        if node is None:
+            raise ValueError("No object matches name: " + name)
+
+        return node
+
+    def PartialName(self, node):
+        if not node.IsDag() or len([cur for cur in self.nodes if cur.name == node.name]) == 1:
+            return node.name
+
+        levels = node.LongName().split("|")[1:]
+
+        for count in range(2, len(levels) + 1):
+            candidate = "|".join(levels[-count:])
+
+            if len(self.NodesNamed(candidate)) == 1:
+                return candidate
+
+        return node.LongName()
+
+    def UniqueName(self, name):
+        if "#" in name:
+            base = name.replace("#", "")
+            index = 1
+
+            while self.NodesNamed(base + str(index)):
+                index += 1
+
+            return base + str(index)
+
+        if not self.NodesNamed(name):
+            return name
+
+        base = name.rstrip("0123456789")
+        index = 1
+
+        while self.NodesNamed(base + str(index)):
+            index += 1
+
+        return base + str(index)
+
+    #---------- plugs ----------
+
+    def SplitPlug(self, plug):
+        nodeName, attr = plug.split(".", 1)
+        return self.Node(nodeName), SHORT_ATTR_NAMES.get(attr, attr)
+
+    def HasAttr(self, node, attr):
+        attr = SHORT_ATTR_NAMES.get(attr, attr)
+        baseAttr = attr.split("[")[0]
+        return baseAttr in node.attrs or baseAttr in COMPOUND_ATTRS and COMPOUND_ATTRS[baseAttr][0] in node.attrs
+
+    def PlugExists(self, plug):
+        nodeName, attr = plug.split(".", 1)
+        node = self.FindNode(nodeName)
+        return node is not None and self.HasAttr(node, attr)
+
+    def Input(self, node, attr):
+        return self.connections.get((node, attr))
+
+    def Evaluate(self, node, attr, time = None):
+        if time is None:
+            time = self.time
+
+        value = self.EvaluateBase(node, attr, time)
+
+        if attr in COMPOUND_ATTRS or isinstance(value, bool) or not isinstance(value, (int, float)):
+            return value
+
+        return self.ApplyLayers(node, attr, value)
+
+    #Layer keys are a single value per channel: an override layer replaces the channel, an additive
+    #layer adds its offset. Muted layers, and unsoloed layers while any layer is soloed, are skipped
+    def ApplyLayers(self, node, attr, value):
+        #every evaluation lands here, so the layer nodes are looked up once per change to the node list
+        if self.layerNodes is None:
+            self.layerNodes = [cur for cur in self.nodes if cur.type == "animLayer"]
+
+        layers = [cur for cur in self.layerNodes if cur.layerKeys and not cur.attrs["mute"]]
+        soloed = [cur for cur in layers if cur.attrs["solo"]]
+        key = node.uuid + "." + attr
+
+        for layer in soloed or layers:
+            if key not in layer.layerKeys:
+                continue
+
+            if layer.attrs["override"]:
+                value = layer.layerKeys[key]
+            else:
+                value += layer.layerKeys[key]
+
+        return value
+
+    def EvaluateBase(self, node, attr, time):
+        source = self.Input(node, attr)
+
+        if source is not None:
+            if source[0].IsType("animCurve") and source[1] == "output":
+                return EvaluateCurve(source[0].keys, time)
+
+            return self.Evaluate(source[0], source[1], time)
+
+        for compound, children in COMPOUND_ATTRS.items():
+            if attr in children and (node, compound) in self.connections:
+                sourceNode, sourceAttr = self.connections[(node, compound)]
+                return self.Evaluate(sourceNode, COMPOUND_ATTRS[sourceAttr][children.index(attr)], time)
+
+        if attr in COMPOUND_ATTRS:
+            return [tuple(self.Evaluate(node, child, time) for child in COMPOUND_ATTRS[attr])]
+
+        if attr == "output" and node.IsType("animCurve"):
+            return EvaluateCurve(node.keys, time)
+
+        return node.attrs.get(attr)
+
+    def Connect(self, sourceNode, sourceAttr, destNode, destAttr, force = False):
+        current = self.connections.get((destNode, destAttr))
+
+        if current is not None and not force:
+            raise RuntimeError("The destination attribute '" + destNode.name + "." + destAttr + "' already has an incoming connection")
+
+        self.connections[(destNode, destAttr)] = (sourceNode, sourceAttr)
+
+        #connecting a compound replaces the connections of its children and the other way round
+        for child in COMPOUND_ATTRS.get(destAttr, []):
+            self.connections.pop((destNode, child), None)
+
+        for compound, children in COMPOUND_ATTRS.items():
+            if destAttr in children:
+                self.connections.pop((destNode, compound), None)
+
+    def Disconnect(self, destNode, destAttr):
+        self.connections.pop((destNode, destAttr), None)
+
+    def ConnectionsOf(self, node, attr = None):
+        result = []
+
+        for (destNode, destAttr), (sourceNode, sourceAttr) in self.connections.items():
+            if destNode is node and MatchPlugAttr(destAttr, attr):
+                result.append(("source", destAttr, sourceNode, sourceAttr))
+
+            if sourceNode is node and MatchPlugAttr(sourceAttr, attr):
+                result.append(("destination", sourceAttr, destNode, destAttr))
+
+        return result
+
+    #---------- nodes ----------
+
+    def CreateNode(self, nodeType, name = None, parent = None):
+        node = StandInNode(self.UniqueName(name or (nodeType + "1")), nodeType)
+        self.nodes.append(node)
+        self.layerNodes = None
+
+        if parent is not None:
+            self.Reparent(node, parent)
+
+        return node
+
+    def Reparent(self, node, parent):
+        if node.parent is not None:
+            node.parent.children.remove(node)
+
+        node.parent = parent
+
+        if parent is not None:
+            parent.children.append(node)
+
+    def Descendants(self, node):
+        result = []
+
+        for child in node.children:
+            result.append(child)
+            result.extend(self.Descendants(child))
+
+        return result
+
+    def DeleteNode(self, node):
+        if node not in self.nodes:
+            return
+
+        for child in list(node.children):
+            self.DeleteNode(child)
+
+        self.Reparent(node, None)
+        self.nodes.remove(node)
+        self.layerNodes = None
+
+        curves = []
+
+        for plug, source in list(self.connections.items()):
+            if plug[0] is node and source[0].IsType("animCurve"):
+                curves.append(source[0])
+
+            if plug[0] is node or source[0] is node:
+                del self.connections[plug]
+
+        self.selection = [cur for cur in self.selection if cur is not node]
+
+        #like Maya, anim curves that no longer drive anything go with the node they animated
+        for curve in curves:
+            if not [cur for cur in self.connections.values() if cur[0] is curve]:
+                self.DeleteNode(curve)
+
+    def Duplicate(self, node, parent):
+        copy = StandInNode(self.UniqueName(node.name) if parent is node.parent else node.name, node.type)
+        copy.attrs = dict(node.attrs)
+        copy.userAttrs = list(node.userAttrs)
+        copy.multiAttrs = list(node.multiAttrs)
+        copy.locked = set(node.locked)
+        copy.keys = [list(curKey) for curKey in node.keys]
+        self.nodes.append(copy)
+        self.layerNodes = None
+        self.Reparent(copy, parent)
+
+        for child in node.children:
+            self.Duplicate(child, copy)
+
+        return copy
+
+    #---------- undo ----------
+
+    def Snapshot(self, name = ""):
+        state = dict((key, getattr(self, key)) for key in ("nodes", "connections", "selection", "references", "playback", "time"))
+        return {"state": copy.deepcopy(state), "writes": [], "name": name, "record": self.ReturnUndoRecord()}
+
+    #The scene data with the selection in a comparable form, a chunk whose record did not change is empty
+    def ReturnUndoRecord(self):
+        data = self.ReturnSceneData()
+        data["connections"].sort()
+        data["selection"] = [node.uuid for node in self.selection]
+
+        return json.dumps(data, sort_keys = True)
+
+    def Restore(self, snapshot):
+        for key, value in snapshot["state"].items():
+            setattr(self, key, value)
+
+        self.layerNodes = None
+
+        #attribute writes made while undo was not recording survive the undo, like in Maya
+        for nodeUuid, attr, value in snapshot["writes"]:
+            node = self.FindNode(nodeUuid)
+
+            if node is not None:
+                node.attrs[attr] = value
+
+    def WriteAttr(self, node, attr, value):
+        node.attrs[attr] = value
+
+        if not self.recording:
+            for snapshot in self.undoChunks[:1] + self.undoStack:
+                snapshot["writes"].append((node.uuid, attr, value))
+
+    #---------- files ----------
+
+    def ReturnSceneData(self):
+        data = {"standInScene": STANDIN_SCENE_VERSION,
+                "playback": self.playback,
+                "time": self.time,
+                "references": self.references,
+                "nodes": [],
+                "connections": []}
+
+        for node in self.nodes:
+            data["nodes"].append({"uuid": node.uuid,
+                                  "name": node.name,
+                                  "type": node.type,
+                                  "parent": node.parent.uuid if node.parent is not None else None,
+                                  "attrs": node.attrs,
+                                  "userAttrs": node.userAttrs,
+                                  "multiAttrs": node.multiAttrs,
+                                  "locked": sorted(node.locked),
+                                  "keys": node.keys,
+                                  "layerKeys": node.layerKeys,
+                                  "layerMembers": node.layerMembers})
+
+        for (destNode, destAttr), (sourceNode, sourceAttr) in self.connections.items():
+            data["connections"].append([sourceNode.uuid, sourceAttr, destNode.uuid, destAttr])
+
+        return data
+
+    def Save(self, path):
+        data = self.ReturnSceneData()
+
+        with open(path, "w") as sceneFile:
+            json.dump(data, sceneFile)
+
+        self.sceneName = path
+
+    def Load(self, path):
+        self.Clear()
+        self.sceneName = path
+
+        try:
+            with open(path) as sceneFile:
+                data = json.load(sceneFile)
+        except ValueError:
+            sys.stderr.write("Warning: " + path + " is not a stand-in scene, opened as an empty scene\n")
+            return
+
+        self.playback = data.get("playback", self.playback)
+        self.time = data.get("time", self.time)
+        self.references = data.get("references", [])
+
+        byUuid = {}
+
+        for nodeData in data["nodes"]:
+            node = StandInNode(nodeData["name"], nodeData["type"], nodeData["uuid"])
+            node.attrs.update(nodeData["attrs"])
+            node.userAttrs = nodeData.get("userAttrs", [])
+            node.multiAttrs = nodeData.get("multiAttrs", [])
+            node.locked = set(nodeData.get("locked", []))
+            node.keys = nodeData.get("keys", [])
+            node.layerKeys = nodeData.get("layerKeys", {})
+            node.layerMembers = nodeData.get("layerMembers", [])
+            self.nodes.append(node)
+            byUuid[node.uuid] = node
+
+        self.layerNodes = None
+
+        for nodeData in data["nodes"]:
+            if nodeData["parent"]:
+                self.Reparent(byUuid[nodeData["uuid"]], byUuid[nodeData["parent"]])
+
+        for sourceUuid, sourceAttr, destUuid, destAttr in data["connections"]:
+            self.connections[(byUuid[destUuid], destAttr)] = (byUuid[sourceUuid], sourceAttr)
+
+#PURPOSE        Evaluate anim curve keys at a time
+#PROCEDURE      Linear interpolation between keys, constant before the first and after the last key
+#PRESUMPTIONS   keys is a list of [time, value] sorted by time
+def EvaluateCurve(keys, time):
+    if not keys:
+        return 0.0
+
+    if time <= keys[0][0]:
+        return keys[0][1]
+
+    for index in range(1, len(keys)):
+        if time <= keys[index][0]:
+            startTime, startValue = keys[index - 1]
+            endTime, endValue = keys[index]
+            return startValue + (endValue - startValue) * (time - startTime) / (endTime - startTime)
+
+    return keys[-1][1]
+
+#PURPOSE        Check whether a connected attribute matches a queried one
+#PROCEDURE      No query matches everything, a multi attribute matches all of its elements
+#PRESUMPTIONS   None
+def MatchPlugAttr(attr, query):
+    return query is None or attr == query or attr.startswith(query + "[")
+
+#PURPOSE        Match a node name against an ls pattern
+#PROCEDURE      The namespace part and the name part are matched separately so * does not cross namespaces,
+#               unless recursive is set. A pattern without namespace only matches the root namespace
+#PRESUMPTIONS   None
+def MatchNamePattern(name, pattern, recursive = False):
+    pattern = pattern.lstrip(":")
+    namespace, base = name.rpartition(":")[0], name.rpartition(":")[2]
+    patternNamespace, patternBase = pattern.rpartition(":")[0], pattern.rpartition(":")[2]
+
+    if not fnmatch.fnmatchcase(base, patternBase):
+        return False
+
+    if recursive and not patternNamespace:
+        return True
+
+    return fnmatch.fnmatchcase(namespace, patternNamespace)
+
+#=========================== Commands ======================================================
+
+#PURPOSE        The maya.cmds commands of the stand-in
+#PROCEDURE      Each method carries the name and the flags of the Maya command it stands in for
+#PRESUMPTIONS   Only the flags FBXAnimationExporter uses are supported, others are ignored
+class StandInCommands(object):
+    def __init__(self, scene):
+        self.scene = scene
+        self.workspaceRoot = os.getcwd()
+        self.scriptJobs = {}
+        self.exportOptions = {}
+        self.controls = {}
+        self.calls = {}
+
+    #---------- call counting ----------
+
+    #Command name -> number of calls through the installed modules since the last ResetCallCounts
+    def ReturnCallCounts(self):
+        return dict(self.calls)
+
+    def ReturnCallCount(self):
+        return sum(self.calls.values())
+
+    def ResetCallCounts(self):
+        self.calls.clear()
+
+    def _Counted(self, name, command):
+        def CountedCommand(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return command(*args, **kwargs)
+
+        CountedCommand.__name__ = name
+        return CountedCommand
+
+    #---------- helpers ----------
+
+    def _Names(self, nodes, longNames = False):
+        if longNames:
+            return [cur.LongName() for cur in nodes]
+
+        return [self.scene.PartialName(cur) for cur in nodes]
+
+    def _Targets(self, targets):
+        if targets is None:
+            return []
+
+        if isinstance(targets, (list, tuple)):
+            return list(targets)
+
+        return [targets]
+
+    def _FireEvent(self, event):
+        for curEvent, function in list(self.scriptJobs.values()):
+            if curEvent == event:
+                function()
+
+    #---------- scene and files ----------
+
+    def file(self, *args, **kwargs):
+        query = kwargs.get("query", kwargs.get("q", False))
+
+        if query and kwargs.get("reference"):
+            return [curRef["path"] for curRef in self.scene.references]
+
+        if query and kwargs.get("namespace"):
+            for curRef in self.scene.references:
+                if curRef["path"] == args[0]:
+                    return curRef["namespace"]
+
+            raise RuntimeError("Not a reference: " + args[0])
+
+        if query and (kwargs.get("sceneName") or kwargs.get("sn")):
+            return self.scene.sceneName
+
+        if kwargs.get("new"):
+            self.scene.Clear()
+            self._FireEvent("NewSceneOpened")
+            return ""
+
+        if kwargs.get("open") or kwargs.get("o"):
+            if not os.path.isfile(args[0]):
+                raise RuntimeError("File not found: " + args[0])
+
+            self.scene.Load(args[0])
+            self._FireEvent("SceneOpened")
+            return args[0]
+
+        if "rename" in kwargs:
+            self.scene.sceneName = kwargs["rename"]
+            return kwargs["rename"]
+
+        if kwargs.get("save"):
+            self.scene.Save(self.scene.sceneName)
+            return self.scene.sceneName
+
+        if kwargs.get("exportSelected") or kwargs.get("es"):
+            return self._ExportSelected(args[0], kwargs.get("type"))
+
+        return None
+
+    def _ExportSelected(self, path, fileType):
+        if fileType == "FBX export" and not os.path.splitext(path)[1]:
+            path += ".fbx"
+
+        directory = os.path.dirname(path)
+
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        data = {"type": fileType,
+                "options": dict(self.exportOptions),
+                "selection": self._Names(self.scene.selection, True),
+                "animation": {}}
+
+        #an animation export carries the evaluated channels of every selected transform for each frame of its range
+        if self.exportOptions.get("preset") == "animation":
+            startFrame, endFrame = self.exportOptions["arguments"]
+            frames = [startFrame + offset for offset in range(int(endFrame - startFrame) + 1)]
+
+            for node in self.scene.selection:
+                if node.IsType("transform"):
+                    data["animation"][node.LongName()] = [[self.scene.Evaluate(node, attr, frame) for attr in KEYABLE_ATTRS[:9]]
+                                                          for frame in frames]
+
+        with open(path, "w") as exportFile:
+            json.dump(data, exportFile, indent = 1)
+
+        return path
+
+    def workspace(self, *args, **kwargs):
+        if kwargs.get("q") or kwargs.get("query"):
+            return self.workspaceRoot.replace("\\", "/").rstrip("/") + "/"
+
+        if args and (kwargs.get("openWorkspace") or kwargs.get("o")):
+            self.workspaceRoot = args[0]
+
+        return None
+
+    def playbackOptions(self, **kwargs):
+        if kwargs.get("query") or kwargs.get("q"):
+            if kwargs.get("minTime") or kwargs.get("min"):
+                return self.scene.playback[0]
+
+            return self.scene.playback[1]
+
+        if "minTime" in kwargs:
+            self.scene.playback[0] = float(kwargs["minTime"])
+
+        if "maxTime" in kwargs:
+            self.scene.playback[1] = float(kwargs["maxTime"])
+
+    def currentTime(self, *args, **kwargs):
+        if kwargs.get("query") or kwargs.get("q"):
+            return self.scene.time
+
+        self.scene.time = float(args[0])
+        return self.scene.time
+
+    #Units are fixed: film, centimeters, degrees
+    def currentUnit(self, **kwargs):
+        if not (kwargs.get("query") or kwargs.get("q")):
+            raise RuntimeError("The stand-in only queries currentUnit")
+
+        if kwargs.get("time") or kwargs.get("t"):
+            return "film"
+
+        if kwargs.get("angle") or kwargs.get("a"):
+            return "deg"
+
+        return "cm"
+
+    def scriptJob(self, **kwargs):
+        jobId = len(self.scriptJobs) + 1
+
+        if "event" in kwargs:
+            self.scriptJobs[jobId] = (kwargs["event"][0], kwargs["event"][1])
+
+        return jobId
+
+    def undoInfo(self, *args, **kwargs):
+        scene = self.scene
+
+        if kwargs.get("query") or kwargs.get("q"):
+            if kwargs.get("undoName"):
+                return scene.undoStack[-1]["name"] if scene.undoStack else ""
+
+            return scene.undoEnabled and scene.recording
+
+        if "state" in kwargs:
+            scene.undoEnabled = bool(kwargs["state"])
+            scene.recording = True
+            scene.undoChunks = []
+            scene.undoStack = []
+
+        if "stateWithoutFlush" in kwargs:
+            scene.recording = bool(kwargs["stateWithoutFlush"])
+
+        if kwargs.get("openChunk") and scene.undoEnabled:
+            scene.undoChunks.append(scene.Snapshot(kwargs.get("chunkName", "")) if not scene.undoChunks else None)
+
+        if kwargs.get("closeChunk") and scene.undoChunks:
+            snapshot = scene.undoChunks.pop()
+
+            if snapshot is not None and snapshot["record"] != scene.ReturnUndoRecord():
+                scene.undoStack.append(snapshot)
+
+        return None
+
+    def undo(self):
+        if self.scene.undoChunks or not self.scene.undoStack:
+            self.warning("There are no more commands to undo.")
+            return
+
+        self.scene.Restore(self.scene.undoStack.pop())
+
+    def loadPlugin(self, *args, **kwargs):
+        return list(args)
+
+    def warning(self, message):
+        sys.stderr.write("Warning: " + message.rstrip("\n") + "\n")
+
+    #---------- ui ----------
+
+    #Controls are a name -> value store, enough for tools that read their fields from the UI
+
+    def _Control(self, name, valueFlags, default, kwargs):
+        query = kwargs.get("query", kwargs.get("q", False))
+
+        if kwargs.get("exists"):
+            return name in self.controls
+
+        for flag in valueFlags:
+            if flag in kwargs and not query:
+                self.controls[name] = kwargs[flag]
+
+        if query:
+            if name not in self.controls:
+                raise RuntimeError("Object '" + name + "' not found.")
+
+            return self.controls[name]
+
+        self.controls.setdefault(name, default)
+        return name
+
+    def textField(self, name, **kwargs):
+        return self._Control(name, ["text", "tx"], "", kwargs)
+
+    def checkBox(self, name, **kwargs):
+        return self._Control(name, ["value", "v"], False, kwargs)
+
+    #---------- selection ----------
+
+    def select(self, *args, **kwargs):
+        if kwargs.get("clear"):
+            self.scene.selection = []
+            return
+
+        targets = []
+
+        for curArg in args:
+            targets.extend(self._Targets(curArg))
+
+        nodes = [self.scene.Node(cur) for cur in targets]
+
+        if not kwargs.get("add"):
+            self.scene.selection = []
+
+        for node in nodes:
+            if node not in self.scene.selection:
+                self.scene.selection.append(node)
+
+    #---------- listing ----------
+
+    def ls(self, *args, **kwargs):
+        longNames = kwargs.get("long", kwargs.get("l", False))
+        nodeType = kwargs.get("type")
+        objectsOnly = kwargs.get("objectsOnly", kwargs.get("o", False))
+        recursive = kwargs.get("recursive", kwargs.get("r", False))
+
+        if kwargs.get("sl") or kwargs.get("selection"):
+            nodes = list(self.scene.selection)
+            patterns = []
+        else:
+            patterns = []
+
+            for curArg in args:
+                patterns.extend(self._Targets(curArg))
+
+            nodes = None if patterns else list(self.scene.nodes)
+
+        result = []
+        plugs = []
+
+        for pattern in patterns:
+            nodePattern, dot, attr = pattern.partition(".")
+
+            if any(char in nodePattern for char in "*?[") or nodePattern.startswith(":"):
+                matches = [cur for cur in self.scene.nodes if MatchNamePattern(cur.name, nodePattern, recursive)]
+            else:
+                matches = self.scene.NodesNamed(nodePattern)
+
+            for node in matches:
+                if dot and not self.scene.HasAttr(node, attr):
+                    continue
+
+                if dot and not objectsOnly:
+                    plugs.append((node, attr))
+                else:
+                    result.append(node)
+
+        if nodes is not None:
+            result = nodes
+
+        if kwargs.get("tr") or kwargs.get("transforms"):
+            nodeType = "transform"
+
+        if nodeType:
+            types = self._Targets(nodeType)
+            result = [cur for cur in result if any(cur.IsType(curType) for curType in types)]
+            plugs = [cur for cur in plugs if any(cur[0].IsType(curType) for curType in types)]
+
+        if kwargs.get("referencedNodes") or kwargs.get("rn"):
+            result = [cur for cur in result if self.scene.IsReferenced(cur)]
+
+        unique = []
+        seen = set()
+
+        for node in result:
+            if id(node) not in seen:
+                seen.add(id(node))
+                unique.append(node)
+
+        if kwargs.get("uuid"):
+            return [cur.uuid for cur in unique]
+
+        names = self._Names(unique, longNames)
+
+        if kwargs.get("showType") or kwargs.get("st"):
+            return [item for name, node in zip(names, unique) for item in (name, node.type)]
+
+        return names + [self.scene.PartialName(cur[0]) + "." + cur[1] for cur in plugs]
+
+    def objExists(self, name):
+        if "." in name:
+            try:
+                return self.scene.PlugExists(name)
+            except ValueError:
+                return False
+
+        return bool(self.scene.NodesNamed(name))
+
+    def objectType(self, name, isType = None):
+        node = self.scene.Node(name)
+
+        if isType:
+            return node.IsType(isType)
+
+        return node.type
+
+    def listRelatives(self, *args, **kwargs):
+        fullPath = kwargs.get("fullPath", kwargs.get("f", False))
+        nodeType = kwargs.get("type")
+        result = []
+
+        for curArg in args:
+            for name in self._Targets(curArg):
+                node = self.scene.Node(name)
+
+                if kwargs.get("parent") or kwargs.get("p"):
+                    relatives = [node.parent] if node.parent is not None else []
+                elif kwargs.get("allDescendents") or kwargs.get("ad"):
+                    relatives = list(reversed(self.scene.Descendants(node)))
+                else:
+                    relatives = list(node.children)
+
+                if kwargs.get("shapes") or kwargs.get("s"):
+                    relatives = [cur for cur in relatives if cur.IsType("shape")]
+
+                if nodeType:
+                    relatives = [cur for cur in relatives if cur.IsType(nodeType)]
+
+                for relative in relatives:
+                    if relative not in result:
+                        result.append(relative)
+
+        return self._Names(result, fullPath) or None
+
+    def listAttr(self, name, userDefined = False, locked = False, **kwargs):
+        node = self.scene.Node(name)
+
+        if locked:
+            return sorted(node.locked) or None
+
+        if userDefined:
+            return list(node.userAttrs) or None
+
+        return sorted(node.attrs) or None
+
+    def attributeQuery(self, attr, node = None, exists = False, **kwargs):
+        return self.scene.HasAttr(self.scene.Node(node), attr)
+
+    def listConnections(self, *args, **kwargs):
+        source = kwargs.get("source", kwargs.get("s", True))
+        destination = kwargs.get("destination", kwargs.get("d", True))
+        plugs = kwargs.get("plugs", kwargs.get("p", False))
+        connections = kwargs.get("connections", kwargs.get("c", False))
+        nodeType = kwargs.get("type")
+        result = []
+
+        for curArg in args:
+            for target in self._Targets(curArg):
+                if "." in target:
+                    node, attr = self.scene.SplitPlug(target)
+                else:
+                    node, attr = self.scene.Node(target), None
+
+                for direction, localAttr, otherNode, otherAttr in self.scene.ConnectionsOf(node, attr):
+                    if direction == "source" and not source or direction == "destination" and not destination:
+                        continue
+
+                    if nodeType and not otherNode.IsType(nodeType):
+                        continue
+
+                    other = self.scene.PartialName(otherNode)
+
+                    if plugs:
+                        other += "." + otherAttr
+
+                    if connections:
+                        result.append(self.scene.PartialName(node) + "." + localAttr)
+                        result.append(other)
+                    elif other not in result or plugs:
+                        result.append(other)
+
+        return result or None
+
+    def listHistory(self, *args, **kwargs):
+        future = kwargs.get("future", kwargs.get("f", False))
+        pruneDag = kwargs.get("pruneDagObjects", kwargs.get("pdo", False))
+
+        visited = []
+        pending = []
+
+        for curArg in args:
+            pending.extend(self.scene.Node(cur) for cur in self._Targets(curArg))
+
+        while pending:
+            node = pending.pop(0)
+
+            if node in visited:
+                continue
+
+            visited.append(node)
+
+            for direction, localAttr, otherNode, otherAttr in self.scene.ConnectionsOf(node):
+                if (direction == "destination") == future and localAttr != "message":
+                    pending.append(otherNode)
+
+        if pruneDag:
+            visited = [cur for cur in visited if not cur.IsDag()]
+
+        return self._Names(visited) or None
+
+    #---------- attributes ----------
+
+    def getAttr(self, plug, asString = False, time = None, lock = False, **kwargs):
+        node, attr = self.scene.SplitPlug(plug)
+
+        if not self.scene.HasAttr(node, attr):
+            raise ValueError("No object matches name: " + plug)
+
+        if lock:
+            return attr in node.locked
+
+        value = self.scene.Evaluate(node, attr, time)
+
+        if asString and value is None:
+            return ""
+
+        return value
+
+    def setAttr(self, plug, *values, **kwargs):
+        node, attr = self.scene.SplitPlug(plug)
+
+        if not self.scene.HasAttr(node, attr):
+            raise ValueError("No object matches name: " + plug)
+
+        if "lock" in kwargs:
+            if kwargs["lock"]:
+                node.locked.add(attr)
+            else:
+                node.locked.discard(attr)
+
+        if not values:
+            return
+
+        if attr in node.locked:
+            raise RuntimeError("The attribute '" + plug + "' is locked or connected and cannot be modified")
+
+        if attr in COMPOUND_ATTRS:
+            for child, value in zip(COMPOUND_ATTRS[attr], values):
+                self.scene.WriteAttr(node, child, float(value))
+        else:
+            self.scene.WriteAttr(node, attr, values[0])
+
+    def addAttr(self, name, longName = None, shortName = None, at = None, dt = None, multi = False, **kwargs):
+        node = self.scene.Node(name)
+        attrType = at or kwargs.get("attributeType") or dt or kwargs.get("dataType")
+
+        if longName in node.attrs:
+            raise RuntimeError("Found a duplicate attribute name: " + longName)
+
+        defaults = {"bool": False, "float": 0.0, "double": 0.0, "long": 0, "string": None, "message": None}
+        node.attrs[longName] = defaults.get(attrType)
+        node.userAttrs.append(longName)
+
+        if multi:
+            node.multiAttrs.append(longName)
+
+    #Only user attributes can be deleted, and not those of referenced nodes
+    def deleteAttr(self, *args, **kwargs):
+        attr = kwargs.get("attribute", kwargs.get("at"))
+
+        if attr:
+            node = self.scene.Node(args[0])
+        else:
+            node, attr = self.scene.SplitPlug(args[0])
+
+        if attr not in node.userAttrs or self.scene.IsReferenced(node):
+            raise RuntimeError("Cannot delete attribute '" + attr + "' of " + node.name)
+
+        for plug, source in list(self.scene.connections.items()):
+            if plug == (node, attr) or source == (node, attr):
+                del self.scene.connections[plug]
+
+        node.userAttrs.remove(attr)
+        node.locked.discard(attr)
+        node.attrs.pop(attr, None)
+
+        if attr in node.multiAttrs:
+            node.multiAttrs.remove(attr)
+
+    def connectAttr(self, sourcePlug, destPlug, force = False, nextAvailable = False, **kwargs):
+        sourceNode, sourceAttr = self.scene.SplitPlug(sourcePlug)
+        destNode, destAttr = self.scene.SplitPlug(destPlug)
+
+        if not self.scene.HasAttr(sourceNode, sourceAttr) or not self.scene.HasAttr(destNode, destAttr):
+            raise RuntimeError("Cannot connect " + sourcePlug + " to " + destPlug)
+
+        if nextAvailable or kwargs.get("na"):
+            index = 0
+
+            while (destNode, destAttr + "[" + str(index) + "]") in self.scene.connections:
+                index += 1
+
+            destAttr += "[" + str(index) + "]"
+
+        if destAttr in destNode.locked:
+            raise RuntimeError("The destination attribute '" + destPlug + "' is locked")
+
+        self.scene.Connect(sourceNode, sourceAttr, destNode, destAttr, force)
+
+    def disconnectAttr(self, sourcePlug, destPlug):
+        destNode, destAttr = self.scene.SplitPlug(destPlug)
+        self.scene.Disconnect(destNode, destAttr)
+
+    #---------- geometry ----------
+
+    #Only the object space points of all vertices of a mesh can be queried, as "mesh.vtx[*]"
+    def xform(self, target, **kwargs):
+        if not (kwargs.get("query") or kwargs.get("q")) or not (kwargs.get("translation") or kwargs.get("t")):
+            raise RuntimeError("The stand-in only queries xform translation")
+
+        name, dot, component = target.partition(".")
+
+        if component != "vtx[*]":
+            raise RuntimeError("The stand-in only queries xform on mesh.vtx[*]")
+
+        return list(self.scene.Node(name).attrs.get("points") or [])
+
+    def polyEvaluate(self, name, face = False, **kwargs):
+        if not face:
+            raise RuntimeError("The stand-in only evaluates the face count")
+
+        return self.scene.Node(name).attrs.get("faceCount", 0)
+
+    #---------- creation and deletion ----------
+
+    def createNode(self, nodeType, name = None, parent = None, skipSelect = False, **kwargs):
+        parentNode = self.scene.Node(parent) if parent else None
+        node = self.scene.CreateNode(nodeType, name, parentNode)
+        return self.scene.PartialName(node)
+
+    def group(self, *args, **kwargs):
+        node = self.scene.CreateNode("transform", kwargs.get("name", kwargs.get("n", "group#")))
+
+        if not (kwargs.get("em") or kwargs.get("empty")):
+            for curArg in args:
+                for child in self._Targets(curArg):
+                    self.scene.Reparent(self.scene.Node(child), node)
+
+        return self.scene.PartialName(node)
+
+    def delete(self, *args, **kwargs):
+        nodes = []
+
+        for curArg in args:
+            for name in self._Targets(curArg):
+                nodes.append(self.scene.Node(name))
+
+        for node in nodes:
+            self.scene.DeleteNode(node)
+
+    def duplicate(self, *args, **kwargs):
+        result = []
+
+        for curArg in args:
+            for name in self._Targets(curArg):
+                node = self.scene.Node(name)
+                copy = self.scene.Duplicate(node, node.parent)
+                result.append(self.scene.PartialName(copy))
+
+                if not (kwargs.get("returnRootsOnly") or kwargs.get("rr")):
+                    result.extend(self._Names(self.scene.Descendants(copy)))
+
+        return result
+
+    def parent(self, *args, **kwargs):
+        targets = []
+
+        for curArg in args:
+            targets.extend(self._Targets(curArg))
+
+        if kwargs.get("world") or kwargs.get("w"):
+            newParent = None
+        else:
+            newParent = self.scene.Node(targets.pop())
+
+        nodes = [self.scene.Node(cur) for cur in targets]
+
+        for node in nodes:
+            self.scene.Reparent(node, newParent)
+
+        return self._Names(nodes)
+
+    def rename(self, name, newName, **kwargs):
+        node = self.scene.Node(name)
+
+        if self.scene.IsReferenced(node):
+            raise RuntimeError("Cannot rename a read only node '" + name + "'.")
+
+        node.name = self.scene.UniqueName(newName) if self.scene.NameClashes(node, newName) else newName
+        self._FireEvent("NameChanged")
+        return self.scene.PartialName(node)
+
+    #---------- animation ----------
+
+    def _CurveFor(self, node, attr):
+        source = self.scene.Input(node, attr)
+
+        if source is not None and source[0].IsType("animCurve"):
+            return source[0]
+
+        curve = self.scene.CreateNode(CURVE_TYPES.get(attr, "animCurveTU"), node.name.rpartition(":")[2] + "_" + attr)
+        self.scene.Connect(curve, "output", node, attr, force = True)
+        return curve
+
+    def _SetKey(self, curve, time, value):
+        for curKey in curve.keys:
+            if curKey[0] == time:
+                curKey[1] = value
+                return
+
+        curve.keys.append([time, value])
+        curve.keys.sort(key = lambda curKey: curKey[0])
+
+    def bakeResults(self, *args, **kwargs):
+        startTime, endTime = kwargs.get("t", kwargs.get("time"))
+        attrs = [SHORT_ATTR_NAMES.get(cur, cur) for cur in self._Targets(kwargs.get("at", kwargs.get("attribute", KEYABLE_ATTRS[:9])))]
+
+        nodes = []
+
+        for curArg in args:
+            nodes.extend(self.scene.Node(cur) for cur in self._Targets(curArg))
+
+        frames = []
+        frame = float(startTime)
+
+        while frame <= endTime + 0.001:
+            frames.append(frame)
+            frame += 1.0
+
+        baked = []
+
+        for node in nodes:
+            for attr in attrs:
+                baked.append((node, attr, [[curFrame, self.scene.Evaluate(node, attr, curFrame)] for curFrame in frames]))
+
+        for node, attr, keys in baked:
+            curve = self.scene.CreateNode(CURVE_TYPES.get(attr, "animCurveTU"), node.name.rpartition(":")[2] + "_" + attr)
+            curve.keys = keys
+            self.scene.Connect(curve, "output", node, attr, force = True)
+
+        return len(frames)
+
+    def setKeyframe(self, *args, **kwargs):
+        time = kwargs.get("t", kwargs.get("time", self.scene.time))
+
+        if isinstance(time, (list, tuple)):
+            time = time[0]
+
+        layer = self.scene.Node(kwargs["al"]) if kwargs.get("al") else None
+
+        for curArg in args:
+            for target in self._Targets(curArg):
+                if "." in target:
+                    node, attr = self.scene.SplitPlug(target)
+                    attrs = [attr]
+                else:
+                    node = self.scene.Node(target)
+                    attrs = [cur for cur in KEYABLE_ATTRS if cur in node.attrs]
+
+                for attr in attrs:
+                    if layer is not None:
+                        self._SetLayerKey(layer, node, attr, time)
+                        continue
+
+                    value = kwargs.get("v", kwargs.get("value", self.scene.Evaluate(node, attr)))
+                    self._SetKey(self._CurveFor(node, attr), float(time), value)
+
+    #Key the value set with setAttr onto the layer, as an offset from the channel below the layer when additive
+    def _SetLayerKey(self, layer, node, attr, time):
+        if attr not in CURVE_TYPES and not attr.startswith("scale"):
+            return
+
+        value = node.attrs[attr]
+        key = node.uuid + "." + attr
+        layer.layerKeys.pop(key, None)
+
+        if not layer.attrs["override"]:
+            value -= self.scene.Evaluate(node, attr, float(time))
+
+        layer.layerKeys[key] = value
+
+    def keyframe(self, *args, **kwargs):
+        curves = []
+
+        for curArg in args:
+            for target in self._Targets(curArg):
+                if "." in target:
+                    node, attr = self.scene.SplitPlug(target)
+                    source = self.scene.Input(node, attr)
+
+                    if source is not None and source[0].IsType("animCurve"):
+                        curves.append(source[0])
+                else:
+                    node = self.scene.Node(target)
+
+                    if node.IsType("animCurve"):
+                        curves.append(node)
+                    else:
+                        curves.extend(cur[2] for cur in self.scene.ConnectionsOf(node) if cur[0] == "source" and cur[2].IsType("animCurve"))
+
+        timeRange = kwargs.get("t", kwargs.get("time"))
+
+        if kwargs.get("keyframeCount") or kwargs.get("kc"):
+            return sum(len(curve.keys) for curve in curves)
+
+        result = []
+
+        for curve in curves:
+            for curKey in curve.keys:
+                if timeRange and not (timeRange[0] <= curKey[0] <= timeRange[-1]):
+                    continue
+
+                if kwargs.get("timeChange") or kwargs.get("tc"):
+                    result.append(curKey[0])
+
+                if kwargs.get("valueChange") or kwargs.get("vc"):
+                    result.append(curKey[1])
+
+        return result or None
+
+    def keyTangent(self, *args, **kwargs):
+        count = 0
+
+        for curArg in args:
+            for target in self._Targets(curArg):
+                count += len(self.scene.Node(target).keys)
+
+        flags = len([flag for flag in ("inAngle", "outAngle", "ia", "oa") if kwargs.get(flag)])
+        return [0.0] * (count * flags) or None
+
+    def animLayer(self, *args, **kwargs):
+        if kwargs.get("query") or kwargs.get("q"):
+            layer = self.scene.Node(args[0])
+
+            for flag in ("mute", "solo", "weight", "lock", "override", "passthrough"):
+                if kwargs.get(flag):
+                    return layer.attrs[flag]
+
+            return None
+
+        if kwargs.get("edit") or kwargs.get("e"):
+            layer = self.scene.Node(args[0])
+
+            for flag in ("mute", "solo", "weight", "lock", "override", "passthrough"):
+                if flag in kwargs:
+                    self.scene.WriteAttr(layer, flag, kwargs[flag])
+
+            return self.scene.PartialName(layer)
+
+        layer = self.scene.CreateNode("animLayer", args[0] if args else "AnimLayer1")
+
+        for flag in ("mute", "solo", "override", "passthrough", "lock"):
+            if flag in kwargs:
+                layer.attrs[flag] = kwargs[flag]
+
+        if kwargs.get("aso") or kwargs.get("addSelectedObjects"):
+            layer.layerMembers = [cur.uuid for cur in self.scene.selection]
+
+        return self.scene.PartialName(layer)
+
+#=========================== MEL ===========================================================
+
+#PURPOSE        The maya.mel stand-in
+#PROCEDURE      eval understands source, whatIs and the FBX option procedures, every other command is ignored
+#PRESUMPTIONS   Sourced files are looked up on MAYA_SCRIPT_PATH and next to this module
+class StandInMel(object):
+    def __init__(self, commands):
+        self.commands = commands
+        self.sourced = {}
+
+    def _FindScript(self, fileName):
+        searchPath = os.environ.get("MAYA_SCRIPT_PATH", "").split(os.pathsep) + [os.path.dirname(os.path.abspath(__file__))]
+
+        for directory in searchPath:
+            if directory and os.path.isfile(os.path.join(directory, fileName)):
+                return os.path.join(directory, fileName)
+
+        return None
+
+    def eval(self, command):
+        command = command.strip().rstrip(";")
+
+        if command.startswith("source "):
+            fileName = command[len("source "):].strip().strip('"')
+            path = self._FindScript(fileName)
+
+            if path is None:
+                raise RuntimeError("Cannot find file \"" + fileName + "\" for source statement.")
+
+            with open(path) as scriptFile:
+                for line in scriptFile:
+                    if line.startswith("global proc") and "(" in line:
+                        self.sourced[line.split("(")[0].split()[-1]] = path
+
+            return None
+
+        if command.startswith("whatIs "):
+            procedure = command[len("whatIs "):].strip().strip('"')
+
+            if procedure in self.sourced:
+                return "Mel procedure found in: " + self.sourced[procedure]
+
+            return "Unknown"
+
+        procedure, paren, arguments = command.partition("(")
+
+        if procedure.startswith("SetFBXExportOptions_"):
+            if procedure not in self.sourced:
+                raise RuntimeError("Cannot find procedure \"" + procedure + "\".")
+
+            values = [cur.strip() for cur in arguments.rstrip(")").split(",") if cur.strip()]
+            self.commands.exportOptions = {"preset": procedure[len("SetFBXExportOptions_"):],
+                                           "arguments": [float(cur) for cur in values]}
+
+        return None
+
+#=========================== Install =======================================================
+
+#PURPOSE        Make "import maya.cmds", "import maya.mel" and "import maya.standalone" use the stand-in
+#PROCEDURE      Build module objects around one StandInScene and register them in sys.modules
+#PRESUMPTIONS   Call before anything imports maya. Returns the StandInCommands instance
+def InstallStandIn():
+    if "maya.cmds" in sys.modules and hasattr(sys.modules["maya.cmds"], "standInCommands"):
+        return sys.modules["maya.cmds"].standInCommands
+
+    commands = StandInCommands(StandInScene())
+    melCommands = StandInMel(commands)
+
+    mayaModule = types.ModuleType("maya")
+    cmdsModule = types.ModuleType("maya.cmds")
+    melModule = types.ModuleType("maya.mel")
+    standaloneModule = types.ModuleType("maya.standalone")
+
+    for name in dir(commands):
+        if name[0].islower() and callable(getattr(commands, name)):
+            setattr(cmdsModule, name, commands._Counted(name, getattr(commands, name)))
+
+    cmdsModule.standInCommands = commands
+    melModule.eval = commands._Counted("mel.eval", melCommands.eval)
+    standaloneModule.initialize = lambda *args, **kwargs: None
+    standaloneModule.uninitialize = lambda *args, **kwargs: None
+
+    mayaModule.cmds = cmdsModule
+    mayaModule.mel = melModule
+    mayaModule.standalone = standaloneModule
+    mayaModule.__path__ = []
+
+    sys.modules["maya"] = mayaModule
+    sys.modules["maya.cmds"] = cmdsModule
+    sys.modules["maya.mel"] = melModule
+    sys.modules["maya.standalone"] = standaloneModule
+
+    return commands
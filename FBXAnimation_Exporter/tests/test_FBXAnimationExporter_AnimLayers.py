@@ -0,0 +1,148 @@
+#Tests of the anim layer handling of an export batch. Job ordering and the per job layer state of the core run
+#in a plain interpreter, a batch run on the stand-in maya.cmds checks the layers the scene exports with and is
+#skipped under mayapy, where installing the stand-in would replace the real maya.cmds:
+#
+#   python -m pytest FBXAnimation_Exporter/tests
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+EXPORTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if EXPORTER_DIR not in sys.path:
+    sys.path.insert(0, EXPORTER_DIR)
+
+from FBXAnimationExporter_Core import (OrderJobsByAnimLayers, ReturnAnimLayerKey, ReturnJobAnimLayerState,
+                                       ReturnUnionFrameRange)
+
+#PURPOSE        Return whether the real maya.cmds, not the stand-in, can be imported
+#PROCEDURE      The stand-in module carries standInCommands
+#PRESUMPTIONS   None
+def IsMayaAvailable():
+    try:
+        import maya.cmds
+    except ImportError:
+        return False
+
+    return not hasattr(maya.cmds, "standInCommands")
+
+#PURPOSE        Return a job as the planner makes it, with only the keys the layer procedures read
+#PROCEDURE      layers is a list of (name, mute, solo)
+#PRESUMPTIONS   None
+def ReturnJob(exportName, layers, startFrame = 1.0, endFrame = 24.0):
+    return {"exportName": exportName,
+            "startFrame": startFrame,
+            "endFrame": endFrame,
+            "animLayers": [{"name": name, "mute": mute, "solo": solo} for name, mute, solo in layers]}
+
+class OrderJobsByAnimLayersTest(unittest.TestCase):
+    def testJobsWithEqualLayersRunBackToBack(self):
+        jobs = [ReturnJob("walk", [("L1", True, False)]),
+                ReturnJob("idle", []),
+                ReturnJob("run", [("L1", True, False)]),
+                ReturnJob("jump", [("L2", False, True)]),
+                ReturnJob("crouch", [])]
+
+        ordered = OrderJobsByAnimLayers(jobs)
+
+        self.assertEqual([job["exportName"] for job in ordered], ["walk", "run", "idle", "crouch", "jump"])
+        self.assertEqual([job["exportName"] for job in jobs], ["walk", "idle", "run", "jump", "crouch"])
+
+    def testLayerOrderDoesNotMatter(self):
+        first = ReturnJob("walk", [("L1", True, False), ("L2", False, False)])
+        second = ReturnJob("run", [("L2", False, False), ("L1", True, False)])
+
+        self.assertEqual(ReturnAnimLayerKey(first["animLayers"]), ReturnAnimLayerKey(second["animLayers"]))
+        self.assertNotEqual(ReturnAnimLayerKey(first["animLayers"]), ReturnAnimLayerKey([]))
+
+    def testUnionFrameRange(self):
+        jobs = [ReturnJob("walk", [], 5.0, 20.0), ReturnJob("run", [], 1.0, 12.0)]
+
+        self.assertEqual(ReturnUnionFrameRange(jobs), (1.0, 20.0))
+
+class ReturnJobAnimLayerStateTest(unittest.TestCase):
+    def setUp(self):
+        self.baseline = {"L1": {"mute": True, "solo": False},
+                         "L2": {"mute": False, "solo": False}}
+
+    def testUnlistedLayersGoBackToBaseline(self):
+        state = ReturnJobAnimLayerState([], self.baseline)
+
+        self.assertEqual(state, [{"name": "L1", "mute": True, "solo": False},
+                                 {"name": "L2", "mute": False, "solo": False}])
+
+    def testListedLayersOverrideBaseline(self):
+        job = ReturnJob("walk", [("L2", False, True), ("L1", False, False)])
+
+        state = ReturnJobAnimLayerState(job["animLayers"], self.baseline)
+
+        self.assertEqual(state, [{"name": "L1", "mute": False, "solo": False},
+                                 {"name": "L2", "mute": False, "solo": True}])
+        self.assertEqual(self.baseline["L1"], {"mute": True, "solo": False})
+
+    def testLayersMissingFromBaselineAreKept(self):
+        state = ReturnJobAnimLayerState(ReturnJob("walk", [("L3", True, False)])["animLayers"], {})
+
+        self.assertEqual(state, [{"name": "L3", "mute": True, "solo": False}])
+
+@unittest.skipIf(IsMayaAvailable(), "runs on the stand-in, not inside Maya")
+class ExportAnimLayersTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import FBXAnimationExporter_StandIn
+        FBXAnimationExporter_StandIn.InstallStandIn()
+
+    def setUp(self):
+        import maya.cmds as cmds
+        import FBXAnimationExporter
+
+        self.cmds = cmds
+        self.exporter = FBXAnimationExporter
+        self.workspace = tempfile.mkdtemp()
+
+        cmds.file(new = True, force = True)
+        cmds.workspace(self.workspace, openWorkspace = True)
+
+        origin = cmds.createNode("joint", name = "hero:root")
+        cmds.addAttr(origin, longName = "origin", at = "bool")
+        cmds.setAttr(origin + ".origin", True)
+        cmds.createNode("joint", name = "hero:hip", parent = origin)
+
+        for frame in (1, 24):
+            cmds.setKeyframe(origin + ".translateX", t = frame, v = frame * 2.0)
+
+        cmds.animLayer("L1")
+        cmds.animLayer("L1", edit = True, mute = True)
+
+        for exportName, animLayers in [("heroWalk", [{"name": "L1", "mute": False, "solo": False}]),
+                                       ("heroIdle", []),
+                                       ("heroRun", [{"name": "L1", "mute": False, "solo": False}])]:
+            exportNode = FBXAnimationExporter.CreateFBXExportNode("hero")
+            FBXAnimationExporter.ConnectFBXExportNodeToOrigin(exportNode, origin)
+            FBXAnimationExporter.WriteExportNodeSettings(exportNode, {"exportName": exportName, "animLayers": animLayers})
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace, True)
+
+    def testUnlistedLayersExportAtCapturedState(self):
+        exported = []
+        applyAnimLayerState = self.exporter.ApplyAnimLayerState
+
+        def RecordAnimLayerState(animLayers, layerState):
+            edits = applyAnimLayerState(animLayers, layerState)
+            exported.append(self.cmds.animLayer("L1", query = True, mute = True))
+            return edits
+
+        with unittest.mock.patch.object(self.exporter, "ApplyAnimLayerState", side_effect = RecordAnimLayerState):
+            plan = self.exporter.ExportFBXAnimation("hero", None, force = True)
+
+        self.assertEqual([job["exportName"] for job in plan[0]["jobs"]], ["heroWalk", "heroRun", "heroIdle"])
+        self.assertEqual(exported[:3], [False, False, True])
+        self.assertTrue(self.cmds.animLayer("L1", query = True, mute = True))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#Tests of the key reduction of ReduceCurveKeys and ReduceKeyArrays: every channel stays within its tolerance
+#and the first and last keys are always kept. Runs in any interpreter with NumPy:
+#
+#   python -m pytest FBXAnimation_Exporter/tests
+
+import os
+import sys
+import unittest
+
+EXPORTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if EXPORTER_DIR not in sys.path:
+    sys.path.insert(0, EXPORTER_DIR)
+
+from FBXAnimationExporter_Core import (ReturnNumpy, ReturnFrameArray, ReturnKeyTolerances, ReturnChannelTolerances,
+                                       ReduceCurveKeys, ReduceKeyArrays)
+
+FRAME_COUNT = 120
+
+@unittest.skipIf(ReturnNumpy() is None, "NumPy is not installed")
+class ReduceKeysTest(unittest.TestCase):
+    def setUp(self):
+        self.numpy = ReturnNumpy()
+        self.frames = ReturnFrameArray(1, FRAME_COUNT)
+
+    #Largest difference between the samples and the kept keys interpolated linearly
+    def ReturnRebuiltError(self, values, keep):
+        rebuilt = self.numpy.interp(self.frames, self.frames[keep], values[keep])
+        return float(self.numpy.abs(rebuilt - values).max())
+
+    def AssertReduced(self, values, tolerance):
+        keep = ReduceCurveKeys(self.frames, values, tolerance)
+
+        self.assertTrue(keep[0] and keep[-1])
+        self.assertLessEqual(self.ReturnRebuiltError(values, keep), tolerance)
+
+        return keep
+
+    def testFlatCurveKeepsEnds(self):
+        keep = self.AssertReduced(self.numpy.full(FRAME_COUNT, 3.0), 0.01)
+        self.assertEqual(int(keep.sum()), 2)
+
+    def testLinearCurveKeepsEnds(self):
+        keep = self.AssertReduced(self.frames * 0.5 - 4.0, 0.01)
+        self.assertEqual(int(keep.sum()), 2)
+
+    def testNoisyCurve(self):
+        random = self.numpy.random.RandomState(7)
+        values = self.numpy.sin(self.frames * 0.1) * 10.0 + random.normal(0.0, 0.05, FRAME_COUNT)
+
+        keep = self.AssertReduced(values, 0.01)
+        self.assertLess(int(keep.sum()), FRAME_COUNT)
+
+    def testRotationCurve(self):
+        values = self.numpy.radians(self.numpy.sin(self.frames * 0.05) * 180.0)
+
+        self.AssertReduced(values, self.numpy.radians(0.05))
+
+    def testShortCurves(self):
+        self.assertEqual(ReduceCurveKeys(self.frames[:0], self.numpy.zeros(0), 0.01).tolist(), [])
+        self.assertEqual(ReduceCurveKeys(self.frames[:1], self.numpy.ones(1), 0.01).tolist(), [True])
+        self.assertEqual(ReduceCurveKeys(self.frames[:2], self.numpy.array([0.0, 5.0]), 0.01).tolist(), [True, True])
+
+    def testRigWithinTolerance(self):
+        random = self.numpy.random.RandomState(11)
+        numpy = self.numpy
+        flat = numpy.zeros(FRAME_COUNT)
+        linear = self.frames * 0.25
+        noisy = numpy.cos(self.frames * 0.2) * 5.0 + random.normal(0.0, 0.02, FRAME_COUNT)
+        rotation = numpy.radians(self.frames * 3.0 + random.normal(0.0, 0.5, FRAME_COUNT))
+        scale = 1.0 + numpy.sin(self.frames * 0.3) * 0.1
+
+        #Two nodes of nine ORIGIN_CHANNELS each
+        values = numpy.column_stack([linear, noisy, flat, rotation, flat, rotation * 0.5, scale, flat + 1.0, scale,
+                                     noisy, flat, linear, flat, rotation, flat, flat + 1.0, flat + 1.0, flat + 1.0])
+        tolerances = ReturnChannelTolerances(2, ReturnKeyTolerances())
+
+        keep, stats = ReduceKeyArrays(self.frames, values, tolerances)
+
+        self.assertTrue(keep[0].all() and keep[-1].all())
+        self.assertTrue(stats["withinTolerance"])
+        self.assertEqual(stats["keysBefore"], values.size)
+        self.assertEqual(stats["keysAfter"], int(keep.sum()))
+        self.assertLess(stats["keysAfter"], stats["keysBefore"])
+
+        for column in range(values.shape[1]):
+            self.assertLessEqual(self.ReturnRebuiltError(values[:, column], keep[:, column]), tolerances[column])
+
+        for channelType, tolerance in ReturnKeyTolerances().items():
+            self.assertLessEqual(stats["maxError"][channelType], tolerance + 1e-9)
+
+    def testToleranceOverrides(self):
+        tolerances = ReturnKeyTolerances({"rotate": 1.0, "scale": None, "other": 5.0})
+
+        self.assertEqual(tolerances["rotate"], 1.0)
+        self.assertEqual(tolerances["scale"], ReturnKeyTolerances()["scale"])
+        self.assertNotIn("other", tolerances)
+
+if __name__ == "__main__":
+    unittest.main()
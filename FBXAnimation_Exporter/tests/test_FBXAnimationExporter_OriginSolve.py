@@ -0,0 +1,102 @@
+#Regression tests of the array origin solve against the bake and animLayer solve of TransformToOrigin.
+#SolveOriginArrays is tested on known zero and shift cases in any interpreter with NumPy. The comparison with
+#the animLayer solve, VerifyOriginArraySolve, needs Maya and only runs under mayapy:
+#
+#   python -m pytest FBXAnimation_Exporter/tests
+#   mayapy -m unittest discover -s FBXAnimation_Exporter/tests
+
+import os
+import sys
+import unittest
+
+EXPORTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if EXPORTER_DIR not in sys.path:
+    sys.path.insert(0, EXPORTER_DIR)
+
+from FBXAnimationExporter_Core import ReturnNumpy, SolveOriginArrays, ReturnFrameArray
+
+#Origin channels in ORIGIN_CHANNELS order for three frames, translate and rotate move, scale changes after the first frame
+ORIGIN_VALUES = [[10.0, 0.0, -4.0, 0.0, 90.0, 0.0, 1.0, 1.0, 1.0],
+                 [12.0, 1.0, -4.0, 5.0, 95.0, 0.0, 1.0, 2.0, 1.0],
+                 [15.0, 3.0, -2.0, 10.0, 80.0, -5.0, 2.0, 2.0, 1.0]]
+
+#PURPOSE        Return whether Maya, not the stand-in, can be imported
+#PROCEDURE      The stand-in has no maya.api, so importing OpenMaya tells them apart
+#PRESUMPTIONS   None
+def IsMayaAvailable():
+    try:
+        import maya.api.OpenMaya
+    except ImportError:
+        return False
+
+    return True
+
+@unittest.skipIf(ReturnNumpy() is None, "NumPy is not installed")
+class SolveOriginArraysTest(unittest.TestCase):
+    def testZeroOrigin(self):
+        solved = SolveOriginArrays(ORIGIN_VALUES, True)
+
+        for row in solved.tolist():
+            self.assertEqual(row, [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0])
+
+    def testShiftOrigin(self):
+        solved = SolveOriginArrays(ORIGIN_VALUES, False)
+
+        self.assertEqual(solved.tolist(), [[0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0],
+                                           [2.0, 1.0, 0.0, 5.0, 5.0, 0.0, 1.0, 2.0, 1.0],
+                                           [5.0, 3.0, 2.0, 10.0, -10.0, -5.0, 2.0, 2.0, 1.0]])
+
+    def testInputIsNotChanged(self):
+        values = ReturnNumpy().array(ORIGIN_VALUES)
+
+        SolveOriginArrays(values, True)
+        SolveOriginArrays(values, False)
+
+        self.assertEqual(values.tolist(), ORIGIN_VALUES)
+
+    def testFrameArray(self):
+        self.assertEqual(ReturnFrameArray(5, 8).tolist(), [5.0, 6.0, 7.0, 8.0])
+
+@unittest.skipIf(ReturnNumpy() is None or not IsMayaAvailable(), "needs Maya and NumPy")
+class VerifyOriginArraySolveTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import maya.standalone
+        maya.standalone.initialize()
+
+    def setUp(self):
+        import maya.cmds as cmds
+
+        cmds.file(new = True, force = True)
+
+        self.origin = cmds.joint(name = "root", position = (0, 0, 0))
+        cmds.addAttr(self.origin, longName = "origin", attributeType = "bool")
+        cmds.setAttr(self.origin + ".origin", True)
+        cmds.joint(name = "hip", position = (0, 10, 0))
+
+        for frame, values in zip([1, 10, 20], ORIGIN_VALUES):
+            for channel, value in zip(["tx", "ty", "tz", "rx", "ry", "rz", "sx", "sy", "sz"], values):
+                cmds.setKeyframe(self.origin, attribute = channel, time = frame, value = value)
+
+    def RunVerify(self, zeroOrigin):
+        import FBXAnimationExporter
+
+        exportRig = FBXAnimationExporter.CopyAndConnectSkeleton(self.origin)
+
+        try:
+            return FBXAnimationExporter.VerifyOriginArraySolve(self.origin, exportRig[-1], 1, 20, zeroOrigin)
+        finally:
+            FBXAnimationExporter.ClearGarbage()
+            FBXAnimationExporter.InvalidateExportRig()
+
+    def testZeroOriginMatchesAnimLayer(self):
+        match, maxError = self.RunVerify(True)
+        self.assertTrue(match, "array solve is off by " + str(maxError))
+
+    def testShiftOriginMatchesAnimLayer(self):
+        match, maxError = self.RunVerify(False)
+        self.assertTrue(match, "array solve is off by " + str(maxError))
+
+if __name__ == "__main__":
+    unittest.main()
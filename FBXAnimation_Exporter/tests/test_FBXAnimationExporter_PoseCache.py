@@ -0,0 +1,139 @@
+#Round trip tests of the pose cache format of WritePoseCache and PoseCache. The expected file is packed here
+#from the layout described at POSE_CACHE_HEADER, so reading runs with and without NumPy, and writing, which
+#needs NumPy, must produce the same bytes:
+#
+#   python -m pytest FBXAnimation_Exporter/tests
+
+import os
+import sys
+import shutil
+import struct
+import tempfile
+import unittest
+import unittest.mock
+
+EXPORTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if EXPORTER_DIR not in sys.path:
+    sys.path.insert(0, EXPORTER_DIR)
+
+import FBXAnimationExporter_Core
+from FBXAnimationExporter_Core import (ReturnNumpy, WritePoseCache, ReadPoseCache, POSE_CACHE_MAGIC, POSE_CACHE_VERSION,
+                                       POSE_CACHE_CHANNELS, POSE_CACHE_ALIGNMENT)
+
+JOINT_NAMES = ["root", "hip", "spine", "l_leg"]
+PARENTS = [-1, 0, 1, 1]
+ROTATE_ORDERS = [0, 0, 3, 5]
+JOINT_ORIENTS = [[0.0, 0.0, 0.0], [0.5, 0.0, 0.0], [0.0, -0.25, 0.0], [0.0, 0.0, 1.5]]
+START_FRAME = 10.0
+FRAME_RATE = 30.0
+FRAME_COUNT = 5
+
+#Frames x joints x channels, values float32 holds exactly
+FRAMES = [[[frame + joint * 0.5 + channel * 0.25 for channel in range(POSE_CACHE_CHANNELS)]
+           for joint in range(len(JOINT_NAMES))]
+          for frame in range(FRAME_COUNT)]
+
+#PURPOSE        Pack a pose cache file the way POSE_CACHE_HEADER describes it
+#PROCEDURE      88 byte header, then names, parents, rotate orders, joint orients and frames. Every block after the
+#               names starts on POSE_CACHE_ALIGNMENT
+#PRESUMPTIONS   Arguments as in WritePoseCache, frames as nested lists
+def PackPoseCache(jointNames, parents, rotateOrders, jointOrients, frames, startFrame, frameRate):
+    jointCount = len(jointNames)
+    names = "\n".join(jointNames).encode("utf-8")
+    orients = [value for curOrient in jointOrients for value in curOrient]
+    values = [value for curFrame in frames for curJoint in curFrame for value in curJoint]
+    blocks = [names,
+              struct.pack("<" + str(jointCount) + "i", *parents),
+              struct.pack("<" + str(jointCount) + "i", *rotateOrders),
+              struct.pack("<" + str(3 * jointCount) + "f", *orients)]
+
+    offsets = []
+    data = b""
+    offset = 88
+
+    for curBlock in blocks:
+        offsets.append(offset)
+        data += curBlock + b"\0" * (-(offset + len(curBlock)) % 64)
+        offset = 88 + len(data)
+
+    offsets.append(offset)
+
+    header = struct.pack("<8sIIIIdd6Q", POSE_CACHE_MAGIC, POSE_CACHE_VERSION, jointCount, len(frames),
+                         POSE_CACHE_CHANNELS, startFrame, frameRate, *(offsets + [len(names)]))
+
+    return header + data + struct.pack("<" + str(len(values)) + "f", *values)
+
+class PoseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "heroRun.posecache")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, True)
+
+    def WriteExpected(self, path = None):
+        with open(path or self.path, "wb") as cacheFile:
+            cacheFile.write(PackPoseCache(JOINT_NAMES, PARENTS, ROTATE_ORDERS, JOINT_ORIENTS, FRAMES, START_FRAME,
+                                          FRAME_RATE))
+
+    def AssertReadsBack(self):
+        with ReadPoseCache(self.path) as cache:
+            self.assertEqual(cache.jointNames, JOINT_NAMES)
+            self.assertEqual(cache.parents, PARENTS)
+            self.assertEqual(cache.rotateOrders, ROTATE_ORDERS)
+            self.assertEqual([list(curOrient) for curOrient in cache.jointOrients], JOINT_ORIENTS)
+            self.assertEqual((cache.jointCount, cache.frameCount, cache.channelCount),
+                             (len(JOINT_NAMES), FRAME_COUNT, POSE_CACHE_CHANNELS))
+            self.assertEqual((cache.startFrame, cache.endFrame, cache.frameRate),
+                             (START_FRAME, START_FRAME + FRAME_COUNT - 1, FRAME_RATE))
+            self.assertEqual(cache.framesOffset % POSE_CACHE_ALIGNMENT, 0)
+
+            for index in range(FRAME_COUNT):
+                frame = cache.Frame(index)
+                values = frame.tolist() if hasattr(frame, "tolist") else list(frame)
+                expected = FRAMES[index] if getattr(frame, "ndim", 1) == 2 else sum(FRAMES[index], [])
+                self.assertEqual(values, expected)
+
+            self.assertEqual(cache.JointIndex("spine"), 2)
+            self.assertRaises(IndexError, cache.Frame, FRAME_COUNT)
+
+    def testReadWithoutNumpy(self):
+        self.WriteExpected()
+
+        with unittest.mock.patch.dict(FBXAnimationExporter_Core._numpy, {"module": None}):
+            self.AssertReadsBack()
+
+    @unittest.skipIf(ReturnNumpy() is None, "NumPy is not installed")
+    def testReadWithNumpy(self):
+        self.WriteExpected()
+        self.AssertReadsBack()
+
+    @unittest.skipIf(ReturnNumpy() is None, "NumPy is not installed")
+    def testWriteMatchesLayout(self):
+        WritePoseCache(self.path, JOINT_NAMES, PARENTS, ROTATE_ORDERS, JOINT_ORIENTS, FRAMES, START_FRAME, FRAME_RATE)
+
+        expectedPath = self.path + ".expected"
+        self.WriteExpected(expectedPath)
+
+        with open(self.path, "rb") as cacheFile, open(expectedPath, "rb") as expectedFile:
+            self.assertEqual(cacheFile.read(), expectedFile.read())
+
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted([os.path.basename(self.path), os.path.basename(expectedPath)]))
+
+    @unittest.skipIf(ReturnNumpy() is None, "NumPy is not installed")
+    def testWriteReplacesOldCache(self):
+        WritePoseCache(self.path, JOINT_NAMES[:1], PARENTS[:1], ROTATE_ORDERS[:1], JOINT_ORIENTS[:1],
+                       [curFrame[:1] for curFrame in FRAMES], 0.0, 24.0)
+        WritePoseCache(self.path, JOINT_NAMES, PARENTS, ROTATE_ORDERS, JOINT_ORIENTS, FRAMES, START_FRAME, FRAME_RATE)
+
+        self.AssertReadsBack()
+
+    def testRejectsOtherFiles(self):
+        with open(self.path, "wb") as cacheFile:
+            cacheFile.write(b"not a pose cache" * 8)
+
+        self.assertRaises(ValueError, ReadPoseCache, self.path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+#Tests of the export node settings record. The record parsing of the core runs in a plain interpreter, reading
+#and migrating export nodes runs on the stand-in maya.cmds and is skipped under mayapy, where installing the
+#stand-in would replace the real maya.cmds:
+#
+#   python -m pytest FBXAnimation_Exporter/tests
+
+import os
+import sys
+import json
+import unittest
+
+EXPORTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if EXPORTER_DIR not in sys.path:
+    sys.path.insert(0, EXPORTER_DIR)
+
+from FBXAnimationExporter_Core import (ReturnDefaultExportSettings, ParseExportSettings, FormatExportSettings,
+                                       ParseLegacyAnimLayerSettings, ReturnExportFileName, ReturnPoseCacheFileName,
+                                       EXPORT_SETTINGS_DEFAULTS, EXPORT_SETTINGS_VERSION)
+
+#PURPOSE        Return whether the real maya.cmds, not the stand-in, can be imported
+#PROCEDURE      The stand-in module carries standInCommands
+#PRESUMPTIONS   None
+def IsMayaAvailable():
+    try:
+        import maya.cmds
+    except ImportError:
+        return False
+
+    return not hasattr(maya.cmds, "standInCommands")
+
+class ParseExportSettingsTest(unittest.TestCase):
+    def testUnreadableRecordsGiveDefaults(self):
+        for record in [None, "", "not json", "[1, 2]", "3"]:
+            self.assertEqual(ParseExportSettings(record), ReturnDefaultExportSettings())
+
+    def testDefaultsAreCopied(self):
+        settings = ReturnDefaultExportSettings()
+        settings["animLayers"].append({"name": "L1", "mute": False, "solo": False})
+
+        self.assertEqual(EXPORT_SETTINGS_DEFAULTS["animLayers"], [])
+        self.assertEqual(ReturnDefaultExportSettings()["animLayers"], [])
+
+    def testTypesAreCoerced(self):
+        settings = ParseExportSettings(json.dumps({"export": 1,
+                                                   "exportName": 12,
+                                                   "useSubRange": "",
+                                                   "startFrame": 5,
+                                                   "endFrame": "20.5",
+                                                   "moveToOrigin": None,
+                                                   "animLayers": [{"name": "L1", "mute": 1}]}))
+
+        self.assertIs(settings["export"], True)
+        self.assertEqual(settings["exportName"], "12")
+        self.assertIs(settings["useSubRange"], False)
+        self.assertEqual((settings["startFrame"], settings["endFrame"]), (5.0, 20.5))
+        self.assertIsInstance(settings["startFrame"], float)
+        self.assertIs(settings["moveToOrigin"], False)
+        self.assertEqual(settings["animLayers"], [{"name": "L1", "mute": True, "solo": False}])
+
+    def testUnknownKeysAreDropped(self):
+        settings = ParseExportSettings(json.dumps({"version": EXPORT_SETTINGS_VERSION + 1, "exportName": "run",
+                                                   "newSetting": True}))
+
+        self.assertEqual(sorted(settings), sorted(EXPORT_SETTINGS_DEFAULTS))
+        self.assertEqual(settings["exportName"], "run")
+
+    def testFormatRoundTrip(self):
+        settings = ReturnDefaultExportSettings()
+        settings.update({"export": True, "exportName": "heroRun", "startFrame": 3.0,
+                         "animLayers": [{"name": "L1", "mute": False, "solo": True}]})
+
+        record = FormatExportSettings(settings)
+
+        self.assertEqual(json.loads(record)["version"], EXPORT_SETTINGS_VERSION)
+        self.assertEqual(ParseExportSettings(record), settings)
+
+class ParseLegacyAnimLayerSettingsTest(unittest.TestCase):
+    def testMuteAndSoloAreReadFromTheirOwnFields(self):
+        animLayers = ParseLegacyAnimLayerSettings("BaseAnimation, mute = False, solo = False;"
+                                                  "L1, mute = True, solo = False;"
+                                                  "L2, mute = False, solo = True;")
+
+        self.assertEqual(animLayers, [{"name": "BaseAnimation", "mute": False, "solo": False},
+                                      {"name": "L1", "mute": True, "solo": False},
+                                      {"name": "L2", "mute": False, "solo": True}])
+
+    def testBrokenEntriesAreSkipped(self):
+        self.assertEqual(ParseLegacyAnimLayerSettings(None), [])
+        self.assertEqual(ParseLegacyAnimLayerSettings(";L1;, mute = True, solo = True;"), [])
+
+class ExportFileNameTest(unittest.TestCase):
+    def testExtensions(self):
+        self.assertIsNone(ReturnExportFileName(""))
+        self.assertEqual(ReturnExportFileName("heroRun"), "heroRun.fbx")
+        self.assertEqual(ReturnExportFileName("heroRun.FBX"), "heroRun.FBX")
+        self.assertEqual(ReturnPoseCacheFileName("heroRun"), "heroRun.posecache")
+        self.assertIsNone(ReturnPoseCacheFileName(""))
+
+@unittest.skipIf(IsMayaAvailable(), "runs on the stand-in, not inside Maya")
+class ExportNodeSettingsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import FBXAnimationExporter_StandIn
+        FBXAnimationExporter_StandIn.InstallStandIn()
+
+    def setUp(self):
+        import maya.cmds as cmds
+        import FBXAnimationExporter
+
+        self.cmds = cmds
+        self.exporter = FBXAnimationExporter
+
+        cmds.file(new = True, force = True)
+
+        #An export node of an older version, one attribute per setting, one of them locked
+        self.exportNode = cmds.group(empty = True, name = "heroFBXExportNode1")
+
+        for attr, attrType in [("export", "bool"), ("useSubRange", "bool"), ("startFrame", "float"), ("endFrame", "float")]:
+            cmds.addAttr(self.exportNode, longName = attr, at = attrType)
+
+        for attr in ["exportName", "animLayers"]:
+            cmds.addAttr(self.exportNode, longName = attr, dt = "string")
+
+        cmds.addAttr(self.exportNode, longName = "exportMeshes", at = "message")
+        cmds.addAttr(self.exportNode, shortName = "xnd", longName = "exportNode", at = "message")
+
+        cmds.setAttr(self.exportNode + ".export", True)
+        cmds.setAttr(self.exportNode + ".exportName", "heroRun", type = "string")
+        cmds.setAttr(self.exportNode + ".useSubRange", True)
+        cmds.setAttr(self.exportNode + ".startFrame", 3.0)
+        cmds.setAttr(self.exportNode + ".endFrame", 7.0)
+        cmds.setAttr(self.exportNode + ".animLayers", "L1, mute = True, solo = False;", type = "string")
+        cmds.setAttr(self.exportNode + ".export", lock = True)
+
+        self.legacyAttrs = cmds.listAttr(self.exportNode, userDefined = True)
+
+    def AssertLegacySettings(self, settings):
+        self.assertTrue(settings["export"])
+        self.assertEqual(settings["exportName"], "heroRun")
+        self.assertEqual((settings["useSubRange"], settings["startFrame"], settings["endFrame"]), (True, 3.0, 7.0))
+        self.assertEqual(settings["animLayers"], [{"name": "L1", "mute": True, "solo": False}])
+
+    def testReadDoesNotMigrate(self):
+        self.AssertLegacySettings(self.exporter.ReadExportNodeSettings(self.exportNode))
+        self.AssertLegacySettings(self.exporter.LoadAllExportNodeSettings()[self.exportNode])
+
+        self.assertEqual(self.cmds.listAttr(self.exportNode, userDefined = True), self.legacyAttrs)
+
+    def testMigrateDeletesOldAttributes(self):
+        self.AssertLegacySettings(self.exporter.MigrateExportNodeSettings(self.exportNode))
+
+        self.assertEqual(sorted(self.cmds.listAttr(self.exportNode, userDefined = True)),
+                         ["exportMeshes", "exportNode", "fbxSettings"])
+        self.AssertLegacySettings(self.exporter.ReadExportNodeSettings(self.exportNode))
+
+    def testWriteMigrates(self):
+        settings = self.exporter.WriteExportNodeSettings(self.exportNode, {"endFrame": 9.0})
+
+        self.assertEqual((settings["exportName"], settings["startFrame"], settings["endFrame"]), ("heroRun", 3.0, 9.0))
+        self.assertNotIn("exportName", self.cmds.listAttr(self.exportNode, userDefined = True))
+        self.assertEqual(self.exporter.ReadExportNodeSettings(self.exportNode), settings)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#Tests of ExportTransaction against the stand-in maya.cmds, see FBXAnimationExporter_StandIn.
+#They need no Maya and are skipped under mayapy, where installing the stand-in would replace the real maya.cmds:
+#
+#   python -m pytest FBXAnimation_Exporter/tests
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+EXPORTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if EXPORTER_DIR not in sys.path:
+    sys.path.insert(0, EXPORTER_DIR)
+
+#PURPOSE        Return whether the real maya.cmds, not the stand-in, can be imported
+#PROCEDURE      The stand-in module carries standInCommands
+#PRESUMPTIONS   None
+def IsMayaAvailable():
+    try:
+        import maya.cmds
+    except ImportError:
+        return False
+
+    return not hasattr(maya.cmds, "standInCommands")
+
+@unittest.skipIf(IsMayaAvailable(), "runs on the stand-in, not inside Maya")
+class ExportTransactionTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import FBXAnimationExporter_StandIn
+        FBXAnimationExporter_StandIn.InstallStandIn()
+
+    def setUp(self):
+        import maya.cmds as cmds
+        import FBXAnimationExporter
+
+        self.cmds = cmds
+        self.exporter = FBXAnimationExporter
+        self.workspace = tempfile.mkdtemp()
+
+        cmds.file(new = True, force = True)
+        cmds.undoInfo(state = True)
+        cmds.workspace(self.workspace, openWorkspace = True)
+
+        self.origin = cmds.createNode("joint", name = "hero:root")
+        cmds.addAttr(self.origin, longName = "origin", at = "bool")
+        cmds.setAttr(self.origin + ".origin", True)
+        cmds.createNode("joint", name = "hero:hip", parent = self.origin)
+
+        self.prop = cmds.createNode("transform", name = "prop")
+
+        exportNode = FBXAnimationExporter.CreateFBXExportNode("hero")
+        FBXAnimationExporter.ConnectFBXExportNodeToOrigin(exportNode, self.origin)
+        FBXAnimationExporter.WriteExportNodeSettings(exportNode, {"exportName": "heroModel"})
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace, True)
+
+    #An artist's edit in its own undo chunk, the last thing on the undo queue
+    def MoveProp(self, value):
+        self.cmds.undoInfo(openChunk = True, chunkName = "moveProp")
+        self.cmds.setAttr(self.prop + ".translateX", value)
+        self.cmds.undoInfo(closeChunk = True)
+
+    def testSkippedExportKeepsPriorEdit(self):
+        self.exporter.ExportFBXCharacter(None)
+        self.MoveProp(5.0)
+
+        results = self.exporter.ExportFBXCharacter(None, transaction = True)
+
+        self.assertEqual([result["result"] for result in results], ["skipped"])
+        self.assertEqual(self.cmds.getAttr(self.prop + ".translateX"), 5.0)
+
+        self.cmds.undo()
+        self.assertEqual(self.cmds.getAttr(self.prop + ".translateX"), 0.0)
+
+    def testExportIsRolledBack(self):
+        self.MoveProp(5.0)
+        self.cmds.select(self.prop)
+
+        results = self.exporter.ExportFBXCharacter(None, transaction = True)
+
+        self.assertEqual([result["result"] for result in results], ["exported"])
+        self.assertEqual(self.cmds.ls(selection = True), ["prop"])
+        self.assertEqual(self.cmds.getAttr(self.prop + ".translateX"), 5.0)
+
+if __name__ == "__main__":
+    unittest.main()
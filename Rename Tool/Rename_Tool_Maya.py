@@ -1,40 +1,316 @@
+import maya.cmds as cmds
+import re
+
+import Rename_Tool_Rules as rules
+
+#Maya node names: a letter or underscore, then letters, digits and underscores, namespaces end in ':'
+VALID_NAME = re.compile(r'^([A-Za-z_][A-Za-z0-9_]*:)*[A-Za-z_][A-Za-z0-9_]*$')
+
+#Preview lines added per idle event, see previewRules
+PREVIEW_PAGE_SIZE = 500
+
+#Preview being streamed into the UI: {'id', 'pages', 'count'}
+_preview = {'id':0}
+
 #Create GUI
 def Rename_Tool():
     windowName='RenameScriptWindow'
     windowTitle='Rename Tool 1.0'
-    
+
     try:
         cmds.deleteUI(windowName)
     except:
         pass
     cmds.window(windowName,title=windowTitle)
     cmds.columnLayout(adj=True)
-   
+
     cmds.rowLayout(numberOfColumns=2,columnWidth2=(75,150),adj=2)
     cmds.text(l='name:')
     cmds.textField('renameTF')
     cmds.setParent('..')
-   
+
     cmds.rowLayout(numberOfColumns=3,columnWidth3=(75,100,100))
     cmds.text(l='S&P:')
     cmds.textField('paddingTF',tx='1,3')
-    cmds.checkBox(l='remove suffix')
+    cmds.checkBox('removeSuffixCB',l='remove suffix')
     cmds.setParent('..')
-   
-    cmds.button(l='Rename',h=50,c='renewName()')   
-    
+
+    cmds.button(l='Rename',h=50,c='renewName()')
+
+    cmds.frameLayout(l='Rules',collapsable=True,collapse=True)
+    cmds.columnLayout(adj=True)
+
+    cmds.rowLayout(numberOfColumns=3,columnWidth3=(75,150,75),adj=2)
+    cmds.text(l='search:')
+    cmds.textField('searchTF')
+    cmds.checkBox('regexCB',l='regex')
+    cmds.setParent('..')
+
+    cmds.rowLayout(numberOfColumns=2,columnWidth2=(75,150),adj=2)
+    cmds.text(l='replace:')
+    cmds.textField('replaceTF')
+    cmds.setParent('..')
+
+    cmds.rowLayout(numberOfColumns=4,columnWidth4=(75,75,75,75))
+    cmds.text(l='prefix:')
+    cmds.textField('prefixTF')
+    cmds.text(l='suffix:')
+    cmds.textField('suffixTF')
+    cmds.setParent('..')
+
+    cmds.rowLayout(numberOfColumns=3,columnWidth3=(75,100,100))
+    cmds.text(l='counter:')
+    cmds.checkBox('counterCB',l='S&P, # in name')
+    cmds.checkBox('perTypeCB',l='per type')
+    cmds.setParent('..')
+
+    cmds.rowLayout(numberOfColumns=3,columnWidth3=(75,100,125),adj=3)
+    cmds.text(l='nodes:')
+    cmds.optionMenu('scopeOM')
+    cmds.menuItem(l='selection')
+    cmds.menuItem(l='namespace')
+    cmds.menuItem(l='ls pattern')
+    cmds.textField('scopeTF')
+    cmds.setParent('..')
+
+    cmds.rowLayout(numberOfColumns=2,columnWidth2=(150,150),adj=2)
+    cmds.button(l='Preview',c='previewRules()')
+    cmds.button(l='Rename with rules',c='applyRules()')
+    cmds.setParent('..')
+
+    cmds.textScrollList('previewTSL',h=200)
+    cmds.setParent('..')
+    cmds.setParent('..')
+
     cmds.window(windowName,e=True,w=300,h=1)
     cmds.showWindow(windowName)
-   
+
+#Rename the selection from the UI: plan every name first, rename nothing if any of them clashes
 def renewName():
-    list_sel=cmds.ls(sl=True)
+    list_sel=cmds.ls(sl=True,long=True)
     str_input=cmds.textField('renameTF',q=True,tx=True)
-    
+    bool_removeSuffix=cmds.checkBox('removeSuffixCB',q=True,v=True)
+
     str_padding=cmds.textField('paddingTF',q=True,tx=True)
     str_starting,str_padding=str_padding.split(',')
-    
-    str_number=str_starting.zfill(int(str_padding))
-    
-    for name_1 in list_sel:
-        cmds.rename(name_1,str_input+str_number)
-        str_number=str(int(str_number)+1).zfill(int(str_padding))
\ No newline at end of file
+
+    list_plan=planRename(list_sel,str_input,int(str_starting),int(str_padding),bool_removeSuffix)
+    list_problems=[entry for entry in list_plan if entry['status'] not in ('rename','unchanged')]
+
+    if list_problems:
+        for entry in list_problems:
+            print(entry['path']+' -> '+entry['newName']+': '+entry['status'])
+        cmds.warning('Nothing renamed, '+str(len(list_problems))+' of '+str(len(list_plan))+' names can not be used, see the script editor')
+        return 0
+
+    return applyRenamePlan(list_plan)
+
+#Index every node name once: leaf name -> {long name: parent long name, or None for a DG node}
+def buildNameIndex():
+    dict_index={}
+
+    for path in cmds.ls(long=True) or []:
+        str_parent,str_sep,str_leaf=path.rpartition('|')
+        dict_index.setdefault(str_leaf,{})[path]=str_parent if str_sep else None
+
+    return dict_index
+
+#Return the nodes already holding name that a node under parent would clash with.
+#A DG node clashes with every node of that name, a DAG node with its siblings and DG nodes
+def returnNameOwners(dict_index,name,parent):
+    dict_owners=dict_index.get(name,{})
+
+    if parent is None:
+        return list(dict_owners)
+
+    return [path for path,owner_parent in dict_owners.items() if owner_parent is None or owner_parent==parent]
+
+#Work out the new name of every node without renaming anything.
+#baseName replaces the name, numbered from start with padding digits, an empty baseName keeps the current name.
+#removeSuffixes strips the last _token of a node's own name, so it only applies without a baseName.
+#The namespace of a node is kept, see rules.legacyRules
+def planRename(nodes,baseName,start=1,padding=3,removeSuffixes=False):
+    ruleSet=rules.RenameRules(rules.legacyRules(baseName,start,padding,removeSuffixes))
+    return planRenameNames(ruleSet.stream((path,None) for path in nodes))
+
+#Check (long name, old leaf name, new leaf name) renames against the scene, one ls for the name index and
+#one each for the UUIDs and referenced nodes.
+#Each entry gets a status: 'rename', 'unchanged', 'invalid', 'referenced', 'collision' with a node that is
+#not renamed, or 'duplicate' when an earlier node of the plan gets the same name.
+#'vacate' is set when another node of the plan takes the current name, see applyRenamePlan
+def planRenameNames(renames):
+    dict_index=buildNameIndex()
+    list_plan=[]
+
+    for path,str_oldName,str_newName in renames:
+        str_parent,str_sep,str_leaf=path.rpartition('|')
+
+        list_plan.append({'path':path,
+                          'parent':str_parent if str_sep else None,
+                          'oldName':str_oldName,
+                          'newName':str_newName,
+                          'depth':path.count('|'),
+                          'vacate':False})
+
+    list_paths=[entry['path'] for entry in list_plan]
+    list_uuids=(cmds.ls(list_paths,uuid=True) or []) if list_paths else []
+
+    if len(list_uuids)!=len(list_paths):
+        list_uuids=[(cmds.ls(path,uuid=True) or [None])[0] for path in list_paths]
+
+    set_referenced=set((cmds.ls(list_paths,long=True,referencedNodes=True) or []) if list_paths else [])
+
+    for entry,uuid in zip(list_plan,list_uuids):
+        entry['uuid']=uuid
+
+    dict_moving=dict((entry['path'],entry) for entry in list_plan if entry['newName']!=entry['oldName'])
+    dict_taken={}
+
+    for entry in list_plan:
+        owners=returnNameOwners(dict_index,entry['newName'],entry['parent'])
+        set_parents=dict_taken.setdefault(entry['newName'],set())
+
+        if entry['newName']==entry['oldName']:
+            entry['status']='unchanged'
+        elif not VALID_NAME.match(entry['newName']):
+            entry['status']='invalid'
+        elif entry['path'] in set_referenced:
+            entry['status']='referenced'
+        elif entry['parent'] in set_parents or None in set_parents or (entry['parent'] is None and set_parents):
+            entry['status']='duplicate'
+        elif [owner for owner in owners if owner not in dict_moving]:
+            entry['status']='collision'
+        else:
+            entry['status']='rename'
+
+            for owner in owners:
+                dict_moving[owner]['vacate']=True
+
+        set_parents.add(entry['parent'])
+
+    return list_plan
+
+#Rename the 'rename' entries of a plan from planRename as one undo step.
+#Children go before their parents and every node is found by its UUID, so no path goes stale.
+#Nodes whose name another node of the plan takes get a temporary name first, so names can be swapped
+def applyRenamePlan(plan):
+    list_entries=[entry for entry in plan if entry['status']=='rename']
+    list_entries.sort(key=lambda entry:entry['depth'],reverse=True)
+
+    int_renamed=0
+    cmds.undoInfo(openChunk=True,chunkName='Rename Tool')
+
+    try:
+        for index,entry in enumerate(list_entries):
+            if entry['vacate']:
+                cmds.rename(returnPlanNode(entry),'renameToolSwap'+str(index))
+
+        for entry in list_entries:
+            str_result=cmds.rename(returnPlanNode(entry),entry['newName'])
+            entry['result']=str_result.rpartition('|')[2]
+            int_renamed+=1
+
+            if entry['result']!=entry['newName']:
+                cmds.warning(entry['path']+' was renamed to '+entry['result']+' instead of '+entry['newName'])
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    return int_renamed
+
+#Current long name of a plan entry, found by UUID, by its planned path for nodes without one
+def returnPlanNode(entry):
+    if entry['uuid']:
+        list_found=cmds.ls(entry['uuid'],long=True)
+
+        if list_found:
+            return list_found[0]
+
+    return entry['path']
+
+#Nodes the rules run on, as (long name, node type): the selection, every node of a namespace or an ls pattern
+def returnRuleNodes(scope,text):
+    if scope=='namespace':
+        return rules.pairNodeTypes(cmds.ls(text.strip(':')+':*',long=True,showType=True) or [])
+
+    if scope=='ls pattern':
+        return rules.pairNodeTypes((cmds.ls(text.split(),long=True,showType=True) or []) if text.strip() else [])
+
+    return rules.pairNodeTypes(cmds.ls(sl=True,long=True,showType=True) or [])
+
+#Build the rules from the UI: search and replace, prefix, suffix, then the counter
+def returnUIRules():
+    list_rules=[]
+    str_search=cmds.textField('searchTF',q=True,tx=True)
+
+    if str_search:
+        list_rules.append(rules.replaceRule(str_search,cmds.textField('replaceTF',q=True,tx=True),
+                                            cmds.checkBox('regexCB',q=True,v=True)))
+
+    str_prefix=cmds.textField('prefixTF',q=True,tx=True)
+    str_suffix=cmds.textField('suffixTF',q=True,tx=True)
+
+    if str_prefix:
+        list_rules.append(rules.prefixRule(str_prefix))
+
+    if str_suffix:
+        list_rules.append(rules.suffixRule(str_suffix))
+
+    if cmds.checkBox('counterCB',q=True,v=True):
+        str_starting,str_padding=cmds.textField('paddingTF',q=True,tx=True).split(',')
+        list_rules.append(rules.counterRule(int(str_starting),int(str_padding),cmds.checkBox('perTypeCB',q=True,v=True)))
+
+    return rules.RenameRules(list_rules)
+
+#Stream the renames the rules would make into the preview list, a page per idle event so Maya stays usable.
+#Starting a new preview drops the one still streaming
+def previewRules():
+    ruleSet=returnUIRules()
+    nodes=returnRuleNodes(cmds.optionMenu('scopeOM',q=True,v=True),cmds.textField('scopeTF',q=True,tx=True))
+
+    _preview['id']+=1
+    _preview['pages']=rules.pages(ruleSet.stream(nodes),PREVIEW_PAGE_SIZE)
+    _preview['count']=0
+
+    cmds.textScrollList('previewTSL',e=True,removeAll=True)
+    previewNextPage(_preview['id'])
+
+#Add the next page of the preview and queue the one after it
+def previewNextPage(previewId):
+    if previewId!=_preview['id'] or not cmds.textScrollList('previewTSL',exists=True):
+        return
+
+    list_page=next(_preview['pages'],None)
+
+    if list_page is None:
+        print('Preview done, '+str(_preview['count'])+' nodes')
+        return
+
+    list_lines=[path.rpartition('|')[2]+'  ->  '+str_newName for path,str_leaf,str_newName in list_page]
+    cmds.textScrollList('previewTSL',e=True,append=list_lines)
+    _preview['count']+=len(list_page)
+
+    cmds.evalDeferred(lambda:previewNextPage(previewId),lowestPriority=True)
+
+#Rename with the rules in bulk: plan every name, rename nothing if any of them clashes, else apply the plan
+#as one undo step. Prints how long planning and applying took
+def applyRules():
+    _preview['id']+=1
+    dict_times={}
+
+    with rules.timedPhase(dict_times,'plan'):
+        ruleSet=returnUIRules()
+        nodes=returnRuleNodes(cmds.optionMenu('scopeOM',q=True,v=True),cmds.textField('scopeTF',q=True,tx=True))
+        list_plan=planRenameNames(ruleSet.stream(nodes))
+        list_problems=[entry for entry in list_plan if entry['status'] not in ('rename','unchanged')]
+
+    if list_problems:
+        for entry in list_problems:
+            print(entry['path']+' -> '+entry['newName']+': '+entry['status'])
+        cmds.warning('Nothing renamed, '+str(len(list_problems))+' of '+str(len(list_plan))+' names can not be used, see the script editor')
+        return 0
+
+    with rules.timedPhase(dict_times,'apply'):
+        int_renamed=applyRenamePlan(list_plan)
+
+    print(rules.formatPhaseTimes(dict_times,int_renamed,len(list_plan)))
+    return int_renamed
@@ -0,0 +1,138 @@
+#Rename rules for Rename Tool. No Maya in here, so rules can be tried out in a plain interpreter.
+#A rule is a function (name, nodeType, counters) -> new name. Rules run in order on the name without its
+#namespace, counters is a dict the counter rules keep their next number in for the length of one run.
+import re
+import time
+import itertools
+import contextlib
+
+#Run of '#' a counter rule puts its number in, 'arm_###' -> 'arm_001'
+COUNTER_TOKEN = re.compile(r'#+')
+
+#Replace search with replace. With regex search is a regular expression and replace may use its groups
+#as \1 or \g<name>, else both are plain text
+def replaceRule(search,replace,regex=False,ignoreCase=False):
+    if not search:
+        raise ValueError('Nothing to search for')
+
+    flags=re.IGNORECASE if ignoreCase else 0
+    pattern=re.compile(search if regex else re.escape(search),flags)
+
+    if regex:
+        def rule(name,nodeType,counters):
+            return pattern.sub(replace,name)
+    else:
+        def rule(name,nodeType,counters):
+            return pattern.sub(lambda match:replace,name)
+
+    return rule
+
+def prefixRule(prefix):
+    def rule(name,nodeType,counters):
+        return prefix+name
+    return rule
+
+def suffixRule(suffix):
+    def rule(name,nodeType,counters):
+        return name+suffix
+    return rule
+
+#Replace the whole name
+def nameRule(baseName):
+    def rule(name,nodeType,counters):
+        return baseName
+    return rule
+
+#Strip the last _token, 'arm_L_jnt' -> 'arm_L', a name without one is left alone
+def removeSuffixRule():
+    def rule(name,nodeType,counters):
+        str_head,str_sep,str_tail=name.rpartition('_')
+        return str_head or name
+    return rule
+
+#Number the nodes from start. The number goes in the first run of '#' in the name, padded to the
+#longer of padding and the run, or at the end of a name without one. With perType every node type counts
+#on its own
+def counterRule(start=1,padding=3,perType=False):
+    def rule(name,nodeType,counters):
+        key=('counter',nodeType if perType else None)
+        int_number=counters.get(key,start)
+        counters[key]=int_number+1
+
+        match=COUNTER_TOKEN.search(name)
+
+        if not match:
+            return name+str(int_number).zfill(padding)
+
+        str_number=str(int_number).zfill(max(padding,len(match.group(0))))
+        return name[:match.start()]+str_number+name[match.end():]
+    return rule
+
+#The rules of the original tool: removeSuffixes strips the last _token of the node's name, baseName
+#replaces the name and is numbered from start. A typed baseName is kept whole, suffix and all
+def legacyRules(baseName,start=1,padding=3,removeSuffixes=False):
+    list_rules=[]
+
+    if removeSuffixes and not baseName:
+        list_rules.append(removeSuffixRule())
+
+    if baseName:
+        list_rules.append(nameRule(baseName))
+        list_rules.append(counterRule(start,padding))
+
+    return list_rules
+
+#A list of rules applied to node names
+class RenameRules(object):
+    def __init__(self,rules):
+        self.rules=list(rules)
+
+    #New leaf name for leaf, the namespace is kept
+    def newName(self,leaf,nodeType,counters):
+        str_namespace,str_colon,str_name=leaf.rpartition(':')
+
+        for rule in self.rules:
+            str_name=rule(str_name,nodeType,counters)
+
+        return str_namespace+str_colon+str_name
+
+    #Generator of (path, old leaf name, new leaf name) for an iterable of (path, node type).
+    #Nothing is computed before it is asked for, counters start over with every stream
+    def stream(self,nodes):
+        counters={}
+
+        for path,nodeType in nodes:
+            str_leaf=path.rpartition('|')[2]
+            yield path,str_leaf,self.newName(str_leaf,nodeType,counters)
+
+#Pair up a flat [name, type, name, type, ...] list, which is what ls returns with showType
+def pairNodeTypes(flat):
+    iterator=iter(flat)
+    return zip(iterator,iterator)
+
+#Generator of lists of up to size items from iterable
+def pages(iterable,size):
+    iterator=iter(iterable)
+
+    while True:
+        list_page=list(itertools.islice(iterator,size))
+
+        if not list_page:
+            return
+
+        yield list_page
+
+#Add the seconds spent in the with block to times[phase]
+@contextlib.contextmanager
+def timedPhase(times,phase):
+    float_start=time.time()
+
+    try:
+        yield
+    finally:
+        times[phase]=times.get(phase,0.0)+time.time()-float_start
+
+#One line report of a run, 'Renamed 12 of 14 nodes, plan 0.010s, apply 0.200s'
+def formatPhaseTimes(times,renamed,total):
+    str_phases=', '.join(phase+' '+'%.3f' % seconds+'s' for phase,seconds in times.items())
+    return 'Renamed '+str(renamed)+' of '+str(total)+' nodes, '+str_phases
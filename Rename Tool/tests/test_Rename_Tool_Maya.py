@@ -0,0 +1,98 @@
+#Tests of planning and applying renames on the stand-in maya.cmds of FBXAnimation_Exporter. Skipped under
+#mayapy, where installing the stand-in would replace the real maya.cmds:
+#
+#   python -m pytest "Rename Tool/tests"
+import os
+import sys
+import unittest
+
+RENAME_TOOL_DIR=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXPORTER_DIR=os.path.join(os.path.dirname(RENAME_TOOL_DIR),'FBXAnimation_Exporter')
+
+for str_dir in (RENAME_TOOL_DIR,EXPORTER_DIR):
+    if str_dir not in sys.path:
+        sys.path.insert(0,str_dir)
+
+#True when the real maya.cmds, not the stand-in, can be imported
+def isMayaAvailable():
+    try:
+        import maya.cmds
+    except ImportError:
+        return False
+
+    return not hasattr(maya.cmds,'standInCommands')
+
+@unittest.skipIf(isMayaAvailable(),'runs on the stand-in, not inside Maya')
+class PlanRenameTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import FBXAnimationExporter_StandIn
+        FBXAnimationExporter_StandIn.InstallStandIn()
+
+    def setUp(self):
+        import maya.cmds as cmds
+        import Rename_Tool_Maya
+
+        self.cmds=cmds
+        self.tool=Rename_Tool_Maya
+
+        cmds.file(new=True,force=True)
+        cmds.undoInfo(state=True)
+
+        cmds.group(empty=True,name='grp')
+        cmds.createNode('transform',name='arm_jnt',parent='|grp')
+        cmds.createNode('transform',name='leg_jnt',parent='|grp')
+        cmds.createNode('transform',name='hand',parent='|grp|arm_jnt')
+        cmds.createNode('transform',name='other')
+        cmds.createNode('transform',name='hand',parent='|other')
+        cmds.createNode('transform',name='char:root')
+        cmds.standInCommands.scene.references.append({'path':'/assets/char.ma','namespace':'char'})
+
+    #status of each entry of a plan of (long name, new leaf name) renames
+    def returnStatuses(self,list_renames):
+        list_plan=self.tool.planRenameNames((path,path.rpartition('|')[2],str_new) for path,str_new in list_renames)
+        return [entry['status'] for entry in list_plan]
+
+    def testStatuses(self):
+        list_statuses=self.returnStatuses([('|grp|arm_jnt','arm_jnt'),
+                                           ('|grp|leg_jnt','2leg'),
+                                           ('|char:root','char:hips'),
+                                           ('|grp|arm_jnt|hand','arm_jnt'),
+                                           ('|other','grp')])
+        self.assertEqual(list_statuses,['unchanged','invalid','referenced','rename','collision'])
+
+    def testSiblingCollision(self):
+        self.assertEqual(self.returnStatuses([('|grp|leg_jnt','arm_jnt')]),['collision'])
+
+    def testSameNameUnderOtherParents(self):
+        self.assertEqual(self.returnStatuses([('|grp|arm_jnt|hand','palm'),('|other|hand','palm')]),['rename','rename'])
+
+    def testDuplicate(self):
+        self.assertEqual(self.returnStatuses([('|grp|arm_jnt','limb'),('|grp|leg_jnt','limb')]),['rename','duplicate'])
+
+    def testSwapNames(self):
+        str_armUuid=self.cmds.ls('|grp|arm_jnt',uuid=True)[0]
+        list_plan=self.tool.planRenameNames([('|grp|arm_jnt','arm_jnt','leg_jnt'),('|grp|leg_jnt','leg_jnt','arm_jnt')])
+
+        self.assertEqual([(entry['status'],entry['vacate']) for entry in list_plan],[('rename',True),('rename',True)])
+        self.assertEqual(self.tool.applyRenamePlan(list_plan),2)
+        self.assertEqual(self.cmds.ls(str_armUuid,long=True),['|grp|leg_jnt'])
+
+    def testApplyParentAndChild(self):
+        list_plan=self.tool.planRename(['|grp','|grp|arm_jnt','|grp|arm_jnt|hand'],'part_',1,2)
+
+        self.assertEqual([entry['newName'] for entry in list_plan],['part_01','part_02','part_03'])
+        self.assertEqual(self.tool.applyRenamePlan(list_plan),3)
+        self.assertTrue(self.cmds.objExists('|part_01|part_02|part_03'))
+
+        self.cmds.undo()
+        self.assertTrue(self.cmds.objExists('|grp|arm_jnt|hand'))
+
+    def testRemoveSuffix(self):
+        list_plan=self.tool.planRename(['|grp|arm_jnt','|grp|leg_jnt','|other'],'',removeSuffixes=True)
+
+        self.assertEqual([(entry['newName'],entry['status']) for entry in list_plan],
+                         [('arm','rename'),('leg','rename'),('other','unchanged')])
+
+if __name__=='__main__':
+    unittest.main()
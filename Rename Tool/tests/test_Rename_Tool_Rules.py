@@ -0,0 +1,137 @@
+#Tests of the rename rules, the rule streams and the preview pages. No Maya needed:
+#
+#   python -m pytest "Rename Tool/tests"
+import os
+import sys
+import unittest
+
+RENAME_TOOL_DIR=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if RENAME_TOOL_DIR not in sys.path:
+    sys.path.insert(0,RENAME_TOOL_DIR)
+
+import Rename_Tool_Rules as rules
+
+#New leaf names of a list of leaf names, in one stream
+def returnNewNames(list_rules,list_names):
+    ruleSet=rules.RenameRules(list_rules)
+    return [str_new for path,str_old,str_new in ruleSet.stream((name,None) for name in list_names)]
+
+class LegacyRulesTest(unittest.TestCase):
+    def testBaseNameKeepsItsSuffix(self):
+        list_names=returnNewNames(rules.legacyRules('arm_L',1,2,removeSuffixes=True),['joint1','hand_jnt'])
+        self.assertEqual(list_names,['arm_L01','arm_L02'])
+
+    def testRemoveSuffixWithoutBaseName(self):
+        list_names=returnNewNames(rules.legacyRules('',removeSuffixes=True),['arm_L_jnt','spine','ns:leg_R_jnt'])
+        self.assertEqual(list_names,['arm_L','spine','ns:leg_R'])
+
+    def testBaseNameWithoutRemoveSuffix(self):
+        list_names=returnNewNames(rules.legacyRules('arm_',5,3),['ns:joint1','joint2'])
+        self.assertEqual(list_names,['ns:arm_005','arm_006'])
+
+    def testNoRules(self):
+        self.assertEqual(rules.legacyRules(''),[])
+        self.assertEqual(returnNewNames(rules.legacyRules(''),['arm_L_jnt']),['arm_L_jnt'])
+
+class RuleTest(unittest.TestCase):
+    def testReplacePlainText(self):
+        rule=rules.replaceRule('.L','_R')
+        self.assertEqual(rule('arm.L_jntxL',None,{}),'arm_R_jntxL')
+
+    def testReplaceRegexGroups(self):
+        rule=rules.replaceRule(r'(\w+)_(L|R)$',r'\2_\1',regex=True)
+        self.assertEqual(rule('arm_L',None,{}),'L_arm')
+
+    def testReplaceIgnoreCase(self):
+        rule=rules.replaceRule('ARM','leg',ignoreCase=True)
+        self.assertEqual(rule('Arm_arm',None,{}),'leg_leg')
+
+    def testReplaceTextIsNotATemplate(self):
+        rule=rules.replaceRule('arm',r'\1leg')
+        self.assertEqual(rule('arm',None,{}),r'\1leg')
+
+    def testReplaceNeedsSearch(self):
+        self.assertRaises(ValueError,rules.replaceRule,'','x')
+
+    def testPrefixSuffixName(self):
+        self.assertEqual(rules.prefixRule('L_')('arm',None,{}),'L_arm')
+        self.assertEqual(rules.suffixRule('_jnt')('arm',None,{}),'arm_jnt')
+        self.assertEqual(rules.nameRule('leg')('arm',None,{}),'leg')
+
+    def testRemoveSuffix(self):
+        rule=rules.removeSuffixRule()
+        self.assertEqual(rule('arm_L_jnt',None,{}),'arm_L')
+        self.assertEqual(rule('arm',None,{}),'arm')
+        self.assertEqual(rule('_arm',None,{}),'_arm')
+
+    def testCounterToken(self):
+        rule=rules.counterRule(9,2)
+        dict_counters={}
+        self.assertEqual(rule('arm_#_jnt',None,dict_counters),'arm_09_jnt')
+        self.assertEqual(rule('arm_####',None,dict_counters),'arm_0010')
+        self.assertEqual(rule('arm_',None,dict_counters),'arm_11')
+
+    def testCounterPerType(self):
+        rule=rules.counterRule(1,1,perType=True)
+        dict_counters={}
+        list_names=[rule('n',nodeType,dict_counters) for nodeType in ['joint','mesh','joint','joint','mesh']]
+        self.assertEqual(list_names,['n1','n1','n2','n3','n2'])
+
+class RenameRulesTest(unittest.TestCase):
+    def testRulesRunInOrderAndKeepNamespace(self):
+        ruleSet=rules.RenameRules([rules.replaceRule('arm','leg'),rules.prefixRule('L_'),rules.counterRule(1,2)])
+        self.assertEqual(ruleSet.newName('char:sub:arm',None,{}),'char:sub:L_leg01')
+
+    def testStreamLeafNames(self):
+        ruleSet=rules.RenameRules([rules.suffixRule('_grp')])
+        list_renames=list(ruleSet.stream([('|a|b',None),('|a|ns:c',None),('d',None)]))
+        self.assertEqual(list_renames,[('|a|b','b','b_grp'),('|a|ns:c','ns:c','ns:c_grp'),('d','d','d_grp')])
+
+    def testStreamIsLazy(self):
+        list_seen=[]
+
+        def nodes():
+            for index in range(3):
+                list_seen.append(index)
+                yield '|n'+str(index),None
+
+        stream=rules.RenameRules([rules.counterRule()]).stream(nodes())
+        self.assertEqual(list_seen,[])
+        self.assertEqual(next(stream),('|n0','n0','n0001'))
+        self.assertEqual(list_seen,[0])
+
+    def testCountersRestartEveryStream(self):
+        ruleSet=rules.RenameRules([rules.counterRule(1,1)])
+        list_nodes=[('|a',None),('|b',None)]
+        self.assertEqual([str_new for path,str_old,str_new in ruleSet.stream(list_nodes)],['a1','b2'])
+        self.assertEqual([str_new for path,str_old,str_new in ruleSet.stream(list_nodes)],['a1','b2'])
+
+class PagesTest(unittest.TestCase):
+    def testPages(self):
+        self.assertEqual(list(rules.pages(range(7),3)),[[0,1,2],[3,4,5],[6]])
+        self.assertEqual(list(rules.pages(range(6),3)),[[0,1,2],[3,4,5]])
+        self.assertEqual(list(rules.pages([],3)),[])
+
+    def testPagesOfAStream(self):
+        ruleSet=rules.RenameRules([rules.counterRule(1,1)])
+        list_nodes=[('|n'+str(index),None) for index in range(5)]
+        list_pages=list(rules.pages(ruleSet.stream(list_nodes),2))
+
+        self.assertEqual([len(page) for page in list_pages],[2,2,1])
+        self.assertEqual(list_pages[2],[('|n4','n4','n45')])
+
+    def testPairNodeTypes(self):
+        self.assertEqual(list(rules.pairNodeTypes(['|a','joint','|b','mesh'])),[('|a','joint'),('|b','mesh')])
+
+    def testPhaseTimes(self):
+        dict_times={}
+
+        with rules.timedPhase(dict_times,'plan'):
+            pass
+
+        self.assertEqual(list(dict_times),['plan'])
+        self.assertTrue(rules.formatPhaseTimes(dict_times,3,4).startswith('Renamed 3 of 4 nodes, plan '))
+
+if __name__=='__main__':
+    unittest.main()